@@ -47,6 +47,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Outermost, so per-route latency covers every other middleware
+    'pets.middleware.PerformanceMiddleware',
+    # Before anything that queries, so reads of a safe request can use replicas
+    'pets.middleware.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -80,13 +84,132 @@ WSGI_APPLICATION = 'pet_adoption.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+# DATABASE_ENGINE=postgres switches to PostgreSQL with Django's psycopg 3
+# connection pool (needs `pip install "psycopg[binary,pool]"`); SQLite otherwise.
+DATABASE_ENGINE = os.environ.get('DATABASE_ENGINE', 'sqlite')
+
+if DATABASE_ENGINE == 'postgres':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('POSTGRES_DB', 'pet_adoption'),
+            'USER': os.environ.get('POSTGRES_USER', 'postgres'),
+            'PASSWORD': os.environ.get('POSTGRES_PASSWORD', ''),
+            'HOST': os.environ.get('POSTGRES_HOST', 'localhost'),
+            'PORT': os.environ.get('POSTGRES_PORT', '5432'),
+            # The pool owns connection reuse, so CONN_MAX_AGE must stay 0
+            'CONN_MAX_AGE': 0,
+            'OPTIONS': {
+                'pool': {
+                    'min_size': int(os.environ.get('POSTGRES_POOL_MIN', 2)),
+                    'max_size': int(os.environ.get('POSTGRES_POOL_MAX', 10)),
+                    'timeout': 10,
+                },
+            },
+        }
     }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+            # Keep connections (and their pragmas and page cache) across requests
+            'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 600)),
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                # Take the write lock at BEGIN: a transaction that read first can
+                # otherwise fail with "database is locked" without waiting at all
+                'transaction_mode': 'IMMEDIATE',
+            },
+        }
+    }
+
+# Read replicas: POSTGRES_REPLICA_HOSTS (comma-separated hosts of streaming
+# replicas) or DATABASE_REPLICAS (comma-separated SQLite files kept current by
+# `manage.py sync_sqlite_replicas`). Each becomes a `replicaN` alias; tests
+# mirror them onto the test database.
+_replicas = [value.strip() for value in os.environ.get(
+    'POSTGRES_REPLICA_HOSTS' if DATABASE_ENGINE == 'postgres' else 'DATABASE_REPLICAS', '',
+).split(',') if value.strip()]
+for _number, _replica in enumerate(_replicas, start=1):
+    DATABASES[f'replica{_number}'] = {
+        **DATABASES['default'],
+        **({'HOST': _replica} if DATABASE_ENGINE == 'postgres' else {'NAME': _replica}),
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['pets.routers.PrimaryReplicaRouter']
+
+# Aliases safe requests read from (pets.middleware.ReplicaRoutingMiddleware)
+PETS_READ_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+# Seconds a client stays on the primary after a write, and replica reads are
+# kept out of the response cache: the replication lag we tolerate
+PETS_REPLICA_LAG_SECONDS = int(os.environ.get('PETS_REPLICA_LAG_SECONDS', 5))
+# Always read from the primary: authentication and the job queue must not lag
+PETS_PRIMARY_ONLY_MODELS = ('authtoken.token', 'auth.user', 'sessions.session', 'pets.job')
+
+# Pragmas run on every new SQLite connection (pets.db.apply_sqlite_pragmas)
+PETS_SQLITE_PRAGMAS = {
+    'journal_mode': 'wal',          # readers never block the writer, and vice versa
+    'synchronous': 'normal',        # durable at checkpoints; safe with WAL
+    'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000)),
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64 * 1024,       # KiB, i.e. 64 MB page cache per connection
+    'temp_store': 'memory',
 }
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+# Cached responses, their version counters and ETags, throttle windows and
+# the similar-pets change log all live in the default cache, so every worker
+# process must share it: set REDIS_URL (needs the redis package) when running
+# more than one. LocMemCache is per process and only right for a single
+# worker, tests and development.
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'pet-adoption',
+        }
+    }
+
+# Seconds an anonymous pet list/detail response stays cached (writes invalidate sooner)
+PETS_RESPONSE_CACHE_TIMEOUT = 300
+
+# Token authentication cache (pets.authentication.CachedTokenAuthentication)
+PETS_TOKEN_CACHE_TTL = 30        # seconds a token stays in the per-process LRU
+PETS_TOKEN_CACHE_SIZE = 10000    # max tokens held per process
+PETS_TOKEN_SHARED_CACHE = None   # cache alias for a cross-process tier, e.g. 'default'
+PETS_TOKEN_SHARED_CACHE_TTL = 300
+
+# Log requests slower than this (ms) with their SQL to 'pets.slow_requests'; None disables
+PETS_SLOW_REQUEST_MS = int(os.environ['PETS_SLOW_REQUEST_MS']) if os.environ.get('PETS_SLOW_REQUEST_MS') else None
+
+# Who may scrape /metrics: these addresses or networks, or a request with
+# "Authorization: Bearer <PETS_METRICS_TOKEN>"; everyone else gets 403
+PETS_METRICS_ALLOWED_IPS = tuple(
+    address.strip() for address in os.environ.get('PETS_METRICS_ALLOWED_IPS', '127.0.0.1,::1').split(',') if address.strip()
+)
+PETS_METRICS_TOKEN = os.environ.get('PETS_METRICS_TOKEN') or None
+
+# Add a Server-Timing header (SQL count/time, serializer time) to every response
+PETS_SERVER_TIMING = os.environ.get('PETS_SERVER_TIMING') == '1'
+
+# Attempts for short write transactions that hit "database is locked" (pets.db.retry_on_busy)
+PETS_BUSY_RETRIES = 8
+
+# Requests of adopted pets older than this move to ArchivedAdoptionRequest
+# (manage.py archive_adoption_requests); read back with ?include_archived=true
+PETS_ADOPTION_ARCHIVE_AFTER_DAYS = int(os.environ.get('PETS_ADOPTION_ARCHIVE_AFTER_DAYS', 365))
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -107,7 +230,8 @@ AUTH_PASSWORD_VALIDATORS = [
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework.authentication.TokenAuthentication',
+        # TokenAuthentication plus an in-process/shared cache of resolved tokens
+        'pets.authentication.CachedTokenAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ),
         'DEFAULT_PERMISSION_CLASSES': (
@@ -119,6 +243,22 @@ REST_FRAMEWORK = {
             'rest_framework.filters.OrderingFilter',
     ),
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    # Sliding-window counters; only views with a throttle scope are limited
+    'DEFAULT_THROTTLE_CLASSES': (
+        'pets.throttling.ScopedSlidingWindowThrottle',
+    ),
+    # '<scope>.anon' (per IP), '<scope>.token' (per token), '<scope>.user' (per session user)
+    'DEFAULT_THROTTLE_RATES': {
+        'signup.anon': os.environ.get('THROTTLE_SIGNUP_ANON', '10/hour'),
+        'adoption_create.token': os.environ.get('THROTTLE_ADOPTION_CREATE', '30/hour'),
+        'adoption_create.user': os.environ.get('THROTTLE_ADOPTION_CREATE', '30/hour'),
+        'pet_list.anon': os.environ.get('THROTTLE_PET_LIST_ANON', '120/min'),
+        'pet_list.token': os.environ.get('THROTTLE_PET_LIST_USER', '600/min'),
+        'pet_list.user': os.environ.get('THROTTLE_PET_LIST_USER', '600/min'),
+    },
+    # Keyset pagination: constant cost per page regardless of depth
+    'DEFAULT_PAGINATION_CLASS': 'pets.pagination.DefaultCursorPagination',
+    'PAGE_SIZE': int(os.environ.get('API_PAGE_SIZE', 20)),
 }
 
 
@@ -128,8 +268,27 @@ SPECTACULAR_SETTINGS = {
     'DESCRIPTION': 'API for managing pet adoptions',
     'VERSION': '1.0.0',
     'SERVE_INCLUDE_SCHEMA': False,
+    # Pets and adoption requests both have a "status" with different choices
+    'ENUM_NAME_OVERRIDES': {
+        'PetStatusEnum': 'pets.models.Pet.STATUS_CHOICES',
+        'AdoptionRequestStatusEnum': 'pets.models.AdoptionRequest.STATUS_CHOICES',
+    },
 }
 
+# Similar-pets index (pets.similarity): hashed description buckets per pet
+# (memory is about 4 * (2 + buckets) bytes per pet) and score weights
+PETS_SIMILAR_TEXT_FEATURES = 128
+PETS_SIMILAR_WEIGHTS = {'species': 1.5, 'city': 0.5, 'age': 0.3, 'text': 0.6}
+# Cache alias for the log of changed pets that keeps every process's index
+# current; it must be shared by all workers (see CACHES)
+PETS_SIMILAR_CHANGE_CACHE = os.environ.get('PETS_SIMILAR_CHANGE_CACHE', 'default')
+
+# Pre-rendered, pre-compressed schema served at /api/schema/ (pets.schema).
+# Rebuilt when PETS_CODE_VERSION changes (set it to the deployed commit), or
+# when the code fingerprint changes if it is unset.
+PETS_SCHEMA_DIR = os.environ.get('PETS_SCHEMA_DIR', os.path.join(BASE_DIR, 'var', 'openapi'))
+PETS_CODE_VERSION = os.environ.get('PETS_CODE_VERSION') or None
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
 
@@ -147,6 +306,23 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# Uploaded files (pet photos)
+MEDIA_URL = '/media/'
+MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+
+# Background threads that render pet photo variants (0 = render inline)
+PETS_PHOTO_WORKERS = int(os.environ.get('PETS_PHOTO_WORKERS', 2))
+
+# Background jobs (pets.jobs, run by `manage.py run_jobs`)
+PETS_JOB_MAX_ATTEMPTS = 5
+PETS_JOB_BACKOFF = 10          # seconds before the first retry, doubling per attempt
+PETS_JOB_MAX_BACKOFF = 3600
+PETS_JOB_LEASE = 300           # seconds before a running job of a dead worker is requeued
+
+# Outgoing mail (adoption notifications); console backend unless configured
+EMAIL_BACKEND = os.environ.get('EMAIL_BACKEND', 'django.core.mail.backends.console.EmailBackend')
+DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL', 'no-reply@pet-adoption.local')
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
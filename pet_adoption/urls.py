@@ -18,7 +18,9 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
-from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
+from drf_spectacular.views import SpectacularSwaggerView
+from pets.metrics import metrics_view
+from pets.schema import PrecomputedSchemaView
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -26,9 +28,11 @@ urlpatterns = [
     # Djoser for authentication
     path("auth/", include("djoser.urls")),
     path("auth/", include("djoser.urls.authtoken")),
-    # Swagger UI endpoints
-    path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
+    # Swagger UI endpoints; the schema is built once per code version (pets.schema)
+    path('api/schema/', PrecomputedSchemaView.as_view(), name='schema'),
     path('api/docs/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
+    # Prometheus scrape endpoint (per-route latency, SQL and response size)
+    path('metrics', metrics_view, name='metrics'),
 ]
 
 if settings.DEBUG:
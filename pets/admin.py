@@ -1,6 +1,8 @@
 from django.contrib import admin
-from .models import Pet, AdoptionRequest
+from .models import Pet, AdoptionRequest, ArchivedAdoptionRequest, Job
 # Register your models here.
 
 admin.site.register(Pet)
-admin.site.register(AdoptionRequest)
\ No newline at end of file
+admin.site.register(AdoptionRequest)
+admin.site.register(ArchivedAdoptionRequest)
+admin.site.register(Job)
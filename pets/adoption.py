@@ -0,0 +1,102 @@
+from django.db import IntegrityError, transaction
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+
+from .db import retry_on_busy
+from .models import AdoptionRequest, Pet
+from .stats import track_requests_decided
+
+
+class AdoptionConflict(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "This adoption request can no longer be decided."
+    default_code = 'conflict'
+
+
+def _lock_pet(pet_id):
+    # Row lock on PostgreSQL/MySQL; SQLite ignores FOR UPDATE and serializes
+    # writers itself (a losing writer gets "database is locked" and retries)
+    return get_object_or_404(Pet.objects.select_for_update(), pk=pet_id)
+
+
+def submit_request(serializer, pet_id, requester):
+    """Create a pending request for an available pet, at most one per requester."""
+    def attempt():
+        with transaction.atomic():
+            pet = _lock_pet(pet_id)
+            if pet.owner_id == requester.pk:
+                raise ValidationError("You cannot submit an adoption request for your own pet.")
+            if pet.status != 'available':
+                raise ValidationError("This pet has already been adopted.")
+            return serializer.save(pet=pet, requester=requester)
+
+    try:
+        return retry_on_busy(attempt)
+    except IntegrityError:
+        # unique_adoption_request_per_requester: a concurrent duplicate won
+        raise ValidationError("You have already submitted a request for this pet.")
+
+
+def load_request(lookup):
+    """
+    Run ``lookup()`` (e.g. a view's get_object) with the busy retry, since a
+    busy database can fail plain reads too. It runs on its own, before the
+    decision, so the two retry budgets add up instead of multiplying.
+    """
+    return retry_on_busy(lookup)
+
+
+def approve_request(adoption_request):
+    """
+    Approve one pending request, reject every other pending request for the
+    same pet and mark the pet adopted, all in one short transaction.
+
+    The pet row is locked first, the status changes are compare-and-set
+    updates, and ``one_approved_request_per_pet`` backs them up, so two
+    concurrent approvals can never both win. Returns the request as stored.
+    """
+    def attempt():
+        with transaction.atomic():
+            pet = _lock_pet(adoption_request.pet_id)
+            if pet.status != 'available':
+                raise AdoptionConflict("This pet has already been adopted.")
+            now = timezone.now()
+            approved = AdoptionRequest.objects.filter(
+                pk=adoption_request.pk, status=AdoptionRequest.PENDING,
+            ).update(status=AdoptionRequest.APPROVED, decided_at=now)
+            if not approved:
+                raise AdoptionConflict("Only pending requests can be approved.")
+            rejected = AdoptionRequest.objects.filter(
+                pet_id=pet.pk, status=AdoptionRequest.PENDING,
+            ).update(status=AdoptionRequest.REJECTED, decided_at=now)
+            track_requests_decided(pet.pk, pet.owner_id, approved + rejected)
+            # Through save() so facet counts, caches and the search index follow
+            pet.status = 'adopted'
+            pet.save(update_fields=['status'])
+        adoption_request.status, adoption_request.decided_at, adoption_request.pet = AdoptionRequest.APPROVED, now, pet
+        return adoption_request
+
+    try:
+        return retry_on_busy(attempt)
+    except IntegrityError:
+        raise AdoptionConflict("Another request for this pet was approved first.")
+
+
+def reject_request(adoption_request):
+    """Reject one pending request; deciding it twice is a conflict."""
+    now = timezone.now()
+
+    def attempt():
+        with transaction.atomic():
+            rejected = AdoptionRequest.objects.filter(
+                pk=adoption_request.pk, status=AdoptionRequest.PENDING,
+            ).update(status=AdoptionRequest.REJECTED, decided_at=now)
+            track_requests_decided(adoption_request.pet_id, adoption_request.pet.owner_id, rejected)
+            return rejected
+
+    if not retry_on_busy(attempt):
+        raise AdoptionConflict("Only pending requests can be rejected.")
+    adoption_request.status, adoption_request.decided_at = AdoptionRequest.REJECTED, now
+    return adoption_request
@@ -4,3 +4,13 @@ from django.apps import AppConfig
 class PetsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'pets'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+
+        from . import signals  # noqa: F401  (connects model signal receivers)
+        from .db import apply_sqlite_pragmas
+        from .metrics import install_query_recorder
+
+        connection_created.connect(install_query_recorder, dispatch_uid='pets.metrics.query_recorder')
+        connection_created.connect(apply_sqlite_pragmas, dispatch_uid='pets.db.sqlite_pragmas')
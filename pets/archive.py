@@ -0,0 +1,88 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .db import retry_on_busy
+from .models import AdoptionRequest, ArchivedAdoptionRequest, Pet
+
+COPIED_FIELDS = ('requester', 'requester_name', 'phone', 'email', 'message', 'status', 'decided_at', 'created_at')
+COPIED_ATTRS = ('requester_id', *COPIED_FIELDS[1:])
+
+
+def archive_after_days():
+    return getattr(settings, 'PETS_ADOPTION_ARCHIVE_AFTER_DAYS', 365)
+
+
+def archived_copy(adoption_request, pet, now):
+    """The archive row for a request, with a snapshot of its pet."""
+    return ArchivedAdoptionRequest(
+        id=adoption_request.pk, owner_id=pet.owner_id, pet_id=pet.pk, pet_name=pet.name, archived_at=now,
+        **{field: getattr(adoption_request, field) for field in COPIED_ATTRS},
+    )
+
+
+def archive_batch(cutoff, after=0, batch_size=1000, dry_run=False):
+    """
+    Move up to ``batch_size`` requests of adopted pets created before
+    ``cutoff``, in id order past ``after``, in one transaction.
+
+    Returns ``(moved, last_id)``; ``last_id`` is None when nothing was left.
+    Copying and deleting commit together, and copies already in the archive
+    (e.g. after restoring the hot table from a backup) are skipped, so any
+    batch can be rerun.
+    """
+    def move():
+        with transaction.atomic():
+            requests = list(
+                AdoptionRequest.objects
+                .filter(pk__gt=after, created_at__lt=cutoff, pet__status='adopted')
+                .select_related('pet').only('pet__owner', 'pet__name', *COPIED_FIELDS)
+                .order_by('pk')[:batch_size]
+            )
+            if not requests or dry_run:
+                return requests
+            now = timezone.now()
+            ArchivedAdoptionRequest.objects.bulk_create(
+                [archived_copy(request, request.pet, now) for request in requests], ignore_conflicts=True,
+            )
+            # Queryset deletes move the pets' and owners' counters once per batch
+            AdoptionRequest.objects.filter(pk__in=[request.pk for request in requests]).delete()
+            return requests
+
+    requests = retry_on_busy(move)
+    return len(requests), (requests[-1].pk if requests else None)
+
+
+def archive_old_requests(older_than_days=None, batch_size=1000, max_batches=None, dry_run=False):
+    """
+    Yield ``(moved, last_id)`` per batch until no old requests are left (or
+    ``max_batches``). Each batch commits on its own, so an interrupted run
+    keeps what it moved and the next run picks up the rest.
+    """
+    days = archive_after_days() if older_than_days is None else older_than_days
+    cutoff = timezone.now() - timedelta(days=days)
+    after, batches = 0, 0
+    while max_batches is None or batches < max_batches:
+        moved, last_id = archive_batch(cutoff, after, batch_size, dry_run)
+        if last_id is None:
+            return
+        batches += 1
+        after = last_id
+        yield moved, last_id
+
+
+def archive_requests_of_deleted_pet(pet, origin):
+    """
+    Copy a pet's requests into the archive before its delete cascades to
+    them. Skipped when the owner's account is being deleted: the archive
+    rows would go with it.
+    """
+    if not isinstance(origin, Pet) and getattr(origin, 'model', None) is not Pet:
+        return
+    now = timezone.now()
+    ArchivedAdoptionRequest.objects.bulk_create(
+        [archived_copy(request, pet, now) for request in AdoptionRequest.objects.filter(pet=pet).only(*COPIED_FIELDS)],
+        ignore_conflicts=True,
+    )
@@ -0,0 +1,111 @@
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from django.views import View
+from rest_framework import status
+from rest_framework.exceptions import APIException, NotFound, PermissionDenied, Throttled
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from .mixins import FieldSelectionMixin
+from .models import Pet
+from .serializers import PetListSerializer, pet_columns
+from .views import PetViewSet
+
+
+class AsyncPetReadView(FieldSelectionMixin, View):
+    """Async-native pet list and detail for ASGI deployments.
+
+    Serves the same data as ``GET /api/pets/`` and ``GET /api/pets/{pk}/``:
+    same filters, search, cursor pagination, serializer and IsOwnerOrReadOnly
+    read semantics. Queries go through Django's async ORM (async iteration and
+    ``aget``) so a request never occupies a worker thread while it waits on
+    the database. Only safe methods are served; writes stay on PetViewSet.
+
+    Callers are authenticated by the configured authenticators (in a thread,
+    they may query), so throttling sees tokens and users as PetViewSet does,
+    and ``?fields=`` / ``?omit=`` trim the payload and the columns read.
+    """
+    http_method_names = ['get', 'head', 'options']
+
+    queryset = Pet.objects.all()
+    serializer_class = PetViewSet.serializer_class
+    permission_classes = PetViewSet.permission_classes
+    filter_backends = PetViewSet.filter_backends
+    filterset_fields = PetViewSet.filterset_fields
+    pagination_class = PetViewSet.pagination_class
+    throttle_classes = PetViewSet.throttle_classes
+    throttle_scopes = PetViewSet.throttle_scopes
+    renderer = JSONRenderer()
+
+    async def get(self, request, pk=None):
+        self.request = Request(request, authenticators=[auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES])
+        self.action = 'list' if pk is None else 'retrieve'
+        try:
+            await sync_to_async(self.perform_authentication)()
+            self.check_permissions()
+            self.check_throttles()
+            if pk is None:
+                data = await self.list()
+            else:
+                data = await self.retrieve(pk)
+            return self.render(data)
+        except APIException as exc:
+            # Same body shape as DRF's default exception handler
+            data = exc.detail if isinstance(exc.detail, (list, dict)) else {'detail': exc.detail}
+            response = self.render(data, exc.status_code)
+            if getattr(exc, 'wait', None):
+                response['Retry-After'] = '%d' % exc.wait
+            if exc.status_code == status.HTTP_401_UNAUTHORIZED and self.request.authenticators:
+                response['WWW-Authenticate'] = self.request.authenticators[0].authenticate_header(self.request)
+            return response
+
+    def perform_authentication(self):
+        # Resolves request.user and request.auth; bad credentials raise here
+        self.request.user
+
+    def get_queryset(self):
+        fieldset = self.get_fieldset()
+        if fieldset:
+            return self.queryset.only(*pet_columns(PetListSerializer.select(**fieldset)))
+        return self.queryset.all()
+
+    async def list(self):
+        queryset = self.get_queryset()
+        for backend in self.filter_backends:
+            queryset = backend().filter_queryset(self.request, queryset, self)
+        paginator = self.pagination_class()
+        page = await paginator.apaginate_queryset(queryset, self.request, view=self)
+        data = self.get_serializer(page, many=True).data
+        return paginator.get_paginated_response(data).data
+
+    async def retrieve(self, pk):
+        try:
+            pet = await self.get_queryset().aget(pk=pk)
+        except Pet.DoesNotExist:
+            raise NotFound("No Pet matches the given query.")
+        self.check_object_permissions(pet)
+        return self.get_serializer(pet).data
+
+    def check_permissions(self):
+        for permission in self.permission_classes:
+            if not permission().has_permission(self.request, self):
+                raise PermissionDenied()
+
+    def check_throttles(self):
+        waits = [throttle.wait() for throttle in (cls() for cls in self.throttle_classes)
+                 if not throttle.allow_request(self.request, self)]
+        if waits:
+            raise Throttled(max(waits))
+
+    def check_object_permissions(self, obj):
+        for permission in self.permission_classes:
+            if not permission().has_object_permission(self.request, self, obj):
+                raise PermissionDenied()
+
+    def get_serializer(self, *args, **kwargs):
+        kwargs.update(self.get_fieldset())
+        return self.serializer_class(*args, context={'request': self.request, 'view': self}, **kwargs)
+
+    def render(self, data, status_code=status.HTTP_200_OK):
+        return HttpResponse(self.renderer.render(data), status=status_code, content_type='application/json')
@@ -0,0 +1,126 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+SHARED_KEY = 'auth:token:{key}'
+
+
+class TTLCache:
+    """Small thread-safe LRU with a per-entry time to live."""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires = item
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def delete_where(self, predicate):
+        with self._lock:
+            for key in [key for key, (value, _) in self._data.items() if predicate(value)]:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+_local = TTLCache(
+    maxsize=getattr(settings, 'PETS_TOKEN_CACHE_SIZE', 10000),
+    ttl=getattr(settings, 'PETS_TOKEN_CACHE_TTL', 30),
+)
+
+
+def shared_cache():
+    alias = getattr(settings, 'PETS_TOKEN_SHARED_CACHE', None)
+    return caches[alias] if alias else None
+
+
+def invalidate_token(key):
+    _local.delete(key)
+    shared = shared_cache()
+    if shared is not None:
+        shared.delete(SHARED_KEY.format(key=key))
+
+
+def invalidate_user(user_pk, keys=()):
+    """Forget every cached token of one user (deactivation, logout, profile change)."""
+    _local.delete_where(lambda user: user.pk == user_pk)
+    shared = shared_cache()
+    if shared is not None and keys:
+        shared.delete_many([SHARED_KEY.format(key=key) for key in keys])
+
+
+def clear_token_cache():
+    _local.clear()
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Purpose:
+
+    TokenAuthentication without the per-request ``Token JOIN User`` query.
+
+    Resolved tokens are kept in a bounded in-process LRU (``PETS_TOKEN_CACHE_SIZE``
+    entries, ``PETS_TOKEN_CACHE_TTL`` seconds) and, when ``PETS_TOKEN_SHARED_CACHE``
+    names a cache alias, in that shared cache for ``PETS_TOKEN_SHARED_CACHE_TTL``
+    seconds. Token deletion (including djoser logout) and any User save, such
+    as deactivation, invalidate both tiers through ``pets.signals``.
+
+    Other processes' in-process tiers can only age out, so the local TTL is the
+    bound on how long a revoked token may still be accepted elsewhere.
+    """
+
+    def authenticate_credentials(self, key):
+        user = _local.get(key)
+        if user is None:
+            user = self.get_shared(key)
+            if user is None:
+                user, token = super().authenticate_credentials(key)
+                self.set_shared(key, user)
+            _local.set(key, user)
+        # Requests may annotate request.user; never hand out the shared instance
+        user = copy.copy(user)
+        return (user, Token(key=key, user=user))
+
+    def get_shared(self, key):
+        shared = shared_cache()
+        if shared is None:
+            return None
+        return shared.get(SHARED_KEY.format(key=key))
+
+    def set_shared(self, key, user):
+        shared = shared_cache()
+        if shared is not None:
+            shared.set(
+                SHARED_KEY.format(key=key), user,
+                getattr(settings, 'PETS_TOKEN_SHARED_CACHE_TTL', 300),
+            )
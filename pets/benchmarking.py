@@ -0,0 +1,366 @@
+import http.client
+import json
+import random
+import re
+import statistics
+import threading
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler
+from django.core.wsgi import get_wsgi_application
+from django.db import connection, connections, transaction
+from django.test import Client, override_settings
+from django.test.utils import (
+    setup_databases, setup_test_environment, teardown_databases, teardown_test_environment,
+)
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from .facets import rebuild_facet_counts
+from .geo import geocode
+from .models import AdoptionRequest, Pet
+from .search import get_search_backend
+from .stats import reconcile_stats
+
+PET_NAMES = ['Rex', 'Luna', 'Max', 'Bella', 'Milo', 'Coco', 'Rocky', 'Nala', 'Simba', 'Kiwi']
+CITIES = ['Cairo', 'Giza', 'Alexandria', 'Luxor', 'Aswan', 'Mansoura', 'Tanta', 'Suez']
+WORDS = (
+    'friendly playful calm shy energetic loyal gentle curious house-trained vaccinated '
+    'labrador poodle siamese persian parrot canary beagle tabby kids garden apartment'
+).split()
+
+
+@contextmanager
+def benchmark_database(verbosity=0, sqlite_path=None):
+    """
+    Run a benchmark against a throwaway test database, never the real one.
+
+    ``sqlite_path`` puts a SQLite test database in that file instead of
+    memory, for measurements that depend on real file locking and journaling.
+    """
+    if sqlite_path and connection.vendor == 'sqlite':
+        connection.settings_dict['TEST']['NAME'] = sqlite_path
+    setup_test_environment()
+    old_config = setup_databases(verbosity=verbosity, interactive=False)
+    try:
+        yield
+    finally:
+        teardown_databases(old_config, verbosity=verbosity)
+        teardown_test_environment()
+
+
+def seed_pets(count, owners=50, batch_size=5000, rng=None):
+    """Insert ``count`` pets spread over ``owners`` users with bulk_create."""
+    rng = rng or random.Random(0)
+    users = User.objects.bulk_create([User(username=f'bench-owner-{i}') for i in range(owners)])
+    species = [choice for choice, _ in Pet.SPECIES_CHOICES]
+    for start in range(0, count, batch_size):
+        Pet.objects.bulk_create([
+            Pet(
+                name=rng.choice(PET_NAMES), age=rng.randint(0, 15), species=rng.choice(species),
+                city=rng.choice(CITIES), photo='pet_photos/bench.jpg',
+                status='available' if rng.random() < 0.8 else 'adopted',
+                description=' '.join(rng.choices(WORDS, k=12)), owner=rng.choice(users),
+            )
+            for _ in range(min(batch_size, count - start))
+        ])
+    get_search_backend().rebuild()
+    return users
+
+
+def _insert_rows(model, columns, rows, chunk_size):
+    """executemany() INSERT of plain tuples: no model instances, no signals."""
+    table = connection.ops.quote_name(model._meta.db_table)
+    names = ', '.join(connection.ops.quote_name(column) for column in columns)
+    sql = f'INSERT INTO {table} ({names}) VALUES ({", ".join(["%s"] * len(columns))})'
+    chunk = []
+    with connection.cursor() as cursor:
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                cursor.executemany(sql, chunk)
+                chunk = []
+        if chunk:
+            cursor.executemany(sql, chunk)
+
+
+def seed_dataset(pets=100_000, adoption_requests=1_000_000, owners=2_000, requesters=20_000,
+                 chunk_size=20_000, rng=None, log=None):
+    """
+    Seed a realistic dataset quickly and return ``(owner_ids, requester_ids)``.
+
+    Rows are generated as tuples and written with ``executemany`` in one
+    transaction, skipping model instances and the per-row signal work; the
+    derived tables (search index, facet counts, request counters) are rebuilt
+    once at the end.
+    Requests per pet follow a long-tailed distribution, adopted pets have one
+    approved request and the rest rejected, so every constraint holds.
+    """
+    rng = rng or random.Random(0)
+    log = log or (lambda message: None)
+    now = timezone.now()
+    adapt = connection.ops.adapt_datetimefield_value
+    species = [choice for choice, _ in Pet.SPECIES_CHOICES]
+    points = {city: geocode(city) for city in CITIES}
+
+    with transaction.atomic():
+        log(f"Creating {owners} owners and {requesters} requesters...")
+        User.objects.bulk_create(
+            [User(username=f'bench-owner-{i}') for i in range(owners)]
+            + [User(username=f'bench-requester-{i}', email=f'requester{i}@example.com') for i in range(requesters)],
+            batch_size=chunk_size,
+        )
+        owner_ids = list(User.objects.filter(username__startswith='bench-owner-').values_list('pk', flat=True))
+        requester_ids = list(User.objects.filter(username__startswith='bench-requester-').values_list('pk', flat=True))
+
+        log(f"Inserting {pets} pets...")
+
+        def pet_rows():
+            for _ in range(pets):
+                city = rng.choice(CITIES)
+                latitude, longitude = points[city]
+                yield (
+                    rng.choice(PET_NAMES), rng.randint(0, 15), rng.choice(species), city,
+                    latitude + rng.uniform(-0.05, 0.05), longitude + rng.uniform(-0.05, 0.05),
+                    'pet_photos/bench.jpg', '{}', 'available' if rng.random() < 0.8 else 'adopted',
+                    ' '.join(rng.choices(WORDS, k=12)), rng.choice(owner_ids), 0, 0,
+                )
+
+        _insert_rows(Pet, (
+            'name', 'age', 'species', 'city', 'latitude', 'longitude',
+            'photo', 'photo_variants', 'status', 'description', 'owner_id',
+            'pending_requests', 'request_count',
+        ), pet_rows(), chunk_size)
+        pet_rows_by_id = list(Pet.objects.order_by('pk').values_list('pk', 'status'))
+
+        log(f"Inserting ~{adoption_requests} adoption requests...")
+        # Long tail: a few popular pets draw most of the requests
+        weights = [rng.paretovariate(1.5) for _ in pet_rows_by_id]
+        scale = adoption_requests / sum(weights)
+
+        def request_rows():
+            for (pet_id, pet_status), weight in zip(pet_rows_by_id, weights):
+                count = min(round(weight * scale), len(requester_ids))
+                for position, requester_id in enumerate(rng.sample(requester_ids, count)):
+                    created = now - timedelta(minutes=rng.randint(1, 525_600))
+                    if pet_status == 'adopted':
+                        status = AdoptionRequest.APPROVED if position == 0 else AdoptionRequest.REJECTED
+                        decided_at = adapt(created + timedelta(days=1))
+                    else:
+                        status, decided_at = AdoptionRequest.PENDING, None
+                    yield (
+                        pet_id, requester_id, f'Requester {requester_id}', '0100000000',
+                        f'requester{requester_id}@example.com', rng.choice(WORDS), status, decided_at, adapt(created),
+                    )
+
+        _insert_rows(AdoptionRequest, (
+            'pet_id', 'requester_id', 'requester_name', 'phone', 'email', 'message',
+            'status', 'decided_at', 'created_at',
+        ), request_rows(), chunk_size)
+
+        log("Rebuilding search index, facet counts and request counters...")
+        get_search_backend().rebuild()
+        rebuild_facet_counts()
+        reconcile_stats()
+    return owner_ids, requester_ids
+
+
+def create_tokens(user_ids):
+    """{user_id: token key} for ``user_ids``, created in bulk."""
+    tokens = [Token(key=Token.generate_key(), user_id=user_id) for user_id in user_ids]
+    Token.objects.bulk_create(tokens, batch_size=5000)
+    return {token.user_id: token.key for token in tokens}
+
+
+SERVER_TIMING_QUERIES = re.compile(r'desc="(\d+) queries"')
+
+
+def query_count(server_timing):
+    """SQL statement count from the Server-Timing header (PETS_SERVER_TIMING)."""
+    match = SERVER_TIMING_QUERIES.search(server_timing or '')
+    return int(match.group(1)) if match else None
+
+
+class InProcessTransport:
+    """Requests through Django's test client: full middleware/view stack, no sockets."""
+    name = 'in-process'
+
+    def __init__(self):
+        self.local = threading.local()
+
+    def get(self, path, headers):
+        client = getattr(self.local, 'client', None)
+        if client is None:
+            client = self.local.client = Client()
+        response = client.get(path, headers=headers)
+        return response.status_code, response.get('Server-Timing')
+
+    def close(self):
+        connections.close_all()
+
+
+class HTTPTransport:
+    """Keep-alive HTTP/1.1 connections to a running server, one per thread."""
+    name = 'http'
+
+    def __init__(self, base_url):
+        parts = urlsplit(base_url)
+        self.host, self.port = parts.hostname, parts.port or 80
+        self.local = threading.local()
+
+    def get(self, path, headers):
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            conn = self.local.conn = http.client.HTTPConnection(self.host, self.port, timeout=30)
+        try:
+            conn.request('GET', path, headers=headers)
+            response = conn.getresponse()
+            response.read()
+        except (http.client.HTTPException, OSError):
+            conn.close()
+            self.local.conn = None
+            raise
+        return response.status, response.getheader('Server-Timing')
+
+    def close(self):
+        conn = getattr(self.local, 'conn', None)
+        if conn is not None:
+            conn.close()
+
+
+class QuietRequestHandler(WSGIRequestHandler):
+    # Headers and body are written separately; with Nagle on, keep-alive
+    # clients wait out a ~40 ms delayed ACK on every response
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+
+@contextmanager
+def local_server(host='127.0.0.1', port=0):
+    """Serve the project's WSGI app from a threaded server; yields its base URL."""
+    server = ThreadedWSGIServer((host, port), QuietRequestHandler, allow_reuse_address=True)
+    server.set_app(get_wsgi_application())
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, host]):
+            yield f'http://{host}:{server.server_port}'
+    finally:
+        server.shutdown()
+        server.server_close()
+        thread.join()
+
+
+def run_load(transport, calls, concurrency):
+    """
+    Send ``calls`` (``(path, headers)`` pairs) from ``concurrency`` threads.
+
+    Returns ``summarize()`` plus error and SQL query statistics; the query
+    counts come from the Server-Timing header.
+    """
+    pending = iter(calls)
+    lock = threading.Lock()
+    latencies, queries = [], []
+    errors = 0
+
+    def worker():
+        nonlocal errors
+        try:
+            while True:
+                with lock:
+                    call = next(pending, None)
+                if call is None:
+                    return
+                start = time.perf_counter()
+                try:
+                    status, server_timing = transport.get(*call)
+                except Exception:
+                    status, server_timing = None, None
+                elapsed = time.perf_counter() - start
+                count = query_count(server_timing)
+                with lock:
+                    latencies.append(elapsed)
+                    if status != 200:
+                        errors += 1
+                    if count is not None:
+                        queries.append(count)
+        finally:
+            transport.close()
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    with Timer() as timer:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    stats = summarize(latencies, timer.elapsed)
+    stats.update({
+        'errors': errors,
+        'queries_mean': round(statistics.fmean(queries), 2) if queries else None,
+        'queries_max': max(queries) if queries else None,
+    })
+    return stats
+
+
+def compare_to_baseline(results, baseline, tolerance=0.15):
+    """
+    Regressions of ``results`` against a saved baseline run, as messages.
+
+    Throughput and p95 may move by ``tolerance`` (noise); the maximum query
+    count is deterministic, so any increase is reported.
+    """
+    previous = {(row['scenario'], row['transport']): row for row in baseline['results']}
+    regressions = []
+    for row in results:
+        before = previous.get((row['scenario'], row['transport']))
+        if before is None:
+            continue
+        label = f"{row['scenario']} [{row['transport']}]"
+        if before['rps'] and row['rps'] < before['rps'] * (1 - tolerance):
+            regressions.append(f"{label}: {row['rps']} req/s, baseline {before['rps']}")
+        if before['p95_ms'] and row['p95_ms'] > before['p95_ms'] * (1 + tolerance):
+            regressions.append(f"{label}: p95 {row['p95_ms']} ms, baseline {before['p95_ms']}")
+        if before.get('queries_max') is not None and (row.get('queries_max') or 0) > before['queries_max']:
+            regressions.append(f"{label}: {row['queries_max']} queries, baseline {before['queries_max']}")
+    return regressions
+
+
+def load_results(path):
+    with open(path) as handle:
+        return json.load(handle)
+
+
+def percentile(ordered, fraction):
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(latencies, elapsed):
+    """Throughput and latency percentiles (milliseconds) for one run."""
+    ordered = sorted(latencies)
+    return {
+        'requests': len(ordered),
+        'rps': round(len(ordered) / elapsed, 1) if elapsed else 0.0,
+        'mean_ms': round(statistics.fmean(ordered) * 1000, 2) if ordered else 0.0,
+        'p50_ms': round(percentile(ordered, 0.50) * 1000, 2),
+        'p95_ms': round(percentile(ordered, 0.95) * 1000, 2),
+        'p99_ms': round(percentile(ordered, 0.99) * 1000, 2),
+    }
+
+
+class Timer:
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self.start
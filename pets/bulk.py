@@ -0,0 +1,162 @@
+import csv
+import json
+from dataclasses import dataclass, field
+from io import StringIO
+from itertools import islice
+
+from django.db import transaction
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+
+from .cache import invalidate_pet
+from .facets import track_pets_created
+from .geo import fill_coordinates
+from .models import Pet
+from .photos import needs_variants, schedule_variants
+from .search import get_search_backend
+from .similarity import record_changes
+
+EXPORT_FIELDS = ['id', 'name', 'age', 'species', 'city', 'photo', 'status', 'description', 'owner']
+MAX_REPORTED_ERRORS = 1000
+# Characters buffered before a streamed export chunk is handed to the server
+EXPORT_CHUNK_SIZE = 64 * 1024
+
+
+class PetImportSerializer(serializers.ModelSerializer):
+    """PetSerializer fields for bulk rows; ``photo`` is an existing storage path, not an upload."""
+    photo = serializers.CharField(max_length=100)
+
+    class Meta:
+        model = Pet
+        fields = ['name', 'age', 'species', 'city', 'latitude', 'longitude', 'photo', 'status', 'description']
+
+
+@dataclass
+class ImportResult:
+    created: int = 0
+    error_count: int = 0
+    errors: list = field(default_factory=list)
+
+    def add_error(self, row, detail):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'row': row, 'errors': detail})
+
+    def as_dict(self):
+        return {'created': self.created, 'error_count': self.error_count, 'errors': self.errors}
+
+
+def iter_lines(stream):
+    """Decoded lines from a file-like object, read one at a time."""
+    while True:
+        raw = stream.readline()
+        if not raw:
+            return
+        yield raw.decode('utf-8-sig') if isinstance(raw, bytes) else raw
+
+
+def read_ndjson(lines):
+    for number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield number, json.loads(line)
+        except ValueError as exc:
+            yield number, exc
+
+
+def read_csv(lines):
+    # Header is line 1, so the first data row is reported as row 2
+    for number, row in enumerate(csv.DictReader(lines), start=2):
+        yield number, {key: value for key, value in row.items() if key and value != ''}
+
+
+def import_pets(rows, owner, batch_size=500):
+    """
+    Validate and insert ``(row_number, data)`` pairs for ``owner``.
+
+    Rows are read lazily, validated one by one with PetImportSerializer and
+    written with ``bulk_create`` in chunks of ``batch_size``; each chunk is its
+    own transaction. Invalid rows are skipped and reported by row number.
+    """
+    result = ImportResult()
+    validator = PetImportSerializer()
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            break
+        pets = []
+        for number, data in batch:
+            if isinstance(data, Exception):
+                result.add_error(number, {'non_field_errors': [f"Invalid JSON: {data}"]})
+                continue
+            if not isinstance(data, dict):
+                result.add_error(number, {'non_field_errors': ["Expected an object."]})
+                continue
+            try:
+                pets.append(Pet(owner=owner, **validator.run_validation(data)))
+            except ValidationError as exc:
+                result.add_error(number, exc.detail)
+        if pets:
+            result.created += len(_write_chunk(pets))
+    return result
+
+
+def _write_chunk(pets):
+    # bulk_create skips pre_save/post_save, so do the signal receivers' work in bulk
+    for pet in pets:
+        fill_coordinates(pet)
+    with transaction.atomic():
+        created = Pet.objects.bulk_create(pets)
+        get_search_backend().index_many(created)
+        track_pets_created(created)
+        transaction.on_commit(lambda: _after_import(created))
+    return created
+
+
+def _after_import(pets):
+    invalidate_pet(None)
+    record_changes(pet.pk for pet in pets)
+    for pet in pets:
+        if needs_variants(pet):
+            schedule_variants(pet)
+
+
+def export_rows(queryset):
+    """Pet rows as tuples in EXPORT_FIELDS order, streamed from a server-side iterator."""
+    return queryset.order_by('pk').values_list(
+        'id', 'name', 'age', 'species', 'city', 'photo', 'status', 'description', 'owner_id'
+    ).iterator(chunk_size=2000)
+
+
+def export_ndjson(rows, chunk_size=EXPORT_CHUNK_SIZE):
+    buffer = StringIO()
+    for row in rows:
+        buffer.write(json.dumps(dict(zip(EXPORT_FIELDS, row)), ensure_ascii=False))
+        buffer.write('\n')
+        if buffer.tell() >= chunk_size:
+            yield _drain(buffer)
+    yield _drain(buffer)
+
+
+def export_csv(rows, chunk_size=EXPORT_CHUNK_SIZE):
+    buffer = StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_FIELDS)
+    for row in rows:
+        writer.writerow(row)
+        if buffer.tell() >= chunk_size:
+            yield _drain(buffer)
+    yield _drain(buffer)
+
+
+def _drain(buffer):
+    value = buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+    return value
+
+
+READERS = {'ndjson': read_ndjson, 'csv': read_csv}
+WRITERS = {'ndjson': export_ndjson, 'csv': export_csv}
@@ -0,0 +1,121 @@
+import hashlib
+import time
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import Http404
+from rest_framework import status
+from rest_framework.response import Response
+
+from .routers import note_write, reading_from_replicas, replicas_may_lag
+
+LIST_VERSION_KEY = 'pets:list:version'
+DETAIL_VERSION_KEY = 'pets:detail:{pk}:version'
+
+
+def _get_version(key):
+    # Seed missing versions from the clock so an evicted counter never
+    # restarts at a value an old cached response or ETag was built from.
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def _bump_version(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), timeout=None)
+
+
+def get_list_version():
+    return _get_version(LIST_VERSION_KEY)
+
+
+def get_detail_version(pk):
+    return _get_version(DETAIL_VERSION_KEY.format(pk=pk))
+
+
+def invalidate_pet(pk):
+    """Drop every cached listing plus the cached detail for one pet."""
+    _bump_version(LIST_VERSION_KEY)
+    if pk is not None:
+        _bump_version(DETAIL_VERSION_KEY.format(pk=pk))
+    note_write()
+
+
+def normalized_query(request):
+    """Query string with keys and repeated values sorted, so ?a=1&b=2 == ?b=2&a=1."""
+    items = sorted((key, value) for key, values in request.query_params.lists() for value in values)
+    return urlencode(items)
+
+
+def response_cache_key(request, prefix, version):
+    raw = f"{request.get_host()}|{request.path}|{normalized_query(request)}"
+    digest = hashlib.md5(raw.encode('utf-8')).hexdigest()
+    return f"pets:{prefix}:{version}:{digest}"
+
+
+class CachedPetResponseMixin:
+    """
+    Purpose:
+
+    Serve anonymous pet list/detail reads from Django's cache framework.
+
+    Keys embed a version number that is bumped whenever a Pet is saved or
+    deleted (see ``pets.signals``), so stale entries are never read again and
+    simply age out. Listings share one version; each detail has its own, so
+    editing one pet leaves other pets' detail entries warm.
+
+    Detail responses also carry an ETag derived from the pet's version, and a
+    matching ``If-None-Match`` is answered with 304 before touching the DB.
+
+    Versions live in the default cache, so every worker must share it (see
+    ``CACHES`` in settings); with a per-process cache, other workers keep
+    serving what they cached before a write.
+    """
+    cache_timeout = None
+
+    def get_cache_timeout(self):
+        if self.cache_timeout is not None:
+            return self.cache_timeout
+        return getattr(settings, 'PETS_RESPONSE_CACHE_TIMEOUT', 300)
+
+    def is_cacheable(self, request):
+        return not request.user.is_authenticated
+
+    def cached_response(self, request, key, build):
+        if not self.is_cacheable(request):
+            return build()
+        data = cache.get(key)
+        if data is not None:
+            return Response(data)
+        response = build()
+        # A lagging replica could store pre-write data under the new version
+        if response.status_code == status.HTTP_200_OK and not (reading_from_replicas() and replicas_may_lag()):
+            cache.set(key, response.data, self.get_cache_timeout())
+        return response
+
+    def list(self, request, *args, **kwargs):
+        key = response_cache_key(request, 'list', get_list_version())
+        return self.cached_response(request, key, lambda: super(CachedPetResponseMixin, self).list(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        # /pets/007/ and /pets/7/ are one pet with one version
+        try:
+            pk = int(kwargs[self.lookup_url_kwarg or self.lookup_field])
+        except ValueError:
+            raise Http404
+        version = get_detail_version(pk)
+        etag = f'"{pk}-{version}"'
+        if etag in request.headers.get('If-None-Match', ''):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            key = response_cache_key(request, 'detail', version)
+            response = self.cached_response(request, key, lambda: super(CachedPetResponseMixin, self).retrieve(request, *args, **kwargs))
+        if response.status_code in (status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED):
+            response['ETag'] = etag
+        return response
@@ -0,0 +1,42 @@
+import random
+import time
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections
+
+# SQLite reports writer contention as OperationalError with one of these messages
+BUSY_MESSAGES = ('database is locked', 'database table is locked', 'database is busy')
+
+
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    """``connection_created`` receiver applying ``PETS_SQLITE_PRAGMAS`` to SQLite connections."""
+    if connection.vendor != 'sqlite':
+        return
+    # On the raw sqlite3 connection: connection setup, not the request's queries
+    for name, value in (getattr(settings, 'PETS_SQLITE_PRAGMAS', None) or {}).items():
+        connection.connection.execute(f'PRAGMA {name} = {value}')
+
+
+def is_busy_error(exc):
+    return isinstance(exc, OperationalError) and any(message in str(exc).lower() for message in BUSY_MESSAGES)
+
+
+def retry_on_busy(func, attempts=None, base_delay=0.02, using=DEFAULT_DB_ALIAS):
+    """
+    Call ``func`` (which should open its own ``transaction.atomic()``) and
+    retry it with jittered exponential backoff while the database reports it
+    is busy. ``PETS_BUSY_RETRIES`` attempts by default.
+
+    Inside an outer transaction nothing is retried: the failed statement has
+    already broken it, so the error is left to the caller.
+    """
+    if attempts is None:
+        attempts = getattr(settings, 'PETS_BUSY_RETRIES', 8)
+    connection = connections[using]
+    for attempt in range(attempts):
+        try:
+            return func()
+        except OperationalError as exc:
+            if not is_busy_error(exc) or connection.in_atomic_block or attempt == attempts - 1:
+                raise
+            time.sleep(base_delay * 2 ** attempt * (0.5 + random.random()))
@@ -0,0 +1,115 @@
+from collections import Counter
+
+from django.db import connection, transaction
+from django.db.models import Count, Sum
+
+from .models import Pet, PetFacetCount
+
+FACET_FIELDS = Pet.FACET_FIELDS
+DEFAULT_TOP_CITIES = 10
+
+
+def apply_facet_deltas(deltas):
+    """
+    Add ``{(species, city, status): delta}`` to the summary table.
+
+    One ``INSERT ... ON CONFLICT DO UPDATE`` per bucket (SQLite 3.24+ and
+    PostgreSQL), so concurrent writers never lose an increment.
+    """
+    rows = [(species, city, status, delta) for (species, city, status), delta in deltas.items() if delta]
+    if not rows:
+        return
+    table = PetFacetCount._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'INSERT INTO {table} (species, city, status, count) VALUES (%s, %s, %s, %s) '
+            f'ON CONFLICT (species, city, status) DO UPDATE SET count = {table}.count + excluded.count',
+            rows,
+        )
+
+
+def track_pet_saved(pet, created):
+    deltas = Counter()
+    new_key = pet.facet_key()
+    old_key = None if created else getattr(pet, '_stored_facet_key', None)
+    if old_key != new_key:
+        if old_key is not None:
+            deltas[old_key] -= 1
+        deltas[new_key] += 1
+        apply_facet_deltas(deltas)
+    pet._stored_facet_key = new_key
+
+
+def track_pet_deleted(pet):
+    apply_facet_deltas(Counter({getattr(pet, '_stored_facet_key', pet.facet_key()): -1}))
+
+
+def track_pets_created(pets):
+    apply_facet_deltas(Counter(pet.facet_key() for pet in pets))
+    for pet in pets:
+        pet._stored_facet_key = pet.facet_key()
+
+
+def rebuild_facet_counts():
+    """Recompute the summary table from the pets table (repairs any drift)."""
+    with transaction.atomic():
+        PetFacetCount.objects.all().delete()
+        PetFacetCount.objects.bulk_create(
+            PetFacetCount(count=row.pop('total'), **row)
+            for row in Pet.objects.values(*FACET_FIELDS).annotate(total=Count('id')).order_by()
+        )
+    return PetFacetCount.objects.count()
+
+
+def _empty_facets():
+    return {
+        'species': {value: 0 for value, _ in Pet.SPECIES_CHOICES},
+        'status': {value: 0 for value, _ in Pet.STATUS_CHOICES},
+    }
+
+
+def _top_cities(counter, top_cities):
+    return [{'city': city, 'count': count} for city, count in counter.most_common(top_cities) if count > 0]
+
+
+def summary_facets(filters, top_cities=DEFAULT_TOP_CITIES):
+    """
+    Facets for exact species/city/status filters, read from PetFacetCount only.
+
+    Each facet applies every filter except its own, so the counts show what
+    picking a different value would return (e.g. with ?species=dog the species
+    facet still counts cats and birds).
+    """
+    facets = _empty_facets()
+    for field in FACET_FIELDS:
+        others = {key: value for key, value in filters.items() if key != field}
+        rows = (
+            PetFacetCount.objects.filter(**others).values(field)
+            .annotate(total=Sum('count')).filter(total__gt=0).order_by()
+        )
+        if field == 'city':
+            rows = rows.order_by('-total', 'city')[:top_cities]
+            facets['cities'] = [{'city': row['city'], 'count': row['total']} for row in rows]
+        else:
+            facets[field].update({row[field]: row['total'] for row in rows})
+    return facets
+
+
+def queryset_facets(queryset, filters, top_cities=DEFAULT_TOP_CITIES):
+    """
+    Same facets for a queryset narrowed by other means (search, near): one
+    grouped aggregate over the already-filtered rows, folded in Python.
+    """
+    facets = _empty_facets()
+    cities = Counter()
+    rows = queryset.order_by().values_list(*FACET_FIELDS).annotate(total=Count('id'))
+    for species, city, status, total in rows:
+        row = {'species': species, 'city': city, 'status': status}
+        for field in FACET_FIELDS:
+            if all(row[key] == value for key, value in filters.items() if key != field):
+                if field == 'city':
+                    cities[city] += total
+                else:
+                    facets[field][row[field]] = facets[field].get(row[field], 0) + total
+    facets['cities'] = _top_cities(cities, top_cities)
+    return facets
@@ -0,0 +1,118 @@
+from django.db.models import F, Q
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+from .geo import DISTANCE, bounding_box, geocode, haversine_km
+from .search import get_search_backend, search_terms
+
+POPULARITY = 'popularity'
+
+
+class PetSearchFilter(BaseFilterBackend):
+    """
+    Purpose:
+
+    ``?search=`` over pet name, description and city using the configured
+    search backend (FTS5 on SQLite) instead of LIKE scans.
+
+    Used for:
+
+    PetViewSet, alongside the species/city/status filters. Terms are prefix
+    matched and all must match; with FTS5, results come back best match first.
+    """
+    search_param = 'search'
+
+    def filter_queryset(self, request, queryset, view):
+        terms = search_terms(request.query_params.get(self.search_param, ''))
+        if not terms:
+            return queryset
+        return get_search_backend().filter(queryset, terms)
+
+
+class PetNearFilter(BaseFilterBackend):
+    """
+    Purpose:
+
+    ``?near=lat,lng&radius=km`` (or ``?near=<city>``): pets within ``radius``
+    kilometres, nearest first, annotated with ``distance_km``.
+
+    Used for:
+
+    PetViewSet. A bounding box on the indexed (latitude, longitude) columns
+    narrows the candidates first, so only pets in the box get an exact
+    great-circle distance and latency does not grow with the table.
+    """
+    near_param = 'near'
+    radius_param = 'radius'
+    default_radius_km = 25.0
+    max_radius_km = 500.0
+
+    def filter_queryset(self, request, queryset, view):
+        near = request.query_params.get(self.near_param)
+        if not near:
+            return queryset
+        latitude, longitude = self.parse_point(near)
+        radius = self.parse_radius(request.query_params.get(self.radius_param))
+
+        min_lat, max_lat, min_lng, max_lng = bounding_box(latitude, longitude, radius)
+        box = Q(latitude__range=(min_lat, max_lat))
+        if min_lng < -180:
+            box &= Q(longitude__gte=min_lng + 360) | Q(longitude__lte=max_lng)
+        elif max_lng > 180:
+            box &= Q(longitude__gte=min_lng) | Q(longitude__lte=max_lng - 360)
+        else:
+            box &= Q(longitude__range=(min_lng, max_lng))
+        return queryset.filter(box).annotate(
+            **{DISTANCE: haversine_km(latitude, longitude)}
+        ).filter(**{f'{DISTANCE}__lte': radius})
+
+    def parse_point(self, value):
+        parts = value.split(',')
+        if len(parts) == 2:
+            try:
+                latitude, longitude = float(parts[0]), float(parts[1])
+            except ValueError:
+                pass
+            else:
+                if -90 <= latitude <= 90 and -180 <= longitude <= 180:
+                    return latitude, longitude
+                raise ValidationError({self.near_param: "Coordinates out of range."})
+        point = geocode(value)
+        if point is None:
+            raise ValidationError({self.near_param: "Use 'latitude,longitude' or a known city name."})
+        return point
+
+    def parse_radius(self, value):
+        if value in (None, ''):
+            return self.default_radius_km
+        try:
+            radius = float(value)
+        except ValueError:
+            raise ValidationError({self.radius_param: "Must be a number of kilometres."})
+        if not 0 < radius <= self.max_radius_km:
+            raise ValidationError({self.radius_param: f"Must be between 0 and {self.max_radius_km:g} km."})
+        return radius
+
+
+class PetOrderingFilter(BaseFilterBackend):
+    """
+    Purpose:
+
+    ``?ordering=popularity``: pets with the most pending adoption requests
+    first, read from the ``pending_requests`` counter kept by pets.stats
+    instead of counting each pet's requests.
+
+    Used for:
+
+    PetViewSet. The value is annotated so PetCursorPagination can key pages
+    on it; it takes precedence over the ``?near=`` and ``?search=`` orders.
+    """
+    ordering_param = 'ordering'
+
+    def filter_queryset(self, request, queryset, view):
+        ordering = request.query_params.get(self.ordering_param)
+        if not ordering:
+            return queryset
+        if ordering != POPULARITY:
+            raise ValidationError({self.ordering_param: f"Use '{POPULARITY}'."})
+        return queryset.annotate(**{POPULARITY: F('pending_requests')})
@@ -0,0 +1,124 @@
+import csv
+import math
+import unicodedata
+from functools import lru_cache
+
+from django.conf import settings
+from django.db.models import F, FloatField, Value
+from django.db.models.functions import ASin, Cos, Least, Power, Radians, Sin, Sqrt
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE_LAT = 111.045
+DISTANCE = 'distance_km'
+
+# Offline city -> (latitude, longitude) lookup. Extend or replace it with a
+# CSV file (name,latitude,longitude) named by PETS_GAZETTEER_PATH.
+CITIES = {
+    'cairo': (30.0444, 31.2357),
+    'new cairo': (30.0300, 31.4700),
+    'giza': (30.0131, 31.2089),
+    '6th of october': (29.9285, 30.9188),
+    'alexandria': (31.2001, 29.9187),
+    'port said': (31.2653, 32.3019),
+    'suez': (29.9668, 32.5498),
+    'ismailia': (30.5965, 32.2715),
+    'damietta': (31.4165, 31.8133),
+    'mansoura': (31.0409, 31.3785),
+    'tanta': (30.7865, 31.0004),
+    'zagazig': (30.5877, 31.5020),
+    'banha': (30.4660, 31.1848),
+    'shibin el kom': (30.5580, 31.0100),
+    'kafr el sheikh': (31.1107, 30.9388),
+    'damanhur': (31.0341, 30.4682),
+    'faiyum': (29.3084, 30.8428),
+    'beni suef': (29.0661, 31.0994),
+    'minya': (28.0871, 30.7618),
+    'asyut': (27.1783, 31.1859),
+    'sohag': (26.5591, 31.6957),
+    'qena': (26.1551, 32.7160),
+    'luxor': (25.6872, 32.6396),
+    'aswan': (24.0889, 32.8998),
+    'hurghada': (27.2579, 33.8116),
+    'sharm el sheikh': (27.9158, 34.3300),
+    'marsa matruh': (31.3543, 27.2373),
+    'riyadh': (24.7136, 46.6753),
+    'jeddah': (21.4858, 39.1925),
+    'dubai': (25.2048, 55.2708),
+    'abu dhabi': (24.4539, 54.3773),
+    'doha': (25.2854, 51.5310),
+    'kuwait city': (29.3759, 47.9774),
+    'amman': (31.9454, 35.9284),
+    'beirut': (33.8938, 35.5018),
+    'istanbul': (41.0082, 28.9784),
+    'london': (51.5072, -0.1276),
+    'paris': (48.8566, 2.3522),
+    'berlin': (52.5200, 13.4050),
+    'madrid': (40.4168, -3.7038),
+    'rome': (41.9028, 12.4964),
+    'new york': (40.7128, -74.0060),
+    'los angeles': (34.0522, -118.2437),
+    'toronto': (43.6532, -79.3832),
+}
+ALIASES = {
+    'alex': 'alexandria',
+    'el giza': 'giza',
+    'al qahirah': 'cairo',
+    'october': '6th of october',
+    'fayoum': 'faiyum',
+    'assiut': 'asyut',
+    'el mansoura': 'mansoura',
+    'sharm': 'sharm el sheikh',
+    'nyc': 'new york',
+}
+
+
+def normalize_city(name):
+    text = unicodedata.normalize('NFKD', name or '')
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+    return ' '.join(text.casefold().replace('-', ' ').split())
+
+
+@lru_cache(maxsize=1)
+def gazetteer():
+    entries = dict(CITIES)
+    path = getattr(settings, 'PETS_GAZETTEER_PATH', None)
+    if path:
+        with open(path, newline='', encoding='utf-8') as handle:
+            for row in csv.DictReader(handle):
+                entries[normalize_city(row['name'])] = (float(row['latitude']), float(row['longitude']))
+    return entries
+
+
+def geocode(city):
+    """(latitude, longitude) for a free-text city name, or None if unknown."""
+    key = normalize_city(city)
+    return gazetteer().get(ALIASES.get(key, key))
+
+
+def fill_coordinates(pet):
+    """Set missing pet coordinates from its city; known coordinates are kept."""
+    if pet.latitude is None or pet.longitude is None:
+        point = geocode(pet.city)
+        pet.latitude, pet.longitude = point if point else (None, None)
+
+
+def bounding_box(latitude, longitude, radius_km):
+    """(min_lat, max_lat, min_lng, max_lng) enclosing a circle of ``radius_km``."""
+    delta_lat = radius_km / KM_PER_DEGREE_LAT
+    cos_lat = max(math.cos(math.radians(latitude)), 1e-6)
+    delta_lng = min(radius_km / (KM_PER_DEGREE_LAT * cos_lat), 180.0)
+    return (
+        max(latitude - delta_lat, -90.0), min(latitude + delta_lat, 90.0),
+        longitude - delta_lng, longitude + delta_lng,
+    )
+
+
+def haversine_km(latitude, longitude):
+    """ORM expression: great-circle distance from the point to each pet, in km."""
+    lat1 = Radians(Value(latitude, output_field=FloatField()))
+    lat2 = Radians(F('latitude'))
+    half_dlat = (lat2 - lat1) / 2
+    half_dlng = (Radians(F('longitude')) - Radians(Value(longitude, output_field=FloatField()))) / 2
+    a = Power(Sin(half_dlat), 2) + Cos(lat1) * Cos(lat2) * Power(Sin(half_dlng), 2)
+    # Least() guards ASin against rounding just above 1 for antipodal points
+    return 2 * EARTH_RADIUS_KM * ASin(Least(Sqrt(a), Value(1.0)))
@@ -0,0 +1,165 @@
+import logging
+import os
+import random
+import socket
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
+
+from .db import retry_on_busy
+from .models import Job
+
+logger = logging.getLogger('pets.jobs')
+
+_tasks = {}
+
+
+def task(name):
+    """Register a function as the handler for jobs named ``name``."""
+    def register(func):
+        _tasks[name] = func
+        return func
+    return register
+
+
+def enqueue(name, max_attempts=None, **payload):
+    """
+    Queue ``name(**payload)`` to run in a worker once the current transaction
+    commits; rolled back work never notifies anyone. The payload must be JSON
+    serializable (pass primary keys, not instances).
+    """
+    if name not in _tasks:
+        raise KeyError(f"Unknown job task {name!r}")
+    job = Job(
+        task=name, payload=payload,
+        max_attempts=max_attempts or getattr(settings, 'PETS_JOB_MAX_ATTEMPTS', 5),
+    )
+    # robust: a failed insert is logged instead of failing the committed request
+    transaction.on_commit(lambda: retry_on_busy(job.save), robust=True)
+
+
+def backoff(attempts):
+    """Seconds before retry number ``attempts``: exponential, capped, jittered."""
+    base = getattr(settings, 'PETS_JOB_BACKOFF', 10)
+    cap = getattr(settings, 'PETS_JOB_MAX_BACKOFF', 3600)
+    return min(base * 2 ** (attempts - 1), cap) * (0.5 + random.random() / 2)
+
+
+class Worker:
+    """
+    Claims due jobs in batches and runs them on a thread pool.
+
+    Claiming uses ``SELECT ... FOR UPDATE SKIP LOCKED`` where the backend
+    supports it (PostgreSQL, MySQL 8), so concurrent workers never wait on
+    each other's batches. Everywhere else (SQLite) the claim is a
+    compare-and-set ``UPDATE ... WHERE status = 'queued'`` tagged with a
+    per-batch token, which is what makes a claim exclusive on every backend.
+    Jobs whose worker died are requeued once their lease (``PETS_JOB_LEASE``
+    seconds) runs out.
+    """
+
+    def __init__(self, concurrency=4, batch_size=None, name=None):
+        self.concurrency = concurrency
+        self.batch_size = batch_size or concurrency * 4
+        self.name = name or f'{socket.gethostname()}:{os.getpid()}'
+
+    def pool(self):
+        return ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='pet-jobs')
+
+    def run(self, stop_event, poll_interval=1.0):
+        """Poll until ``stop_event`` is set, sleeping while nothing is due."""
+        with self.pool() as pool:
+            while not stop_event.is_set():
+                if not self.run_once(pool):
+                    stop_event.wait(poll_interval)
+
+    def drain(self):
+        """Run batches until nothing is due; returns how many jobs ran."""
+        total = 0
+        # concurrency=1 runs in the calling thread (and its transaction)
+        with self.pool() if self.concurrency > 1 else nullcontext() as pool:
+            while count := self.run_once(pool):
+                total += count
+        return total
+
+    def run_once(self, pool=None):
+        """Claim and run one batch; returns how many jobs it ran."""
+        self.recover_expired()
+        jobs = self.claim()
+        if pool is None or len(jobs) < 2:
+            for job in jobs:
+                self.execute(job, close_connection=False)
+        else:
+            list(pool.map(self.execute, jobs))
+        return len(jobs)
+
+    def claim(self):
+        token = f'{self.name}:{uuid.uuid4().hex[:12]}'
+
+        def attempt():
+            now = timezone.now()
+            with transaction.atomic():
+                due = Job.objects.filter(status=Job.QUEUED, run_at__lte=now).order_by('run_at', 'id')
+                if connection.features.has_select_for_update_skip_locked:
+                    due = due.select_for_update(skip_locked=True)
+                ids = list(due.values_list('id', flat=True)[:self.batch_size])
+                if not ids:
+                    return []
+                Job.objects.filter(pk__in=ids, status=Job.QUEUED).update(
+                    status=Job.RUNNING, locked_by=token, locked_at=now,
+                )
+                return list(Job.objects.filter(locked_by=token).order_by('run_at', 'id'))
+
+        return retry_on_busy(attempt)
+
+    def recover_expired(self):
+        lease = timedelta(seconds=getattr(settings, 'PETS_JOB_LEASE', 300))
+        return retry_on_busy(lambda: Job.objects.filter(
+            status=Job.RUNNING, locked_at__lt=timezone.now() - lease,
+        ).update(status=Job.QUEUED, locked_by='', locked_at=None))
+
+    def execute(self, job, close_connection=True):
+        try:
+            handler = _tasks.get(job.task)
+            if handler is None:
+                self.finish(job, Job.FAILED, error=f"Unknown task {job.task!r}")
+                return
+            try:
+                handler(**job.payload)
+            except Exception:
+                logger.warning("Job %s (%s) failed", job.pk, job.task, exc_info=True)
+                self.fail(job, traceback.format_exc())
+            else:
+                self.finish(job, Job.DONE)
+        finally:
+            if close_connection:
+                close_old_connections()
+
+    def fail(self, job, error):
+        attempts = job.attempts + 1
+        if attempts >= job.max_attempts:
+            self.finish(job, Job.FAILED, error=error, attempts=attempts)
+            return
+        retry_on_busy(lambda: Job.objects.filter(pk=job.pk, locked_by=job.locked_by).update(
+            status=Job.QUEUED, attempts=attempts, last_error=error, locked_by='', locked_at=None,
+            run_at=timezone.now() + timedelta(seconds=backoff(attempts)),
+        ))
+
+    def finish(self, job, status, error='', attempts=None):
+        # Guarded by the claim token: a job requeued after its lease expired
+        # belongs to whoever claimed it next
+        retry_on_busy(lambda: Job.objects.filter(pk=job.pk, locked_by=job.locked_by).update(
+            status=status, attempts=job.attempts + 1 if attempts is None else attempts,
+            last_error=error, locked_at=None, finished_at=timezone.now(),
+        ))
+
+
+def run_pending():
+    """Run every due job in the calling thread (tests, one-off scripts)."""
+    return Worker(concurrency=1).drain()
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from pets.archive import archive_after_days, archive_old_requests
+
+
+class Command(BaseCommand):
+    help = (
+        "Move adoption requests of adopted pets older than --older-than days into the archive table, "
+        "in batches that each commit on their own. Safe to interrupt and rerun. Requests of deleted "
+        "pets are archived when the pet is deleted."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than', type=int, default=None,
+                            help="Age in days (default PETS_ADOPTION_ARCHIVE_AFTER_DAYS).")
+        parser.add_argument('--batch-size', type=int, default=1000, help="Requests moved per transaction.")
+        parser.add_argument('--max-batches', type=int, default=None, help="Stop after this many batches.")
+        parser.add_argument('--dry-run', action='store_true', help="Count what would move without moving it.")
+
+    def handle(self, *args, **options):
+        days = archive_after_days() if options['older_than'] is None else options['older_than']
+        if days < 0 or options['batch_size'] < 1:
+            raise CommandError("--older-than must be >= 0 and --batch-size >= 1.")
+        total = 0
+        for moved, last_id in archive_old_requests(days, options['batch_size'], options['max_batches'], options['dry_run']):
+            total += moved
+            self.stdout.write(f"{'Found' if options['dry_run'] else 'Archived'} {moved} requests (up to id {last_id}).")
+        verb = 'would be archived' if options['dry_run'] else 'archived'
+        self.stdout.write(self.style.SUCCESS(f"{total} requests older than {days} days {verb}."))
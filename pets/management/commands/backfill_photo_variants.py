@@ -0,0 +1,49 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from pets.models import Pet
+from pets.photos import needs_variants, process_pet_photo
+
+
+class Command(BaseCommand):
+    help = "Generate resized photo variants for pets that are missing them."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4, help="Parallel resize threads (1 = run inline).")
+        parser.add_argument('--batch-size', type=int, default=500, help="Pets read per query.")
+        parser.add_argument('--force', action='store_true', help="Re-record variants for every pet.")
+
+    def handle(self, *args, **options):
+        # Only id/photo/photo_variants are needed to decide and schedule the work
+        pets = Pet.objects.exclude(photo='').only('id', 'photo', 'photo_variants').order_by('pk')
+        todo = (
+            (pet.pk, pet.photo.name)
+            for pet in pets.iterator(chunk_size=options['batch_size'])
+            if options['force'] or needs_variants(pet)
+        )
+
+        def work(item):
+            try:
+                process_pet_photo(*item)
+            finally:
+                connections.close_all()
+
+        # Already rendered files are skipped, so an interrupted run can simply be restarted
+        done = 0
+        if options['workers'] > 1:
+            with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+                for _ in pool.map(work, todo):
+                    done = self.progress(done)
+        else:
+            for item in todo:
+                process_pet_photo(*item)
+                done = self.progress(done)
+        self.stdout.write(self.style.SUCCESS(f"Processed photo variants for {done} pets."))
+
+    def progress(self, done):
+        done += 1
+        if done % 100 == 0:
+            self.stdout.write(f"{done} pets processed...")
+        return done
@@ -0,0 +1,151 @@
+import json
+import platform
+import random
+from contextlib import nullcontext
+
+import django
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import override_settings
+
+from pets.authentication import clear_token_cache
+from pets.benchmarking import (
+    CITIES, WORDS, HTTPTransport, InProcessTransport, Timer, benchmark_database,
+    compare_to_baseline, create_tokens, load_results, local_server, run_load, seed_dataset,
+)
+from pets.models import AdoptionRequest, Pet
+
+SCENARIOS = (
+    'pet-list', 'pet-list-filtered', 'pet-list-cards', 'pet-search', 'pet-near', 'pet-facets',
+    'pet-detail', 'adoption-list', 'adoption-detail',
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a large throwaway database and load-test the pet and adoption request "
+        "endpoints in-process and over a local HTTP server. Reports req/s, latency "
+        "percentiles and SQL queries per request; saves and compares baseline JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pets', type=int, default=100_000)
+        parser.add_argument('--adoption-requests', type=int, default=1_000_000)
+        parser.add_argument('--owners', type=int, default=2_000)
+        parser.add_argument('--requesters', type=int, default=20_000)
+        parser.add_argument('--requests', type=int, default=2_000, help="Requests per scenario and transport.")
+        parser.add_argument('--concurrency', type=int, default=16, help="Client threads.")
+        parser.add_argument('--transport', choices=['in-process', 'http', 'both'], default='both')
+        parser.add_argument('--scenario', action='append', choices=SCENARIOS, help="Repeatable; default all.")
+        parser.add_argument('--with-cache', action='store_true', help="Keep the anonymous response cache on.")
+        parser.add_argument('--with-throttling', action='store_true', help="Keep the rate limits on.")
+        parser.add_argument('--json', dest='json_path', help="Write results (usable as a baseline) here.")
+        parser.add_argument('--baseline', help="Compare against results saved by an earlier run.")
+        parser.add_argument('--tolerance', type=float, default=0.15,
+                            help="Allowed req/s and p95 slowdown versus the baseline (0.15 = 15%%).")
+
+    def handle(self, *args, **options):
+        baseline = load_results(options['baseline']) if options['baseline'] else None
+        scenarios = options['scenario'] or list(SCENARIOS)
+        # Measure database paths, not cache hits, unless asked otherwise
+        cache_settings = nullcontext() if options['with_cache'] else override_settings(PETS_RESPONSE_CACHE_TIMEOUT=0)
+        # A few thousand requests from one address would otherwise mostly measure 429s
+        throttle_settings = nullcontext() if options['with_throttling'] else override_settings(
+            REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': {}},
+        )
+
+        with benchmark_database(), cache_settings, throttle_settings, override_settings(PETS_SERVER_TIMING=True):
+            with Timer() as seeding:
+                owner_ids, _ = seed_dataset(
+                    pets=options['pets'], adoption_requests=options['adoption_requests'],
+                    owners=options['owners'], requesters=options['requesters'],
+                    log=lambda message: self.stdout.write(message),
+                )
+                tokens = create_tokens(owner_ids)
+            self.stdout.write(f"Seeded in {seeding.elapsed:.1f}s.")
+            calls = self.build_calls(scenarios, tokens, options['requests'])
+            results = []
+            if options['transport'] in ('in-process', 'both'):
+                results += self.run(InProcessTransport(), calls, options['concurrency'])
+            if options['transport'] in ('http', 'both'):
+                with local_server() as base_url:
+                    results += self.run(HTTPTransport(base_url), calls, options['concurrency'])
+
+        self.report(results)
+        report = {'meta': self.meta(options), 'results': results}
+        if options['json_path']:
+            with open(options['json_path'], 'w') as out:
+                json.dump(report, out, indent=2)
+        if baseline is not None:
+            regressions = compare_to_baseline(results, baseline, options['tolerance'])
+            if regressions:
+                raise CommandError("Performance regressions:\n  " + "\n  ".join(regressions))
+            self.stdout.write(self.style.SUCCESS("No regressions against the baseline."))
+
+    def build_calls(self, scenarios, tokens, count):
+        """Deterministic ``(path, headers)`` lists per scenario."""
+        rng = random.Random(1)
+        species = [choice for choice, _ in Pet.SPECIES_CHOICES]
+        max_pet = Pet.objects.order_by('-pk').values_list('pk', flat=True).first()
+        max_request = AdoptionRequest.objects.order_by('-pk').values_list('pk', flat=True).first()
+        request_ids = rng.sample(range(1, max_request + 1), min(count, max_request))
+        request_owners = list(
+            AdoptionRequest.objects.filter(pk__in=request_ids).values_list('pk', 'pet__owner_id')
+        )
+        owner_ids = list(tokens)
+
+        def auth(owner_id):
+            return {'Authorization': f'Token {tokens[owner_id]}'}
+
+        def adoption_detail():
+            pk, owner_id = rng.choice(request_owners)
+            return f'/api/adoption-requests/{pk}/', auth(owner_id)
+
+        makers = {
+            'pet-list': lambda: ('/api/pets/', {}),
+            'pet-list-filtered': lambda: (f'/api/pets/?species={rng.choice(species)}&city={rng.choice(CITIES)}', {}),
+            'pet-list-cards': lambda: ('/api/pets/?fields=id,name,photo,city', {}),
+            'pet-search': lambda: (f'/api/pets/?search={rng.choice(WORDS)}', {}),
+            'pet-near': lambda: (f'/api/pets/?near={rng.choice(CITIES)}&radius=25', {}),
+            'pet-facets': lambda: (f'/api/pets/facets/?species={rng.choice(species)}', {}),
+            'pet-detail': lambda: (f'/api/pets/{rng.randint(1, max_pet)}/', {}),
+            'adoption-list': lambda: ('/api/adoption-requests/', auth(rng.choice(owner_ids))),
+            'adoption-detail': adoption_detail,
+        }
+        return {scenario: [makers[scenario]() for _ in range(count)] for scenario in scenarios}
+
+    def run(self, transport, calls, concurrency):
+        results = []
+        for scenario, scenario_calls in calls.items():
+            # Each run starts cold, whatever ran before it in this process
+            cache.clear()
+            clear_token_cache()
+            stats = run_load(transport, scenario_calls, concurrency)
+            results.append({'scenario': scenario, 'transport': transport.name, **stats})
+            self.stdout.write(f"  {transport.name:<11}{scenario:<19}{stats['rps']:>9} req/s")
+        return results
+
+    def report(self, results):
+        header = f"{'scenario':<19}{'transport':<12}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'queries':>9}{'errors':>8}"
+        self.stdout.write(header)
+        for row in results:
+            self.stdout.write(
+                f"{row['scenario']:<19}{row['transport']:<12}{row['rps']:>9}{row['p50_ms']:>9}"
+                f"{row['p95_ms']:>9}{row['p99_ms']:>9}{str(row['queries_max']):>9}{row['errors']:>8}"
+            )
+
+    def meta(self, options):
+        return {
+            'pets': options['pets'],
+            'adoption_requests': options['adoption_requests'],
+            'owners': options['owners'],
+            'requests': options['requests'],
+            'concurrency': options['concurrency'],
+            'with_cache': options['with_cache'],
+            'with_throttling': options['with_throttling'],
+            'database': connection.vendor,
+            'python': platform.python_version(),
+            'django': django.get_version(),
+        }
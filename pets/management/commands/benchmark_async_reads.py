@@ -0,0 +1,83 @@
+import asyncio
+import json
+import random
+import time
+from contextlib import nullcontext
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test import AsyncClient, override_settings
+
+from pets.benchmarking import Timer, benchmark_database, seed_pets, summarize
+from pets.models import Pet
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare requests/sec and latency of the sync PetViewSet and the async "
+        "read path under concurrent load, both served through Django's ASGI handler."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pets', type=int, default=5000, help="Pets to seed.")
+        parser.add_argument('--requests', type=int, default=1000, help="Requests per endpoint.")
+        parser.add_argument('--concurrency', type=int, default=50, help="Requests in flight at once.")
+        parser.add_argument('--with-cache', action='store_true', help="Keep the anonymous response cache on.")
+        parser.add_argument('--with-throttling', action='store_true', help="Keep the rate limits on.")
+        parser.add_argument('--json', dest='json_path', help="Also write results to this file.")
+
+    def handle(self, *args, **options):
+        with benchmark_database():
+            seed_pets(options['pets'])
+            pet_ids = list(Pet.objects.values_list('pk', flat=True))
+            # Compare database paths, not cache hits, unless asked otherwise
+            cache_settings = (
+                nullcontext() if options['with_cache'] else override_settings(PETS_RESPONSE_CACHE_TIMEOUT=0)
+            )
+            # One anonymous client sends every request; the pet_list rate would refuse most
+            throttle_settings = nullcontext() if options['with_throttling'] else override_settings(
+                REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': {}},
+            )
+            with cache_settings, throttle_settings:
+                results = asyncio.run(self.run_all(pet_ids, options))
+
+        self.stdout.write(f"{'endpoint':<14}{'mode':<7}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+        for row in results:
+            self.stdout.write(
+                f"{row['endpoint']:<14}{row['mode']:<7}{row['rps']:>9}{row['p50_ms']:>9}{row['p95_ms']:>9}{row['p99_ms']:>9}"
+            )
+        if options['json_path']:
+            with open(options['json_path'], 'w') as out:
+                json.dump(results, out, indent=2)
+
+    async def run_all(self, pet_ids, options):
+        rng = random.Random(1)
+        species = ['dog', 'cat', 'bird']
+        endpoints = {
+            'list': lambda prefix: f"{prefix}pets/?species={rng.choice(species)}",
+            'detail': lambda prefix: f"{prefix}pets/{rng.choice(pet_ids)}/",
+        }
+        results = []
+        for endpoint, make_url in endpoints.items():
+            for mode, prefix in (('sync', '/api/'), ('async', '/api/async/')):
+                urls = [make_url(prefix) for _ in range(options['requests'])]
+                stats = await self.drive(urls, options['concurrency'])
+                results.append({'endpoint': endpoint, 'mode': mode, **stats})
+        return results
+
+    async def drive(self, urls, concurrency):
+        client = AsyncClient()
+        queue = iter(urls)
+        latencies = []
+
+        async def worker():
+            for url in queue:
+                start = time.perf_counter()
+                response = await client.get(url)
+                latencies.append(time.perf_counter() - start)
+                assert response.status_code == 200, (url, response.status_code)
+
+        with Timer() as timer:
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return summarize(latencies, timer.elapsed)
+
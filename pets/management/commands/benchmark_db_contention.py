@@ -0,0 +1,170 @@
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, close_old_connections, connection, transaction
+from django.test import override_settings
+
+from pets.benchmarking import Timer, benchmark_database, seed_pets, summarize
+from pets.db import is_busy_error
+from pets.models import Job, Pet
+
+# What SQLite does with no configuration versus the settings.py profile
+PROFILES = {
+    'untuned': {
+        'pragmas': {'journal_mode': 'delete', 'synchronous': 'full'},
+        'options': {},
+        'conn_max_age': 0,
+    },
+    'tuned': {
+        'pragmas': settings.PETS_SQLITE_PRAGMAS,
+        'options': {'transaction_mode': 'IMMEDIATE'},
+        'conn_max_age': 600,
+    },
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure SQLite write throughput with concurrent writers (and readers) under the "
+        "untuned default configuration and the tuned profile from settings.py."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=8, help="Concurrent writer threads.")
+        parser.add_argument('--readers', type=int, default=2, help="Concurrent reader threads.")
+        parser.add_argument('--transactions', type=int, default=200, help="Write transactions per writer.")
+        parser.add_argument('--pets', type=int, default=2000, help="Pets to seed.")
+        parser.add_argument('--attempts', type=int, default=10, help="Tries per transaction on 'database is locked'.")
+        parser.add_argument('--profile', action='append', choices=sorted(PROFILES), help="Repeatable; default both.")
+        parser.add_argument('--json', dest='json_path', help="Also write results to this file.")
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError("This benchmark compares SQLite profiles; DATABASE_ENGINE is not sqlite.")
+        results = []
+        for name in options['profile'] or ['untuned', 'tuned']:
+            with tempfile.TemporaryDirectory() as tmp:
+                with benchmark_database(sqlite_path=os.path.join(tmp, 'contention.sqlite3')):
+                    results.append({'profile': name, **self.run_profile(PROFILES[name], options)})
+
+        self.stdout.write(
+            f"{'profile':<10}{'commits/s':>10}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+            f"{'busy':>7}{'failed':>8}{'reads/s':>9}{'read p95':>10}"
+        )
+        for row in results:
+            self.stdout.write(
+                f"{row['profile']:<10}{row['commits_per_s']:>10}{row['p50_ms']:>9}{row['p95_ms']:>9}"
+                f"{row['p99_ms']:>9}{row['busy_errors']:>7}{row['failed']:>8}{row['reads_per_s']:>9}"
+                f"{row['read_p95_ms']:>10}"
+            )
+        if options['json_path']:
+            with open(options['json_path'], 'w') as out:
+                json.dump(results, out, indent=2)
+
+    def run_profile(self, profile, options):
+        saved = (dict(connection.settings_dict['OPTIONS']), connection.settings_dict['CONN_MAX_AGE'])
+        # settings_dict is shared by every thread's connection
+        connection.settings_dict['OPTIONS'] = {**saved[0], **profile['options']}
+        connection.settings_dict['OPTIONS'].setdefault('transaction_mode', None)
+        connection.settings_dict['CONN_MAX_AGE'] = profile['conn_max_age']
+        try:
+            with override_settings(PETS_SQLITE_PRAGMAS=profile['pragmas']):
+                connection.close()
+                seed_pets(options['pets'], owners=20)
+                pet_ids = list(Pet.objects.values_list('pk', flat=True))
+                connection.close()
+                return self.contend(pet_ids, options)
+        finally:
+            connection.settings_dict['OPTIONS'], connection.settings_dict['CONN_MAX_AGE'] = saved
+
+    def contend(self, pet_ids, options):
+        lock = threading.Lock()
+        writes, reads, read_latencies = [], [], []
+        counters = {'busy_errors': 0, 'failed': 0}
+        writers_done = threading.Event()
+        start = threading.Barrier(options['writers'] + options['readers'])
+
+        def write_once(rng):
+            pet_id = rng.choice(pet_ids)
+            # Read-modify-write: the shape of the adoption workflow
+            with transaction.atomic():
+                age = Pet.objects.filter(pk=pet_id).values_list('age', flat=True).get()
+                Pet.objects.filter(pk=pet_id).update(age=(age + 1) % 20)
+                Job.objects.create(task='benchmark', payload={'pet': pet_id}, status=Job.DONE)
+
+        def write_with_retries(rng):
+            for attempt in range(options['attempts']):
+                try:
+                    write_once(rng)
+                    return True
+                except OperationalError as exc:
+                    if not is_busy_error(exc):
+                        raise
+                    with lock:
+                        counters['busy_errors'] += 1
+                    time.sleep(0.005 * 2 ** attempt * rng.random())
+            return False
+
+        def writer(seed):
+            rng = random.Random(seed)
+            start.wait()
+            for _ in range(options['transactions']):
+                began = time.perf_counter()
+                try:
+                    committed = write_with_retries(rng)
+                finally:
+                    # End of "request": CONN_MAX_AGE decides whether the connection survives
+                    close_old_connections()
+                with lock:
+                    if committed:
+                        writes.append(time.perf_counter() - began)
+                    else:
+                        counters['failed'] += 1
+            connection.close()
+
+        def reader(seed):
+            rng = random.Random(seed)
+            start.wait()
+            while not writers_done.is_set():
+                began = time.perf_counter()
+                try:
+                    list(Pet.objects.filter(species=rng.choice(['dog', 'cat', 'bird'])).order_by('-id')[:20])
+                except OperationalError as exc:
+                    if not is_busy_error(exc):
+                        raise
+                    continue
+                finally:
+                    close_old_connections()
+                with lock:
+                    read_latencies.append(time.perf_counter() - began)
+            connection.close()
+
+        writer_threads = [threading.Thread(target=writer, args=(i,)) for i in range(options['writers'])]
+        reader_threads = [threading.Thread(target=reader, args=(1000 + i,)) for i in range(options['readers'])]
+        with Timer() as timer:
+            for thread in writer_threads + reader_threads:
+                thread.start()
+            for thread in writer_threads:
+                thread.join()
+            writers_done.set()
+        for thread in reader_threads:
+            thread.join()
+
+        stats = summarize(writes, timer.elapsed)
+        read_stats = summarize(read_latencies, timer.elapsed)
+        return {
+            'commits': stats['requests'],
+            'commits_per_s': stats['rps'],
+            'p50_ms': stats['p50_ms'],
+            'p95_ms': stats['p95_ms'],
+            'p99_ms': stats['p99_ms'],
+            **counters,
+            'reads_per_s': read_stats['rps'],
+            'read_p95_ms': read_stats['p95_ms'],
+        }
@@ -0,0 +1,66 @@
+import json
+
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+from rest_framework.request import Request
+
+from pets.benchmarking import Timer, benchmark_database, seed_pets
+from pets.models import Pet
+from pets.serializers import PetListSerializer, PetSerializer, pet_columns
+
+CARD_FIELDS = ['id', 'name', 'photo', 'city']
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure fetch + serialization time per 1k pets: PetSerializer over model "
+        "instances versus the .values()-based PetListSerializer, full and with a card fieldset."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000, help="Pets serialized per round.")
+        parser.add_argument('--rounds', type=int, default=20, help="Rounds per variant (best is reported).")
+        parser.add_argument('--json', dest='json_path', help="Also write results to this file.")
+
+    def handle(self, *args, **options):
+        rows, rounds = options['rows'], options['rounds']
+        request = Request(RequestFactory().get('/api/pets/'))
+        context = {'request': request}
+        with benchmark_database():
+            seed_pets(rows)
+            queryset = Pet.objects.order_by('-id')[:rows]
+            variants = {
+                'instances': lambda: PetSerializer(queryset, many=True, context=context).data,
+                'values': lambda: PetListSerializer(
+                    queryset.values(*pet_columns(PetListSerializer.select())), many=True, context=context,
+                ).data,
+                'values+card': lambda: PetListSerializer(
+                    queryset.values(*pet_columns(CARD_FIELDS)), many=True, context=context, fields=CARD_FIELDS,
+                ).data,
+                'instances+card': lambda: PetSerializer(
+                    queryset.only(*pet_columns(CARD_FIELDS)), many=True, context=context, fields=CARD_FIELDS,
+                ).data,
+            }
+            results = [self.measure(name, build, rows, rounds) for name, build in variants.items()]
+
+        baseline = results[0]['ms_per_1k']
+        self.stdout.write(f"{'variant':<16}{'ms/1k rows':>12}{'rows/s':>12}{'speedup':>10}")
+        for row in results:
+            row['speedup'] = round(baseline / row['ms_per_1k'], 2) if row['ms_per_1k'] else None
+            self.stdout.write(f"{row['variant']:<16}{row['ms_per_1k']:>12}{row['rows_per_s']:>12}{row['speedup']:>9}x")
+        if options['json_path']:
+            with open(options['json_path'], 'w') as out:
+                json.dump(results, out, indent=2)
+
+    def measure(self, name, build, rows, rounds):
+        best = None
+        for _ in range(rounds):
+            with Timer() as timer:
+                data = build()
+            assert len(data) == rows, (name, len(data))
+            best = timer.elapsed if best is None else min(best, timer.elapsed)
+        return {
+            'variant': name,
+            'ms_per_1k': round(best * 1000 * 1000 / rows, 2),
+            'rows_per_s': round(rows / best),
+        }
@@ -0,0 +1,129 @@
+import json
+import random
+
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import BaseCommand
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from rest_framework.throttling import SimpleRateThrottle
+
+from pets.benchmarking import Timer
+from pets.throttling import SlidingWindowThrottle
+
+CACHE_OPS = {'get', 'set', 'add', 'incr', 'decr', 'delete', 'get_many', 'set_many'}
+
+
+class CountingCache:
+    """Cache proxy counting round trips."""
+
+    def __init__(self, cache):
+        self.cache = cache
+        self.calls = 0
+
+    def __getattr__(self, name):
+        attr = getattr(self.cache, name)
+        if name not in CACHE_OPS:
+            return attr
+
+        def counted(*args, **kwargs):
+            self.calls += 1
+            return attr(*args, **kwargs)
+        return counted
+
+
+class HistoryThrottle(SimpleRateThrottle):
+    """DRF's stock algorithm: a list of request timestamps per client."""
+    scope = 'benchmark'
+
+    def __init__(self, rate):
+        self.rate = rate
+        self.num_requests, self.duration = self.parse_rate(rate)
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {'scope': self.scope, 'ident': self.get_ident(request)}
+
+
+class WindowThrottle(SlidingWindowThrottle):
+    def __init__(self, rate):
+        self.rate = rate
+
+    def get_rate(self, request, view):
+        return self.rate
+
+    def get_cache_key(self, request, view):
+        return f'benchmark:{self.get_ident(request)}'
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure per-request throttle overhead (microseconds, cache round trips, bytes stored) of DRF's "
+        "timestamp-history throttle versus the sliding-window counter, for many distinct "
+        "clients and for one client with a long history."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, default=100_000, help="Distinct client addresses.")
+        parser.add_argument('--requests', type=int, default=200_000, help="Requests in the many-clients run.")
+        parser.add_argument('--hot-requests', type=int, default=20_000, help="Requests in the single-client run.")
+        parser.add_argument('--rate', default='100/min', help="Per-client rate for the many-clients run.")
+        parser.add_argument('--hot-rate', default='1000/min', help="Rate for the single-client run.")
+        parser.add_argument('--cache', help="Cache alias to measure against (default: a private LocMemCache).")
+        parser.add_argument('--json', dest='json_path', help="Also write results to this file.")
+
+    def handle(self, *args, **options):
+        rng = random.Random(0)
+        factory = APIRequestFactory()
+        clients = [
+            Request(factory.get('/api/pets/', REMOTE_ADDR=f'10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}'))
+            for i in range(options['clients'])
+        ]
+        runs = {
+            'many-clients': ([rng.choice(clients) for _ in range(options['requests'])], options['rate']),
+            'hot-client': ([clients[0]] * options['hot_requests'], options['hot_rate']),
+        }
+        results = []
+        for scenario, (requests, rate) in runs.items():
+            for variant, throttle_class in (('drf-history', HistoryThrottle), ('sliding-window', WindowThrottle)):
+                results.append(self.measure(scenario, variant, throttle_class, rate, requests, options))
+
+        self.stdout.write(
+            f"{'scenario':<14}{'variant':<16}{'us/req':>9}{'cache ops':>11}{'allowed':>10}{'bytes/client':>14}"
+        )
+        for row in results:
+            self.stdout.write(
+                f"{row['scenario']:<14}{row['variant']:<16}{row['us_per_request']:>9}"
+                f"{row['cache_ops_per_request']:>11}{row['allowed']:>10}{str(row['bytes_per_client']):>14}"
+            )
+        if options['json_path']:
+            with open(options['json_path'], 'w') as out:
+                json.dump(results, out, indent=2)
+
+    def measure(self, scenario, variant, throttle_class, rate, requests, options):
+        if options['cache']:
+            backend = caches[options['cache']]
+            backend.clear()
+        else:
+            # Big enough that culling never evicts a live client
+            backend = LocMemCache(f'throttle-benchmark-{variant}', {'OPTIONS': {'MAX_ENTRIES': 10 * len(requests)}})
+        counting = CountingCache(backend)
+        allowed = 0
+        with Timer() as timer:
+            for request in requests:
+                # DRF builds a throttle per request, so does this loop
+                throttle = throttle_class(rate)
+                throttle.cache = counting
+                allowed += throttle.allow_request(request, None)
+        # Stored bytes per client (pickled values), only known for the private LocMemCache
+        stored = sum(map(len, backend._cache.values())) if isinstance(backend, LocMemCache) else None
+        clients = len({request.META['REMOTE_ADDR'] for request in requests})
+        backend.clear()
+        return {
+            'scenario': scenario,
+            'variant': variant,
+            'requests': len(requests),
+            'us_per_request': round(timer.elapsed / len(requests) * 1e6, 2),
+            'cache_ops_per_request': round(counting.calls / len(requests), 2),
+            'allowed': allowed,
+            'bytes_per_client': round(stored / clients) if stored is not None else None,
+        }
@@ -0,0 +1,20 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from pets.schema import build_artifacts, clear_schema_cache, code_version
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate the OpenAPI schema for the current code version and write its YAML/JSON "
+        "artifacts (plain, gzip, brotli when installed) for /api/schema/. Run at deploy."
+    )
+
+    def handle(self, *args, **options):
+        code = code_version()
+        artifacts = build_artifacts(code)
+        clear_schema_cache()
+        for fmt, artifact in artifacts.items():
+            sizes = ', '.join(f'{encoding} {len(body):,} B' for encoding, body in artifact.bodies.items())
+            self.stdout.write(f"  {fmt}: {sizes}")
+        self.stdout.write(self.style.SUCCESS(f"Built schema {code} in {settings.PETS_SCHEMA_DIR}."))
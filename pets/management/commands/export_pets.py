@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from pets.bulk import WRITERS, export_rows
+from pets.models import Pet
+
+
+class Command(BaseCommand):
+    help = "Stream every pet to a file (or stdout) as NDJSON or CSV."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', help="Output file; stdout when omitted.")
+        parser.add_argument('--format', choices=sorted(WRITERS), default='ndjson')
+
+    def handle(self, *args, **options):
+        chunks = WRITERS[options['format']](export_rows(Pet.objects.all()))
+        if options['path']:
+            with open(options['path'], 'w', encoding='utf-8', newline='') as out:
+                out.writelines(chunks)
+        else:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending='')
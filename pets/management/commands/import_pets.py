@@ -0,0 +1,35 @@
+import json
+import os
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from pets.bulk import READERS, import_pets, iter_lines
+
+
+class Command(BaseCommand):
+    help = "Bulk import pets for one owner from an NDJSON or CSV file."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="File to import.")
+        parser.add_argument('--owner', required=True, help="Username that will own the pets.")
+        parser.add_argument('--format', choices=sorted(READERS), help="Defaults to the file extension.")
+        parser.add_argument('--batch-size', type=int, default=500, help="Rows per insert transaction.")
+
+    def handle(self, *args, **options):
+        try:
+            owner = User.objects.get(username=options['owner'])
+        except User.DoesNotExist:
+            raise CommandError(f"User '{options['owner']}' does not exist.")
+        fmt = options['format'] or os.path.splitext(options['path'])[1].lstrip('.').lower()
+        if fmt not in READERS:
+            raise CommandError("Cannot tell the file format; pass --format ndjson or --format csv.")
+
+        with open(options['path'], 'rb') as stream:
+            result = import_pets(READERS[fmt](iter_lines(stream)), owner, batch_size=options['batch_size'])
+
+        for error in result.errors:
+            self.stderr.write(f"row {error['row']}: {json.dumps(error['errors'])}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {result.created} pets ({result.error_count} rows rejected)."
+        ))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from pets.facets import rebuild_facet_counts
+
+
+class Command(BaseCommand):
+    help = "Recompute the per (species, city, status) pet counts behind /api/pets/facets/."
+
+    def handle(self, *args, **options):
+        buckets = rebuild_facet_counts()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {buckets} facet buckets."))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from pets.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = "Rebuild the pet full-text search index from the pets table."
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        with transaction.atomic():
+            count = backend.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Indexed {count} pets with {type(backend).__name__}."))
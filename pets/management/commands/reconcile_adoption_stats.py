@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from pets.stats import reconcile_stats
+
+
+class Command(BaseCommand):
+    help = (
+        "Recount the adoption request counters on pets (pending, total, last request time) and the "
+        "per-owner totals from the requests table, and fix the ones that drifted."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=2000, help="Pets recounted per transaction.")
+
+    def handle(self, *args, **options):
+        pets, owners = reconcile_stats(options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f"Fixed counters of {pets} pets and {owners} owners."))
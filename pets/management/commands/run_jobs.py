@@ -0,0 +1,31 @@
+import signal
+import threading
+
+from django.core.management.base import BaseCommand
+
+from pets.jobs import Worker
+
+
+class Command(BaseCommand):
+    help = "Run queued background jobs (adoption notifications, ...) until stopped."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=4, help="Jobs run in parallel threads.")
+        parser.add_argument('--batch-size', type=int, default=None, help="Jobs claimed per poll (default 4 x concurrency).")
+        parser.add_argument('--poll-interval', type=float, default=1.0, help="Seconds to sleep when the queue is empty.")
+        parser.add_argument('--once', action='store_true', help="Drain the due jobs and exit.")
+
+    def handle(self, *args, **options):
+        worker = Worker(concurrency=options['concurrency'], batch_size=options['batch_size'])
+        if options['once']:
+            total = worker.drain()
+            self.stdout.write(self.style.SUCCESS(f"Ran {total} jobs."))
+            return
+
+        stop = threading.Event()
+        # Finish the jobs in hand, then exit on Ctrl-C / SIGTERM
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *args: stop.set())
+        self.stdout.write(f"Worker {worker.name} polling with {worker.concurrency} threads.")
+        worker.run(stop, poll_interval=options['poll_interval'])
+        self.stdout.write("Worker stopped.")
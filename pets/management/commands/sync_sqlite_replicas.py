@@ -0,0 +1,40 @@
+import signal
+import threading
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from pets.routers import read_replicas, sync_sqlite_replica
+
+
+class Command(BaseCommand):
+    help = (
+        "Copy the SQLite primary onto every configured read replica (DATABASE_REPLICAS); "
+        "a local stand-in for replication. With --interval, keep copying until stopped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=None,
+                            help="Seconds between syncs; the replication lag to simulate.")
+
+    def handle(self, *args, **options):
+        replicas = read_replicas()
+        if not replicas:
+            raise CommandError("No read replicas configured; set DATABASE_REPLICAS.")
+        if any(connections[alias].vendor != 'sqlite' for alias in ('default', *replicas)):
+            raise CommandError("sync_sqlite_replicas only copies SQLite databases.")
+
+        if options['interval'] is None:
+            self.sync(replicas)
+            return
+        stop = threading.Event()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *args: stop.set())
+        while not stop.is_set():
+            self.sync(replicas)
+            stop.wait(options['interval'])
+
+    def sync(self, replicas):
+        for alias in replicas:
+            sync_sqlite_replica(alias)
+        self.stdout.write(self.style.SUCCESS(f"Synced {', '.join(replicas)}."))
@@ -0,0 +1,220 @@
+import bisect
+import hmac
+import ipaddress
+import threading
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+MAX_CAPTURED_QUERIES = 100
+
+_current = ContextVar('pets_request_metrics', default=None)
+
+
+class RequestMetrics:
+    """What one request spent, filled in by the query recorder and serializers."""
+    __slots__ = ('queries', 'sql_time', 'serializer_time', 'serializing', 'captured')
+
+    def __init__(self, capture_sql=False):
+        self.queries = 0
+        self.sql_time = 0.0
+        self.serializer_time = 0.0
+        self.serializing = False
+        self.captured = [] if capture_sql else None
+
+
+def start_request(capture_sql=False):
+    metrics = RequestMetrics(capture_sql)
+    return metrics, _current.set(metrics)
+
+
+def end_request(token):
+    _current.reset(token)
+
+
+class QueryRecorder:
+    """
+    DB execute wrapper counting and timing every statement of the current request.
+
+    Installed once per connection (see ``install_query_recorder``); outside a
+    measured request it just calls through.
+    """
+
+    def __call__(self, execute, sql, params, many, context):
+        metrics = _current.get()
+        if metrics is None:
+            return execute(sql, params, many, context)
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            metrics.queries += 1
+            metrics.sql_time += duration
+            if metrics.captured is not None and len(metrics.captured) < MAX_CAPTURED_QUERIES:
+                # SQL text only: parameters carry token keys, password hashes, emails
+                metrics.captured.append((duration, sql))
+
+
+query_recorder = QueryRecorder()
+
+
+def install_query_recorder(sender, connection, **kwargs):
+    if query_recorder not in connection.execute_wrappers:
+        connection.execute_wrappers.append(query_recorder)
+
+
+class TimedSerializerMixin:
+    """Adds the serializer's ``to_representation`` time to the current request's metrics.
+
+    Only the outermost call is timed, so nested serializers are not counted twice.
+    """
+
+    def to_representation(self, instance):
+        metrics = _current.get()
+        if metrics is None or metrics.serializing:
+            return super().to_representation(instance)
+        metrics.serializing = True
+        start = time.perf_counter()
+        try:
+            return super().to_representation(instance)
+        finally:
+            metrics.serializer_time += time.perf_counter() - start
+            metrics.serializing = False
+
+
+class Histogram:
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    """Per-process, per-route aggregates rendered in Prometheus text format."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._clear()
+
+    def reset(self):
+        with self._lock:
+            self._clear()
+
+    def _clear(self):
+        self.requests = {}   # (route, method, status) -> count
+        self.latency = {}    # (route, method) -> Histogram
+        self.queries = {}
+        self.sizes = {}
+        self.sql_seconds = {}
+        self.serializer_seconds = {}
+
+    def record(self, route, method, status, latency, metrics, size):
+        key = (route, method)
+        with self._lock:
+            counter = (route, method, str(status))
+            self.requests[counter] = self.requests.get(counter, 0) + 1
+            self._histogram(self.latency, key, LATENCY_BUCKETS).observe(latency)
+            self._histogram(self.queries, key, QUERY_COUNT_BUCKETS).observe(metrics.queries)
+            if size is not None:
+                self._histogram(self.sizes, key, SIZE_BUCKETS).observe(size)
+            self.sql_seconds[key] = self.sql_seconds.get(key, 0.0) + metrics.sql_time
+            self.serializer_seconds[key] = self.serializer_seconds.get(key, 0.0) + metrics.serializer_time
+
+    @staticmethod
+    def _histogram(store, key, buckets):
+        if key not in store:
+            store[key] = Histogram(buckets)
+        return store[key]
+
+    def render(self):
+        lines = []
+        with self._lock:
+            self._render_counter(
+                lines, 'pets_http_requests_total', 'Requests by route, method and status.',
+                self.requests, ('route', 'method', 'status'),
+            )
+            self._render_histogram(lines, 'pets_http_request_duration_seconds', 'Request latency.', self.latency)
+            self._render_histogram(lines, 'pets_db_queries_per_request', 'SQL statements per request.', self.queries)
+            self._render_counter(
+                lines, 'pets_db_query_seconds_total', 'Time spent executing SQL.',
+                self.sql_seconds, ('route', 'method'),
+            )
+            self._render_counter(
+                lines, 'pets_serializer_seconds_total', 'Time spent in serializer to_representation.',
+                self.serializer_seconds, ('route', 'method'),
+            )
+            self._render_histogram(lines, 'pets_http_response_size_bytes', 'Response body size.', self.sizes)
+        return '\n'.join(lines) + '\n'
+
+    @staticmethod
+    def _labels(names, values, extra=''):
+        pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+        if extra:
+            pairs.append(extra)
+        return '{' + ','.join(pairs) + '}'
+
+    def _render_counter(self, lines, name, help_text, values, label_names):
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} counter')
+        for key, value in sorted(values.items()):
+            lines.append(f'{name}{self._labels(label_names, key)} {value}')
+
+    def _render_histogram(self, lines, name, help_text, histograms):
+        label_names = ('route', 'method')
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} histogram')
+        for key, histogram in sorted(histograms.items()):
+            cumulative = 0
+            for bound, count in zip(histogram.buckets + ('+Inf',), histogram.counts):
+                cumulative += count
+                labels = self._labels(label_names, key, f'le="{bound}"')
+                lines.append(f'{name}_bucket{labels} {cumulative}')
+            lines.append(f'{name}_sum{self._labels(label_names, key)} {histogram.sum}')
+            lines.append(f'{name}_count{self._labels(label_names, key)} {histogram.count}')
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+registry = MetricsRegistry()
+
+
+def metrics_allowed(request):
+    """
+    Scrapers must come from ``PETS_METRICS_ALLOWED_IPS`` (addresses or
+    networks) or send ``Authorization: Bearer <PETS_METRICS_TOKEN>``.
+    """
+    token = getattr(settings, 'PETS_METRICS_TOKEN', None)
+    authorization = request.META.get('HTTP_AUTHORIZATION', '')
+    if token and hmac.compare_digest(authorization.encode(), f'Bearer {token}'.encode()):
+        return True
+    try:
+        address = ipaddress.ip_address(request.META.get('REMOTE_ADDR', ''))
+    except ValueError:
+        return False
+    return any(
+        address in ipaddress.ip_network(network, strict=False)
+        for network in getattr(settings, 'PETS_METRICS_ALLOWED_IPS', ('127.0.0.1', '::1'))
+    )
+
+
+def metrics_view(request):
+    """Prometheus scrape endpoint for this process's request metrics."""
+    if not metrics_allowed(request):
+        return HttpResponseForbidden()
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,172 @@
+import logging
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.permissions import SAFE_METHODS
+
+from .metrics import end_request, registry, start_request
+from .routers import allow_replica_reads, lag_window, pin_key, read_replicas, reset_replica_reads
+
+slow_logger = logging.getLogger('pets.slow_requests')
+
+
+class PerformanceMiddleware:
+    """
+    Purpose:
+
+    Records latency, SQL query count and time, serializer time and response
+    size for every request, keyed by the resolved route name (``pet-list``,
+    ``adoptionrequest-detail``...). Aggregates are exposed by
+    ``pets.metrics.metrics_view``.
+
+    When ``PETS_SLOW_REQUEST_MS`` is set, requests slower than that are logged
+    to ``pets.slow_requests`` together with the SQL they ran (statement text
+    with placeholders; parameter values are never logged).
+
+    With ``PETS_SERVER_TIMING`` on, each response also carries a
+    ``Server-Timing`` header (``db;dur=1.2;desc="3 queries", serialize;dur=0.4,
+    total;dur=5.1``), which browsers' dev tools and the benchmark suite read.
+
+    Should be first in MIDDLEWARE so the latency covers the whole stack.
+    Works in both sync and async stacks, so async views stay async.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        slow_ms = getattr(settings, 'PETS_SLOW_REQUEST_MS', None)
+        metrics, token = start_request(capture_sql=slow_ms is not None)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            end_request(token)
+        return self.finish(request, response, time.perf_counter() - start, metrics, slow_ms)
+
+    async def __acall__(self, request):
+        slow_ms = getattr(settings, 'PETS_SLOW_REQUEST_MS', None)
+        metrics, token = start_request(capture_sql=slow_ms is not None)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            end_request(token)
+        return self.finish(request, response, time.perf_counter() - start, metrics, slow_ms)
+
+    def finish(self, request, response, latency, metrics, slow_ms):
+        route = self.route_name(request)
+        if route != 'metrics':
+            registry.record(route, request.method, response.status_code, latency, metrics, self.response_size(response))
+        if slow_ms is not None and latency * 1000 >= slow_ms:
+            self.log_slow_request(request, route, response, latency, metrics)
+        if getattr(settings, 'PETS_SERVER_TIMING', False):
+            response['Server-Timing'] = self.server_timing(latency, metrics)
+        return response
+
+    @staticmethod
+    def server_timing(latency, metrics):
+        return (
+            f'db;dur={metrics.sql_time * 1000:.2f};desc="{metrics.queries} queries", '
+            f'serialize;dur={metrics.serializer_time * 1000:.2f}, total;dur={latency * 1000:.2f}'
+        )
+
+    @staticmethod
+    def route_name(request):
+        match = getattr(request, 'resolver_match', None)
+        if match is None:
+            return 'unresolved'
+        return match.view_name or match._func_path
+
+    @staticmethod
+    def response_size(response):
+        if response.has_header('Content-Length'):
+            return int(response['Content-Length'])
+        if getattr(response, 'streaming', False):
+            return None
+        return len(response.content)
+
+    @staticmethod
+    def log_slow_request(request, route, response, latency, metrics):
+        statements = '\n'.join(
+            f"  [{duration * 1000:.1f} ms] {sql}" for duration, sql in metrics.captured
+        )
+        slow_logger.warning(
+            "Slow request %s %s (%s) -> %s in %.1f ms: %d queries, %.1f ms SQL, %.1f ms serializing\n%s",
+            request.method, request.get_full_path(), route, response.status_code, latency * 1000,
+            metrics.queries, metrics.sql_time * 1000, metrics.serializer_time * 1000, statements,
+        )
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Purpose:
+
+    Decides per request whether ``PrimaryReplicaRouter`` may read from the
+    replicas. Safe requests (GET, HEAD, OPTIONS) may; POST/PUT/PATCH/DELETE,
+    including every adoption request mutation, run entirely on the primary.
+
+    After a write the client (its Authorization header, session, or address)
+    stays pinned to the primary for ``PETS_REPLICA_LAG_SECONDS``, so it reads
+    its own writes even if the replicas have not caught up yet.
+
+    Used for:
+
+    Spreading read-heavy browsing over ``PETS_READ_REPLICAS``. Inert when no
+    replicas are configured.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not read_replicas():
+            return self.get_response(request)
+        safe = request.method in SAFE_METHODS
+        key = pin_key(self.client(request))
+        token = allow_replica_reads(safe and not cache.get(key))
+        try:
+            response = self.get_response(request)
+        finally:
+            reset_replica_reads(token)
+        if not safe:
+            cache.set(key, True, lag_window())
+        return response
+
+    async def __acall__(self, request):
+        if not read_replicas():
+            return await self.get_response(request)
+        safe = request.method in SAFE_METHODS
+        key = pin_key(self.client(request))
+        token = allow_replica_reads(safe and not await cache.aget(key))
+        try:
+            response = await self.get_response(request)
+        finally:
+            reset_replica_reads(token)
+        if not safe:
+            await cache.aset(key, True, lag_window())
+        return response
+
+    @staticmethod
+    def client(request):
+        return (
+            request.headers.get('Authorization')
+            or request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+            or request.META.get('REMOTE_ADDR', '')
+        )
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.5 on 2026-10-18 08:45
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pets', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='adoptionrequest',
+            name='requester',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='sent_adoption_requests', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='adoptionrequest',
+            index=models.Index(fields=['pet', '-created_at'], name='adoption_pet_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pet',
+            index=models.Index(fields=['status', 'species', 'city'], name='pet_status_species_city_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pet',
+            index=models.Index(fields=['species', 'city'], name='pet_species_city_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pet',
+            index=models.Index(fields=['city'], name='pet_city_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pet',
+            index=models.Index(condition=models.Q(('status', 'available')), fields=['species', 'city'], name='pet_available_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='adoptionrequest',
+            constraint=models.UniqueConstraint(fields=('pet', 'requester'), name='unique_adoption_request_per_requester'),
+        ),
+    ]
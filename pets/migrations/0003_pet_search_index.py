@@ -0,0 +1,51 @@
+# Generated by Django 5.2.5 on 2026-10-18 08:48
+
+import django.db.models.deletion
+import pets.models
+from django.db import migrations, models
+
+
+def create_fts_table(apps, schema_editor):
+    # FTS5 is SQLite-only; other backends fall back to pets.search.BasicSearchBackend
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS pets_pet_fts USING fts5("
+        "name, description, city, tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+    )
+    schema_editor.execute(
+        "INSERT INTO pets_pet_fts (rowid, name, description, city) "
+        "SELECT id, name, description, city FROM pets_pet"
+    )
+
+
+def drop_fts_table(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute("DROP TABLE IF EXISTS pets_pet_fts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pets', '0002_pet_indexes_adoption_requester'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PetSearchEntry',
+            fields=[
+                ('pet', models.OneToOneField(db_column='rowid', db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_entry', serialize=False, to='pets.pet')),
+                ('name', models.TextField()),
+                ('description', models.TextField()),
+                ('city', models.TextField()),
+                ('document', pets.models.FullTextDocumentField(db_column='pets_pet_fts')),
+                ('rank', models.FloatField()),
+            ],
+            options={
+                'db_table': 'pets_pet_fts',
+                'managed': False,
+            },
+        ),
+        migrations.RunPython(create_fts_table, drop_fts_table),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-18 08:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pets', '0003_pet_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pet',
+            name='photo_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
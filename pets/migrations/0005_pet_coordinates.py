@@ -0,0 +1,41 @@
+# Generated by Django 5.2.5 on 2026-10-18 08:57
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def geocode_existing_pets(apps, schema_editor):
+    from pets.geo import geocode
+
+    Pet = apps.get_model('pets', 'Pet')
+    # One UPDATE per distinct city rather than per pet
+    for city in Pet.objects.filter(latitude__isnull=True).values_list('city', flat=True).distinct().iterator():
+        point = geocode(city)
+        if point:
+            Pet.objects.filter(city=city, latitude__isnull=True).update(latitude=point[0], longitude=point[1])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pets', '0004_pet_photo_variants'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pet',
+            name='latitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='pet',
+            name='longitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='pet',
+            index=models.Index(fields=['latitude', 'longitude'], name='pet_lat_lng_idx'),
+        ),
+        migrations.RunPython(geocode_existing_pets, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.5 on 2026-10-18 08:58
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_facet_counts(apps, schema_editor):
+    Pet = apps.get_model('pets', 'Pet')
+    PetFacetCount = apps.get_model('pets', 'PetFacetCount')
+    PetFacetCount.objects.bulk_create(
+        PetFacetCount(count=row.pop('total'), **row)
+        for row in Pet.objects.values('species', 'city', 'status').annotate(total=Count('id')).order_by()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pets', '0005_pet_coordinates'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PetFacetCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('species', models.CharField(max_length=20)),
+                ('city', models.CharField(max_length=100)),
+                ('status', models.CharField(max_length=20)),
+                ('count', models.IntegerField(default=0)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'city'], name='pet_facet_status_city_idx'), models.Index(fields=['city'], name='pet_facet_city_idx')],
+                'constraints': [models.UniqueConstraint(fields=('species', 'city', 'status'), name='unique_pet_facet_bucket')],
+            },
+        ),
+        migrations.RunPython(backfill_facet_counts, migrations.RunPython.noop),
+    ]
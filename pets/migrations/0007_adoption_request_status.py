@@ -0,0 +1,41 @@
+# Generated by Django 5.2.5 on 2026-10-18 09:00
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pets', '0006_pet_facet_counts'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='adoptionrequest',
+            name='decided_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='adoptionrequest',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('approved', 'Approved'), ('rejected', 'Rejected')], default='pending', max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='adoptionrequest',
+            index=models.Index(fields=['pet', 'status'], name='adoption_pet_status_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='adoptionrequest',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'approved')), fields=('pet',), name='one_approved_request_per_pet'),
+        ),
+        migrations.AddConstraint(
+            model_name='adoptionrequest',
+            constraint=models.CheckConstraint(condition=models.Q(('status__in', ['pending', 'approved', 'rejected'])), name='adoption_request_status_valid'),
+        ),
+        migrations.AddConstraint(
+            model_name='adoptionrequest',
+            constraint=models.CheckConstraint(condition=models.Q(models.Q(('decided_at__isnull', True), ('status', 'pending')), models.Q(models.Q(('status', 'pending'), _negated=True), ('decided_at__isnull', False)), _connector='OR'), name='adoption_request_decided_at_matches_status'),
+        ),
+    ]
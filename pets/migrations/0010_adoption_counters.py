@@ -0,0 +1,70 @@
+# Generated by Django 5.2.5 on 2026-10-18 09:36
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, Max, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def backfill_counters(apps, schema_editor):
+    Pet = apps.get_model('pets', 'Pet')
+    AdoptionRequest = apps.get_model('pets', 'AdoptionRequest')
+    OwnerAdoptionStats = apps.get_model('pets', 'OwnerAdoptionStats')
+
+    def per_pet(value, **filters):
+        requests = AdoptionRequest.objects.filter(pet=OuterRef('pk'), **filters).order_by().values('pet')
+        return Subquery(requests.annotate(value=value).values('value'))
+
+    Pet.objects.update(
+        pending_requests=Coalesce(per_pet(Count('id'), status='pending'), 0, output_field=IntegerField()),
+        request_count=Coalesce(per_pet(Count('id')), 0, output_field=IntegerField()),
+        last_request_at=per_pet(Max('created_at')),
+    )
+    OwnerAdoptionStats.objects.bulk_create(
+        OwnerAdoptionStats(owner_id=owner, pending_requests=pending, request_count=total, last_request_at=latest)
+        for owner, pending, total, latest in Pet.objects.filter(request_count__gt=0).values('owner').annotate(
+            pending=Sum('pending_requests'), total=Sum('request_count'), latest=Max('last_request_at'),
+        ).values_list('owner', 'pending', 'total', 'latest').order_by()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('pets', '0009_adoption_request_archive'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OwnerAdoptionStats',
+            fields=[
+                ('owner', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='adoption_stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('pending_requests', models.IntegerField(default=0)),
+                ('request_count', models.IntegerField(default=0)),
+                ('last_request_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='pet',
+            name='last_request_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='pet',
+            name='pending_requests',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='pet',
+            name='request_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='pet',
+            index=models.Index(fields=['-pending_requests', '-id'], name='pet_popularity_idx'),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,61 @@
+from rest_framework.permissions import SAFE_METHODS
+
+
+class RelationLoadingMixin:
+    """
+    Purpose:
+
+    Lets a viewset declare how related rows are loaded, next to its other
+    class-level configuration, instead of hiding it inside ``get_queryset``.
+
+    Used for:
+
+    Viewsets whose serializers or permissions walk foreign keys. Declaring
+    ``select_related`` / ``prefetch_related`` keeps list, retrieve and
+    object-permission checks at a fixed number of queries however many rows
+    are returned.
+
+    Example: ``select_related = ('pet',)`` on AdoptionRequestViewSet renders the
+    nested pet from the same JOIN instead of one query per request.
+    """
+    select_related = ()
+    prefetch_related = ()
+
+    def get_queryset(self):
+        return self.load_relations(super().get_queryset())
+
+    def load_relations(self, queryset):
+        if self.select_related:
+            queryset = queryset.select_related(*self.select_related)
+        if self.prefetch_related:
+            queryset = queryset.prefetch_related(*self.prefetch_related)
+        return queryset
+
+
+class FieldSelectionMixin:
+    """
+    Purpose:
+
+    Passes ``?fields=a,b`` / ``?omit=c`` from read requests to the serializer
+    (which must accept them, see ``SparseFieldsetMixin``).
+
+    Used for:
+
+    Clients that only need part of each object, e.g. a card view asking for
+    ``?fields=id,name,photo,city``. Writes always get the full representation.
+    """
+    fieldset_params = ('fields', 'omit')
+
+    def get_fieldset(self):
+        if self.request.method not in SAFE_METHODS:
+            return {}
+        fieldset = {}
+        for param in self.fieldset_params:
+            names = [name.strip() for name in self.request.query_params.get(param, '').split(',') if name.strip()]
+            if names:
+                fieldset[param] = names
+        return fieldset
+
+    def get_serializer(self, *args, **kwargs):
+        kwargs.update(self.get_fieldset())
+        return super().get_serializer(*args, **kwargs)
@@ -1,7 +1,24 @@
-from django.db import models
+from django.db import models, transaction
+from django.utils import timezone
 
 from django.contrib.auth.models import User
 
+
+def delete_with_batched_stats(delete):
+    """Run ``delete()`` so the request counters it moves are updated once per pet, not per request."""
+    from .stats import batched_stats  # pets.stats imports these models
+
+    with transaction.atomic(), batched_stats():
+        return delete()
+
+
+class AdoptionStatsQuerySet(models.QuerySet):
+    """Querysets of pets or requests whose deletes batch the counter updates."""
+
+    def delete(self):
+        return delete_with_batched_stats(super().delete)
+
+
 # Create your models here.
 class Pet(models.Model):
     SPECIES_CHOICES = [('dog', 'Dog'), ('cat', 'Cat'), ('bird', 'Bird')]
@@ -11,21 +28,260 @@ class Pet(models.Model):
     age = models.PositiveIntegerField()
     species = models.CharField(max_length=20, choices=SPECIES_CHOICES)
     city = models.CharField(max_length=100)
+    # Filled from pets.geo's offline gazetteer when not given explicitly
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
     photo = models.ImageField(upload_to='pet_photos/')
+    # Resized copies of photo, filled in by pets.photos in the background
+    photo_variants = models.JSONField(default=dict, blank=True, editable=False)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='available')
     description = models.TextField()
     owner = models.ForeignKey(User, on_delete=models.CASCADE)
+    # Adoption request counters, moved only by pets.stats (see save())
+    pending_requests = models.IntegerField(default=0, editable=False)
+    request_count = models.IntegerField(default=0, editable=False)
+    last_request_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    objects = AdoptionStatsQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Browse filters: ?status=&species=&city= in any leading combination
+            models.Index(fields=['status', 'species', 'city'], name='pet_status_species_city_idx'),
+            models.Index(fields=['species', 'city'], name='pet_species_city_idx'),
+            models.Index(fields=['city'], name='pet_city_idx'),
+            # Bounding-box prefilter for ?near= (range on latitude, then longitude)
+            models.Index(fields=['latitude', 'longitude'], name='pet_lat_lng_idx'),
+            # Most browsing only looks at adoptable pets; keep that index small
+            models.Index(
+                fields=['species', 'city'],
+                condition=models.Q(status='available'),
+                name='pet_available_idx',
+            ),
+            # ?ordering=popularity
+            models.Index(fields=['-pending_requests', '-id'], name='pet_popularity_idx'),
+        ]
+
+    # Columns summarised in PetFacetCount
+    FACET_FIELDS = ('species', 'city', 'status')
+    # Columns in the full-text index
+    SEARCH_FIELDS = ('name', 'description', 'city')
+    COUNTER_FIELDS = ('pending_requests', 'request_count', 'last_request_at')
+
+    def save(self, *args, **kwargs):
+        # A full save of a pet loaded earlier must not write back counters
+        # that pets.stats has moved since; they are only changed by UPDATEs.
+        # Such saves become update_fields saves, so re-saving a pet whose row
+        # was deleted raises DatabaseError: pass force_insert=True to re-create it.
+        kwargs.update(zip(('force_insert', 'force_update', 'using', 'update_fields'), args))
+        if not self._state.adding and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            deferred = self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.attname not in deferred and field.name not in self.COUNTER_FIELDS
+            ]
+        super().save(**kwargs)
+
+    def delete(self, *args, **kwargs):
+        return delete_with_batched_stats(lambda: super(Pet, self).delete(*args, **kwargs))
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the facet values as stored, so a later save/delete can move
+        # this pet's count from the old bucket without re-reading the row
+        if all(name in field_names for name in cls.FACET_FIELDS):
+            instance._stored_facet_key = instance.facet_key()
+        if all(name in field_names for name in cls.SEARCH_FIELDS):
+            instance._stored_search_key = instance.search_key()
+        return instance
+
+    def facet_key(self):
+        return (self.species, self.city, self.status)
+
+    def search_key(self):
+        return tuple(getattr(self, name) for name in self.SEARCH_FIELDS)
 
     def __str__(self):
         return f"{self.name} ({self.species}) - {self.status}"
 
+class PetFacetCount(models.Model):
+    """
+    Number of pets per (species, city, status), kept current by pets.signals.
+    Facet counts for the browse filters are read from here instead of
+    aggregating the pets table.
+    """
+    species = models.CharField(max_length=20)
+    city = models.CharField(max_length=100)
+    status = models.CharField(max_length=20)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['species', 'city', 'status'], name='unique_pet_facet_bucket'),
+        ]
+        indexes = [
+            models.Index(fields=['status', 'city'], name='pet_facet_status_city_idx'),
+            models.Index(fields=['city'], name='pet_facet_city_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.species}/{self.city}/{self.status}: {self.count}"
+
 class AdoptionRequest(models.Model):
+    PENDING, APPROVED, REJECTED = 'pending', 'approved', 'rejected'
+    STATUS_CHOICES = [(PENDING, 'Pending'), (APPROVED, 'Approved'), (REJECTED, 'Rejected')]
+
     pet = models.ForeignKey(Pet, on_delete=models.CASCADE, related_name='adoption_requests')
+    requester = models.ForeignKey(User, on_delete=models.CASCADE, related_name='sent_adoption_requests', null=True, blank=True)
+    requester_name = models.CharField(max_length=100)
+    phone = models.CharField(max_length=15)
+    email = models.EmailField()
+    message = models.TextField(blank=True, null=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=PENDING)
+    decided_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = AdoptionStatsQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Per-pet history, newest first (owner listing joins through pet)
+            models.Index(fields=['pet', '-created_at'], name='adoption_pet_created_idx'),
+            # Bulk rejection of the other pending requests when one is approved
+            models.Index(fields=['pet', 'status'], name='adoption_pet_status_idx'),
+        ]
+        constraints = [
+            # One request per user per pet; also serves the duplicate check
+            models.UniqueConstraint(fields=['pet', 'requester'], name='unique_adoption_request_per_requester'),
+            # A pet can only ever be handed to one requester
+            models.UniqueConstraint(
+                fields=['pet'], condition=models.Q(status='approved'), name='one_approved_request_per_pet',
+            ),
+            models.CheckConstraint(
+                condition=models.Q(status__in=['pending', 'approved', 'rejected']),
+                name='adoption_request_status_valid',
+            ),
+            # Decided requests carry their decision time, pending ones do not
+            models.CheckConstraint(
+                condition=models.Q(status='pending', decided_at__isnull=True)
+                | (~models.Q(status='pending') & models.Q(decided_at__isnull=False)),
+                name='adoption_request_decided_at_matches_status',
+            ),
+        ]
+
+    def __str__(self):
+        return f"Adoption Request for {self.pet.name} by {self.requester_name}"
+
+
+class OwnerAdoptionStats(models.Model):
+    """
+    Adoption request totals over all of an owner's pets, kept current by
+    pets.stats together with the counters on Pet. The owner dashboard reads
+    one row instead of aggregating the requests table.
+    """
+    owner = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='adoption_stats')
+    pending_requests = models.IntegerField(default=0)
+    request_count = models.IntegerField(default=0)
+    last_request_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.owner_id}: {self.pending_requests} pending of {self.request_count}"
+
+
+class ArchivedAdoptionRequest(models.Model):
+    """
+    An adoption request moved out of the hot table by
+    ``manage.py archive_adoption_requests``: same id and fields, plus a
+    snapshot of the pet, so the history outlives the pet row.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    pet_id = models.BigIntegerField()
+    pet_name = models.CharField(max_length=100)
+    requester = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+', null=True, blank=True)
     requester_name = models.CharField(max_length=100)
     phone = models.CharField(max_length=15)
     email = models.EmailField()
     message = models.TextField(blank=True, null=True)
+    status = models.CharField(max_length=20, choices=AdoptionRequest.STATUS_CHOICES)
+    decided_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # ?include_archived=true owner listing, newest first
+            models.Index(fields=['owner', '-created_at'], name='archived_owner_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"Archived adoption request for {self.pet_name} by {self.requester_name}"
+
+
+class FullTextDocumentField(models.TextField):
+    """The hidden FTS5 column named after its table; only useful with ``__match``."""
+
+
+@FullTextDocumentField.register_lookup
+class FullTextMatch(models.Lookup):
+    lookup_name = 'match'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f"{lhs} MATCH {rhs}", lhs_params + rhs_params
+
+
+class PetSearchEntry(models.Model):
+    """
+    Read-only view of the ``pets_pet_fts`` FTS5 table (created by migration on
+    SQLite, kept in sync by ``pets.signals``). Joined to Pet by rowid so
+    ``Pet.objects.filter(search_entry__document__match=...)`` runs as an index join.
+    """
+    pet = models.OneToOneField(
+        Pet, primary_key=True, db_column='rowid', on_delete=models.DO_NOTHING,
+        related_name='search_entry', db_constraint=False,
+    )
+    name = models.TextField()
+    description = models.TextField()
+    city = models.TextField()
+    document = FullTextDocumentField(db_column='pets_pet_fts')
+    rank = models.FloatField()
+
+    class Meta:
+        managed = False
+        db_table = 'pets_pet_fts'
+
+
+class Job(models.Model):
+    """
+    A unit of background work (see pets.jobs), run by ``manage.py run_jobs``.
+    Rows are inserted once the triggering transaction commits and claimed by
+    workers with compare-and-set updates, so each attempt runs exactly once.
+    """
+    QUEUED, RUNNING, DONE, FAILED = 'queued', 'running', 'done', 'failed'
+    STATUS_CHOICES = [(QUEUED, 'Queued'), (RUNNING, 'Running'), (DONE, 'Done'), (FAILED, 'Failed')]
+
+    task = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=QUEUED)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_at = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # The poll: due queued jobs, oldest first
+            models.Index(fields=['run_at', 'id'], name='job_due_idx', condition=models.Q(status='queued')),
+            # Lease expiry sweep for jobs of crashed workers
+            models.Index(fields=['locked_at'], name='job_running_idx', condition=models.Q(status='running')),
+        ]
 
     def __str__(self):
-        return f"Adoption Request for {self.pet.name} by {self.requester_name}"
\ No newline at end of file
+        return f"{self.task} #{self.pk} ({self.status})"
@@ -0,0 +1,218 @@
+import json
+from operator import attrgetter
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, _reverse_ordering
+
+from .filters import POPULARITY
+from .geo import DISTANCE
+from .search import SEARCH_RANK
+
+
+class DefaultCursorPagination(CursorPagination):
+    """
+    Purpose:
+
+    Keyset (cursor) pagination for list endpoints.
+
+    Each page is fetched with a ``WHERE key < last_seen ORDER BY key LIMIT n``
+    query instead of ``OFFSET``, so page 5000 costs the same as page 1.
+    Cursors are opaque base64 tokens returned in ``next`` / ``previous``.
+
+    Page size defaults to ``REST_FRAMEWORK['PAGE_SIZE']`` and clients may ask
+    for a different one with ``?page_size=`` (capped at ``max_page_size``).
+
+    With several ordering fields (e.g. ``('-pending_requests', '-id')``) the
+    cursor holds every field's value and pages filter on the whole key, so
+    rows tying on the first field are never paged by OFFSET.
+    """
+    ordering = '-id'
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+    # DRF's paginate_queryset split around its single query, so the async
+    # read path (``apaginate_queryset``) shares the exact same cursor logic.
+    def paginate_queryset(self, queryset, request, view=None):
+        window = self.get_page_window(queryset, request, view)
+        if window is None:
+            return None
+        return self.build_page(list(window))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        window = self.get_page_window(queryset, request, view)
+        if window is None:
+            return None
+        return self.build_page([obj async for obj in window])
+
+    def get_page_window(self, queryset, request, view=None):
+        """Ordered, position-filtered queryset slice for the requested page (one row extra)."""
+        if not self.start_page(queryset, request, view):
+            return None
+        offset = self._window[0]
+        return self.position_queryset(queryset)[offset:offset + self.page_size + 1]
+
+    def paginate_querysets(self, querysets, request, view=None):
+        """
+        One page over several querysets that share the ordering fields and
+        never share a row (e.g. live and archived adoption requests). Each is
+        read up to the end of the page, then the rows are merged in page
+        order; cursors work as for a single queryset.
+        """
+        if not self.start_page(querysets[0], request, view):
+            return None
+        offset, reverse, _ = self._window
+        end = offset + self.page_size + 1
+        rows = [row for queryset in querysets for row in self.position_queryset(queryset)[:end]]
+        # Stable sorts from the last key to the first give the full ordering
+        for order in reversed(_reverse_ordering(self.ordering) if reverse else self.ordering):
+            rows.sort(key=attrgetter(order.lstrip('-')), reverse=order.startswith('-'))
+        return self.build_page(rows[offset:end])
+
+    def start_page(self, queryset, request, view=None):
+        """Read page size, ordering and cursor from the request; False when not paginating."""
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return False
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            self._window = (0, False, None)
+        else:
+            self._window = tuple(self.cursor)
+        return True
+
+    def position_queryset(self, queryset):
+        """``queryset`` in page order, starting at the cursor position."""
+        _, reverse, current_position = self._window
+        if reverse:
+            queryset = queryset.order_by(*_reverse_ordering(self.ordering))
+        else:
+            queryset = queryset.order_by(*self.ordering)
+
+        if current_position is not None:
+            queryset = queryset.filter(self.after_position(self.ordering, self.decode_position(current_position)))
+        return queryset
+
+    def after_position(self, ordering, values):
+        """
+        Rows past ``values`` of ``ordering`` in page order, as
+        ``a >= x AND (a > x OR (a = x AND <rest past the rest>))``; the outer
+        range keeps the first field's index usable.
+        """
+        order, value = ordering[0], values[0]
+        order_attr = order.lstrip('-')
+        # (cursor reversed) XOR (queryset reversed)
+        lookup = 'lt' if self.cursor.reverse != order.startswith('-') else 'gt'
+        past = Q(**{f'{order_attr}__{lookup}': value})
+        if len(ordering) == 1:
+            return past
+        tied = Q(**{order_attr: value}) & self.after_position(ordering[1:], values[1:])
+        return Q(**{f'{order_attr}__{lookup}e': value}) & (past | tied)
+
+    def decode_position(self, position):
+        if len(self.ordering) == 1:
+            return [position]
+        try:
+            values = json.loads(position)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return values
+
+    def _get_position_from_instance(self, instance, ordering):
+        if len(ordering) == 1:
+            return super()._get_position_from_instance(instance, ordering)
+        names = [order.lstrip('-') for order in ordering]
+        if isinstance(instance, dict):
+            values = [instance[name] for name in names]
+        else:
+            values = [getattr(instance, name) for name in names]
+        return json.dumps([str(value) for value in values], separators=(',', ':'))
+
+    def build_page(self, results):
+        """Trim the fetched window to a page and work out next/previous positions."""
+        offset, reverse, current_position = self._window
+        self.page = list(results[:self.page_size])
+
+        if len(results) > len(self.page):
+            has_following_position = True
+            following_position = self._get_position_from_instance(results[-1], self.ordering)
+        else:
+            has_following_position = False
+            following_position = None
+
+        if reverse:
+            self.page = list(reversed(self.page))
+            self.has_next = (current_position is not None) or (offset > 0)
+            self.has_previous = has_following_position
+            if self.has_next:
+                self.next_position = current_position
+            if self.has_previous:
+                self.previous_position = following_position
+        else:
+            self.has_next = has_following_position
+            self.has_previous = (current_position is not None) or (offset > 0)
+            if self.has_next:
+                self.next_position = following_position
+            if self.has_previous:
+                self.previous_position = current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+
+        return self.page
+
+    # When no row of an end page can mark a position (every row ties on the
+    # sort key), DRF steps away from it by page_size rows, which skips rows if
+    # that page is short. Step by the rows actually on the page instead.
+    def get_next_link(self):
+        return self._link_from_end_page(super().get_next_link, at_end=not self.has_previous)
+
+    def get_previous_link(self):
+        return self._link_from_end_page(super().get_previous_link, at_end=not self.has_next)
+
+    def _link_from_end_page(self, get_link, at_end):
+        page_size = self.page_size
+        if at_end:
+            self.page_size = len(self.page)
+        try:
+            return get_link()
+        finally:
+            self.page_size = page_size
+
+
+class PetCursorPagination(DefaultCursorPagination):
+    """Newest pets first, keyed on the primary key.
+
+    Most pending requests first for ``?ordering=popularity``, nearest first
+    for ``?near=`` and best match first for ``?search=`` (in that order of
+    precedence), keyed on the annotated value.
+    """
+    ordering = '-id'
+    annotated_orderings = (
+        (POPULARITY, ('-' + POPULARITY, '-id')),
+        (DISTANCE, (DISTANCE, 'id')),
+        (SEARCH_RANK, (SEARCH_RANK, '-id')),
+    )
+
+    def get_ordering(self, request, queryset, view):
+        for annotation, ordering in self.annotated_orderings:
+            if annotation in queryset.query.annotations:
+                return ordering
+        return super().get_ordering(request, queryset, view)
+
+
+class AdoptionRequestCursorPagination(DefaultCursorPagination):
+    """Newest requests first, keyed on (created_at, id) so ties are stable."""
+    ordering = ('-created_at', '-id')
+
+
+class DashboardCursorPagination(DefaultCursorPagination):
+    """An owner's pets with the most pending requests first."""
+    ordering = ('-pending_requests', '-id')
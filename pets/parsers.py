@@ -0,0 +1,24 @@
+from rest_framework.parsers import BaseParser
+
+from .bulk import iter_lines, read_csv, read_ndjson
+
+
+class NDJSONParser(BaseParser):
+    """
+    Newline-delimited JSON, one object per line.
+
+    Returns a lazy iterator of ``(line_number, object)`` pairs so large uploads
+    are consumed row by row instead of being loaded into memory.
+    """
+    media_type = 'application/x-ndjson'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        return read_ndjson(iter_lines(stream))
+
+
+class CSVParser(BaseParser):
+    """CSV with a header row; lazy iterator of ``(line_number, row_dict)`` pairs."""
+    media_type = 'text/csv'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        return read_csv(iter_lines(stream))
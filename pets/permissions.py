@@ -19,7 +19,8 @@ class IsOwnerOrReadOnly(permissions.BasePermission):
         # so we'll always allow GET, HEAD or OPTIONS requests.
         if request.method in permissions.SAFE_METHODS:
             return True
-        return obj.owner == request.user
+        # Compare keys so the check never has to load the owner row
+        return obj.owner_id == request.user.pk
     
 
 class IsPetOwner(permissions.BasePermission):
@@ -36,4 +37,4 @@ class IsPetOwner(permissions.BasePermission):
     """
     def has_object_permission(self, request, view, obj):
         # Assuming obj is an AdoptionRequest instance
-        return obj.pet.owner == request.user
+        return obj.pet.owner_id == request.user.pk
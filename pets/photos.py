@@ -0,0 +1,143 @@
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connections
+from PIL import Image, ImageOps, features
+
+from .cache import invalidate_pet
+from .models import Pet
+
+logger = logging.getLogger(__name__)
+
+# name -> (max width, max height, crop to fill)
+VARIANTS = {
+    'thumb': (160, 160, True),
+    'card': (480, 480, False),
+    'full': (1280, 1280, False),
+}
+JPEG_QUALITY = 82
+WEBP_QUALITY = 80
+
+_executor = None
+_executor_lock = threading.Lock()
+_in_flight = set()
+
+
+def variant_formats():
+    formats = {'jpeg': 'jpg'}
+    if features.check('webp'):
+        formats['webp'] = 'webp'
+    return formats
+
+
+def variant_name(source_name, variant, extension):
+    """Deterministic storage name, e.g. pet_photos/variants/rex_jpg_thumb.webp."""
+    directory, filename = os.path.split(source_name)
+    stem = filename.replace('.', '_')
+    return os.path.join(directory, 'variants', f'{stem}_{variant}.{extension}')
+
+
+def render_variant(image, size, crop, image_format):
+    width, height = size
+    if crop:
+        resized = ImageOps.fit(image, (width, height), Image.Resampling.LANCZOS)
+    else:
+        resized = image.copy()
+        resized.thumbnail((width, height), Image.Resampling.LANCZOS)  # never upscales
+    buffer = BytesIO()
+    if image_format == 'jpeg':
+        resized.convert('RGB').save(buffer, 'JPEG', quality=JPEG_QUALITY, optimize=True, progressive=True)
+    else:
+        resized.save(buffer, 'WEBP', quality=WEBP_QUALITY, method=4)
+    return buffer.getvalue()
+
+
+def generate_variants(source_name, storage=default_storage):
+    """
+    Write every missing variant of ``source_name`` and return the name map.
+
+    Idempotent and resumable: variants already in storage are left alone, so a
+    run interrupted half way only redoes what is missing. The original is only
+    decoded when at least one variant has to be rendered.
+    """
+    formats = variant_formats()
+    names = {
+        variant: {fmt: variant_name(source_name, variant, ext) for fmt, ext in formats.items()}
+        for variant in VARIANTS
+    }
+    missing = [
+        (variant, fmt, name)
+        for variant, by_format in names.items()
+        for fmt, name in by_format.items()
+        if not storage.exists(name)
+    ]
+    if missing:
+        with storage.open(source_name, 'rb') as source:
+            image = ImageOps.exif_transpose(Image.open(source))
+            if image.mode not in ('RGB', 'RGBA'):
+                image = image.convert('RGBA' if 'transparency' in image.info else 'RGB')
+            for variant, fmt, name in missing:
+                width, height, crop = VARIANTS[variant]
+                storage.save(name, ContentFile(render_variant(image, (width, height), crop, fmt)))
+    return {'source': source_name, **names}
+
+
+def process_pet_photo(pet_id, source_name):
+    """Generate variants for one pet and record them, unless the photo changed meanwhile."""
+    try:
+        variants = generate_variants(source_name)
+        updated = Pet.objects.filter(pk=pet_id, photo=source_name).update(photo_variants=variants)
+        if updated:
+            # queryset.update() skips post_save, so drop cached responses by hand
+            invalidate_pet(pet_id)
+    except Exception:
+        logger.exception("Photo variant generation failed for pet %s (%s)", pet_id, source_name)
+    finally:
+        with _executor_lock:
+            _in_flight.discard((pet_id, source_name))
+
+
+def _process_in_worker(pet_id, source_name):
+    try:
+        process_pet_photo(pet_id, source_name)
+    finally:
+        # Pool threads open their own DB connections; don't leak them
+        connections.close_all()
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.PETS_PHOTO_WORKERS, thread_name_prefix='pet-photos',
+            )
+        return _executor
+
+
+def schedule_variants(pet):
+    """
+    Queue variant generation for ``pet.photo`` on the background pool.
+
+    With ``PETS_PHOTO_WORKERS = 0`` the work runs inline instead (useful for
+    tests and one-off scripts).
+    """
+    key = (pet.pk, pet.photo.name)
+    with _executor_lock:
+        if key in _in_flight:
+            return
+        _in_flight.add(key)
+    if settings.PETS_PHOTO_WORKERS:
+        get_executor().submit(_process_in_worker, *key)
+    else:
+        process_pet_photo(*key)
+
+
+def needs_variants(pet):
+    return bool(pet.photo) and (pet.photo_variants or {}).get('source') != pet.photo.name
@@ -0,0 +1,20 @@
+import json
+
+from rest_framework.renderers import BaseRenderer
+
+
+class NDJSONRenderer(BaseRenderer):
+    """Selected by ``?format=ndjson``; streaming views write the body themselves."""
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        # Only reached for non-streamed responses such as errors
+        return (json.dumps(data) + '\n').encode(self.charset)
+
+
+class CSVRenderer(NDJSONRenderer):
+    """Selected by ``?format=csv``; errors are still reported as a JSON line."""
+    media_type = 'text/csv'
+    format = 'csv'
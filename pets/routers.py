@@ -0,0 +1,100 @@
+import hashlib
+import random
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+LAST_WRITE_KEY = 'pets:replica:last-write'
+PIN_KEY = 'pets:replica:pin:{client}'
+
+# True only while serving a safe request that may read from replicas;
+# management commands, workers and non-safe requests stay on the primary
+_replica_reads = ContextVar('pets_replica_reads', default=False)
+
+
+def read_replicas():
+    return tuple(getattr(settings, 'PETS_READ_REPLICAS', ()))
+
+
+def lag_window():
+    """Seconds a replica may trail the primary (the read-your-writes window)."""
+    return getattr(settings, 'PETS_REPLICA_LAG_SECONDS', 5)
+
+
+def allow_replica_reads(allowed):
+    return _replica_reads.set(allowed)
+
+
+def reset_replica_reads(token):
+    _replica_reads.reset(token)
+
+
+def reading_from_replicas():
+    return _replica_reads.get() and bool(read_replicas())
+
+
+def pin_key(client):
+    return PIN_KEY.format(client=hashlib.sha1(client.encode('utf-8')).hexdigest())
+
+
+def note_write():
+    """Remember when data last changed, so replica reads are not cached while replicas catch up."""
+    if read_replicas():
+        cache.set(LAST_WRITE_KEY, time.time(), lag_window())
+
+
+def replicas_may_lag():
+    last_write = cache.get(LAST_WRITE_KEY)
+    return last_write is not None and time.time() - last_write < lag_window()
+
+
+class PrimaryReplicaRouter:
+    """
+    Purpose:
+
+    Sends ORM reads to a random ``PETS_READ_REPLICAS`` alias while a safe
+    request allows it (see ``ReplicaRoutingMiddleware``); everything else,
+    every write and every read of ``PETS_PRIMARY_ONLY_MODELS`` (tokens, users,
+    sessions, jobs) goes to ``default``.
+
+    Used for:
+
+    Read-heavy pet browsing. With no replicas configured the router is inert.
+    """
+
+    def db_for_read(self, model, **hints):
+        if not reading_from_replicas():
+            return DEFAULT_DB_ALIAS
+        if model._meta.label_lower in getattr(settings, 'PETS_PRIMARY_ONLY_MODELS', ()):
+            return DEFAULT_DB_ALIAS
+        return random.choice(read_replicas())
+
+    def db_for_write(self, model, **hints):
+        # Explicit, so saving an instance loaded from a replica still writes to the primary
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        group = {DEFAULT_DB_ALIAS, *read_replicas()}
+        if obj1._state.db in group and obj2._state.db in group:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get their schema from the primary
+        if db in read_replicas():
+            return False
+        return None
+
+
+def sync_sqlite_replica(alias, source=DEFAULT_DB_ALIAS):
+    """
+    Copy the primary SQLite database onto a replica with SQLite's online
+    backup API: a local stand-in for streaming replication.
+    """
+    primary, replica = connections[source], connections[alias]
+    primary.ensure_connection()
+    replica.ensure_connection()
+    primary.connection.backup(replica.connection)
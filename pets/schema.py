@@ -0,0 +1,213 @@
+import gzip
+import hashlib
+import logging
+import os
+import threading
+from functools import lru_cache
+from importlib import import_module
+from importlib.metadata import PackageNotFoundError, version
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags
+from drf_spectacular.extensions import OpenApiViewExtension
+from drf_spectacular.generators import SchemaGenerator
+from drf_spectacular.renderers import OpenApiJsonRenderer, OpenApiYamlRenderer
+from drf_spectacular.utils import extend_schema
+from drf_spectacular.views import SCHEMA_KWARGS, SpectacularAPIView
+
+try:
+    import brotli  # optional: `pip install brotli` adds a br artifact
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger('pets.schema')
+
+FORMATS = {'yaml': OpenApiYamlRenderer, 'json': OpenApiJsonRenderer}
+# Packages whose upgrade can change the generated schema
+SCHEMA_PACKAGES = ('django', 'djangorestframework', 'drf-spectacular', 'djoser', 'django-filter')
+
+
+class TokenDestroyViewSchema(OpenApiViewExtension):
+    """djoser's logout has no serializer; document it as a bodyless 204."""
+    target_class = 'djoser.views.TokenDestroyView'
+
+    def view_replacement(self):
+        return extend_schema(request=None, responses={204: None})(self.target)
+
+
+@lru_cache(maxsize=1)
+def source_fingerprint():
+    """Digest of the pets sources, the URLconf and the schema-relevant package versions."""
+    digest = hashlib.sha256()
+    modules = [import_module('pets'), import_module(settings.ROOT_URLCONF)]
+    paths = [modules[1].__file__]
+    for root, _, files in os.walk(os.path.dirname(modules[0].__file__)):
+        paths += [os.path.join(root, name) for name in files if name.endswith('.py')]
+    for path in sorted(paths):
+        with open(path, 'rb') as source:
+            digest.update(source.read())
+    for package in SCHEMA_PACKAGES:
+        try:
+            digest.update(f'{package}=={version(package)}'.encode())
+        except PackageNotFoundError:
+            pass
+    return digest.hexdigest()[:16]
+
+
+def code_version():
+    """``PETS_CODE_VERSION`` (e.g. the deployed commit) or a fingerprint of the code itself."""
+    return getattr(settings, 'PETS_CODE_VERSION', None) or source_fingerprint()
+
+
+class SchemaArtifact:
+    """One rendered schema format, pre-compressed, with a strong ETag per encoding."""
+
+    def __init__(self, body, compressed=None):
+        self.bodies = {'identity': body, **(compressed or {})}
+        if 'gzip' not in self.bodies:
+            self.bodies['gzip'] = gzip.compress(body, compresslevel=9, mtime=0)
+        if brotli is not None and 'br' not in self.bodies:
+            self.bodies['br'] = brotli.compress(body, quality=11)
+        self.digest = hashlib.sha256(body).hexdigest()[:32]
+
+    def etag(self, encoding):
+        # Strong validators must differ between byte-different representations
+        return f'"{self.digest}"' if encoding == 'identity' else f'"{self.digest}-{encoding}"'
+
+
+def artifact_path(code, fmt, encoding):
+    suffix = {'identity': '', 'gzip': '.gz', 'br': '.br'}[encoding]
+    return os.path.join(settings.PETS_SCHEMA_DIR, f'openapi-{code}.{fmt}{suffix}')
+
+
+def generate_schema():
+    """The public schema for the whole URLconf (pets routes and djoser)."""
+    return SchemaGenerator().get_schema(request=None, public=True)
+
+
+def build_artifacts(code=None):
+    """Render every format, write the files for ``code`` and drop older versions."""
+    code = code or code_version()
+    schema = generate_schema()
+    artifacts = {fmt: SchemaArtifact(renderer().render(schema, renderer_context={})) for fmt, renderer in FORMATS.items()}
+    directory = settings.PETS_SCHEMA_DIR
+    os.makedirs(directory, exist_ok=True)
+    for fmt, artifact in artifacts.items():
+        for encoding, body in artifact.bodies.items():
+            path = artifact_path(code, fmt, encoding)
+            # Written aside and renamed, so concurrent readers never see half a file
+            with open(f'{path}.tmp-{os.getpid()}', 'wb') as out:
+                out.write(body)
+            os.replace(f'{path}.tmp-{os.getpid()}', path)
+    for name in os.listdir(directory):
+        if name.startswith('openapi-') and not name.startswith(f'openapi-{code}.'):
+            os.remove(os.path.join(directory, name))
+    return artifacts
+
+
+def read_artifact(code, fmt, encoding):
+    try:
+        with open(artifact_path(code, fmt, encoding), 'rb') as source:
+            return source.read()
+    except FileNotFoundError:
+        return None
+
+
+def load_artifacts(code):
+    """Artifacts written for ``code`` by another process or a deploy step, or None."""
+    artifacts = {}
+    for fmt in FORMATS:
+        body = read_artifact(code, fmt, 'identity')
+        if body is None:
+            return None
+        # A missing compressed file (e.g. brotli installed later) is redone in memory
+        compressed = {encoding: read_artifact(code, fmt, encoding) for encoding in ('gzip', 'br')}
+        artifacts[fmt] = SchemaArtifact(body, {key: value for key, value in compressed.items() if value is not None})
+    return artifacts
+
+
+_artifacts = {}
+_lock = threading.Lock()
+
+
+def get_artifacts():
+    """This code version's artifacts: from memory, else from disk, else built once."""
+    code = code_version()
+    artifacts = _artifacts.get(code)
+    if artifacts is None:
+        with _lock:
+            artifacts = _artifacts.get(code)
+            if artifacts is None:
+                artifacts = load_artifacts(code)
+                if artifacts is None:
+                    logger.info("Building OpenAPI schema for code version %s", code)
+                    artifacts = build_artifacts(code)
+                _artifacts.clear()
+                _artifacts[code] = artifacts
+    return artifacts
+
+
+def clear_schema_cache():
+    _artifacts.clear()
+
+
+def pick_encoding(accept_encoding, available):
+    """Best of br, gzip, identity the client accepts (``q=0`` refuses)."""
+    accepted = {}
+    for part in accept_encoding.split(','):
+        name, _, params = part.strip().partition(';')
+        quality = 1.0
+        if params.strip().startswith('q='):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+    for encoding in ('br', 'gzip'):
+        if encoding in available and accepted.get(encoding, accepted.get('*', 0)) > 0:
+            return encoding
+    return 'identity'
+
+
+class PrecomputedSchemaView(SpectacularAPIView):
+    """
+    Purpose:
+
+    Serves the OpenAPI schema from artifacts built once per code version
+    (``manage.py build_openapi_schema`` at deploy, or the first request),
+    instead of introspecting every view on each hit. Responses are
+    pre-compressed (gzip, and brotli when installed), carry a strong ETag and
+    answer a matching ``If-None-Match`` with 304.
+
+    Used for:
+
+    ``/api/schema/``, polled by client generators and the API portal. Content
+    negotiation is SpectacularAPIView's: YAML by default, JSON with
+    ``?format=json`` or a JSON Accept header.
+    """
+
+    @extend_schema(**SCHEMA_KWARGS)
+    def get(self, request, *args, **kwargs):
+        renderer, media_type = self.perform_content_negotiation(request)
+        artifact = get_artifacts()[renderer.format]
+        encoding = pick_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''), artifact.bodies)
+        etag = artifact.etag(encoding)
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+        if if_none_match and (if_none_match.strip() == '*' or etag in parse_etags(if_none_match)):
+            response = HttpResponseNotModified()
+        else:
+            content_type = f'{media_type}; charset={renderer.charset}' if renderer.charset else media_type
+            response = HttpResponse(artifact.bodies[encoding], content_type=content_type)
+            if encoding != 'identity':
+                response['Content-Encoding'] = encoding
+            response['Content-Disposition'] = f'inline; filename="{self.get_filename(renderer)}"'
+        response['ETag'] = etag
+        # Revalidate every time; the 304 is nearly free and a deploy changes the ETag
+        response['Cache-Control'] = 'public, no-cache'
+        patch_vary_headers(response, ('Accept', 'Accept-Encoding'))
+        return response
+
+    def get_filename(self, renderer):
+        return f"{settings.SPECTACULAR_SETTINGS.get('TITLE') or 'schema'}.{renderer.format}"
@@ -0,0 +1,105 @@
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import F, Q
+from django.utils.module_loading import import_string
+
+from .models import Pet
+
+SEARCH_RANK = 'search_rank'
+FTS_TABLE = 'pets_pet_fts'
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def search_terms(query):
+    """Split free text into word tokens; punctuation and FTS operators are dropped."""
+    return TOKEN_RE.findall(query or '')
+
+
+class BasicSearchBackend:
+    """
+    Portable fallback: every term must appear (case-insensitively) in one of
+    the searched fields. Costs a LIKE scan, so only use it where no full-text
+    index is available.
+    """
+    fields = Pet.SEARCH_FIELDS
+
+    def filter(self, queryset, terms):
+        for term in terms:
+            condition = Q()
+            for field in self.fields:
+                condition |= Q(**{f'{field}__icontains': term})
+            queryset = queryset.filter(condition)
+        return queryset
+
+    def index(self, pet):
+        pass
+
+    def index_many(self, pets):
+        pass
+
+    def remove(self, pk):
+        pass
+
+    def rebuild(self):
+        return 0
+
+
+class SQLiteFTSBackend(BasicSearchBackend):
+    """
+    SQLite FTS5 index over name, description and city (``pets_pet_fts``).
+
+    Every term is matched as a prefix (``"lab"*`` finds "labrador") and all
+    terms must match. Results are annotated with the bm25 score as
+    ``search_rank``; lower is better. The FTS table is joined to pets by rowid,
+    so SQLite starts from the index and never scans the pets table.
+    """
+
+    def match_expression(self, terms):
+        return ' '.join('"{}"*'.format(term.replace('"', '')) for term in terms)
+
+    def filter(self, queryset, terms):
+        return queryset.filter(
+            search_entry__document__match=self.match_expression(terms)
+        ).annotate(**{SEARCH_RANK: F('search_entry__rank')})
+
+    def index(self, pet):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [pet.pk])
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (rowid, name, description, city) VALUES (%s, %s, %s, %s)',
+                [pet.pk, pet.name, pet.description, pet.city],
+            )
+
+    def index_many(self, pets):
+        """Index freshly inserted pets (no existing rows to replace)."""
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'INSERT INTO {FTS_TABLE} (rowid, name, description, city) VALUES (%s, %s, %s, %s)',
+                [(pet.pk, pet.name, pet.description, pet.city) for pet in pets],
+            )
+
+    def remove(self, pk):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [pk])
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (rowid, name, description, city) '
+                f'SELECT id, name, description, city FROM {Pet._meta.db_table}'
+            )
+            cursor.execute(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('optimize')")
+        return Pet.objects.count()
+
+
+def get_search_backend():
+    """Backend named by ``PETS_SEARCH_BACKEND``; FTS5 on SQLite, LIKE elsewhere."""
+    path = getattr(settings, 'PETS_SEARCH_BACKEND', None)
+    if path:
+        return import_string(path)()
+    if connection.vendor == 'sqlite':
+        return SQLiteFTSBackend()
+    return BasicSearchBackend()
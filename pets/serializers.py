@@ -1,6 +1,102 @@
 from rest_framework import serializers
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.utils.encoding import filepath_to_uri
 from django.contrib.auth.models import User
-from .models import Pet, AdoptionRequest
+from .models import Pet, AdoptionRequest, ArchivedAdoptionRequest, OwnerAdoptionStats
+from .metrics import TimedSerializerMixin
+
+# Columns each PetSerializer field reads, i.e. what .only()/.values() must load
+PET_FIELD_COLUMNS = {
+    'id': ('id',), 'name': ('name',), 'age': ('age',), 'species': ('species',), 'city': ('city',),
+    'latitude': ('latitude',), 'longitude': ('longitude',), 'distance_km': (),
+    'photo': ('photo',), 'photo_variants': ('photo', 'photo_variants'), 'status': ('status',),
+    'description': ('description',), 'owner': ('owner',),
+}
+
+
+def pet_columns(field_names):
+    columns = {'id'}
+    for name in field_names:
+        columns.update(PET_FIELD_COLUMNS[name])
+    return sorted(columns)
+
+
+def split_fieldset(names):
+    """['id', 'pet.name'] -> ({'id'}, {'pet': ['name']})"""
+    top, nested = set(), {}
+    for name in names:
+        head, _, rest = name.partition('.')
+        if rest:
+            nested.setdefault(head, []).append(rest)
+        else:
+            top.add(head)
+    return top, nested
+
+
+class SparseFieldsetMixin:
+    """
+    Purpose:
+
+    Serializer takes ``fields=[...]`` (keep only these) and ``omit=[...]``
+    (drop these) keyword arguments. Dotted names reach into nested
+    serializers: ``fields=['id', 'pet.name']``.
+
+    Used for:
+
+    ``?fields=`` / ``?omit=`` on read endpoints (see FieldSelectionMixin), so
+    card views receive four fields instead of the whole object. Unknown names
+    are a 400, not silently ignored.
+    """
+
+    def __init__(self, *args, fields=None, omit=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields or omit:
+            self.apply_fieldset(fields or (), omit or ())
+
+    def apply_fieldset(self, fields, omit):
+        keep, keep_nested = split_fieldset(fields)
+        drop, drop_nested = split_fieldset(omit)
+        unknown = (keep | drop | set(keep_nested) | set(drop_nested)) - set(self.fields)
+        if unknown:
+            raise serializers.ValidationError({'fields': f"Unknown field(s): {', '.join(sorted(unknown))}."})
+        for name in list(self.fields):
+            if name in drop or (fields and name not in keep and name not in keep_nested):
+                self.fields.pop(name)
+        for name in set(keep_nested) | set(drop_nested):
+            child = self.fields.get(name)
+            if child is None:
+                continue
+            if not isinstance(child, SparseFieldsetMixin):
+                raise serializers.ValidationError({'fields': f"'{name}' has no sub-fields."})
+            # pet.name alone means "only name"; with a bare 'pet' as well, the whole pet
+            child.apply_fieldset(() if name in keep else keep_nested.get(name, ()), drop_nested.get(name, ()))
+
+
+def media_url_builder(request):
+    """
+    name -> URL exactly as DRF renders a FileField. With FileSystemStorage the
+    absolute prefix is resolved once, instead of a urljoin() and
+    build_absolute_uri() per file.
+    """
+    if isinstance(default_storage, FileSystemStorage) and default_storage.base_url.endswith('/'):
+        prefix = request.build_absolute_uri(default_storage.base_url) if request else default_storage.base_url
+        return lambda name: prefix + filepath_to_uri(name).lstrip('/')
+
+    def url(name):
+        location = default_storage.url(name)
+        return request.build_absolute_uri(location) if request else location
+    return url
+
+
+def photo_variant_urls(photo_name, variants, url):
+    """{"thumb": {"jpeg": url, ...}, ...} for a pet photo, or None until rendered."""
+    variants = variants or {}
+    if not photo_name or variants.get('source') != photo_name:
+        return None
+    return {
+        variant: {fmt: url(name) for fmt, name in by_format.items()}
+        for variant, by_format in variants.items() if variant != 'source'
+    }
 
 
 class SignupSerializer(serializers.ModelSerializer):
@@ -20,27 +116,123 @@ class SignupSerializer(serializers.ModelSerializer):
         user.save()
         return user
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ['id', 'username', 'email']
 
-class PetSerializer(serializers.ModelSerializer):
+class PetSerializer(SparseFieldsetMixin, TimedSerializerMixin, serializers.ModelSerializer):
+    # {"thumb": {"jpeg": url, "webp": url}, "card": {...}, "full": {...}},
+    # or null until the background resize has finished
+    photo_variants = serializers.SerializerMethodField()
+    # Only present on ?near= queries
+    distance_km = serializers.SerializerMethodField()
+
     class Meta:
         model = Pet
         fields = [
-            'id', 'name', 'age', 'species', 'city',
-            'photo', 'status', 'description', 'owner'
+            'id', 'name', 'age', 'species', 'city', 'latitude', 'longitude', 'distance_km',
+            'photo', 'photo_variants', 'status', 'description', 'owner'
+        ]
+        # Only pets.adoption moves a pet to or from adopted, under its locks
+        read_only_fields = ['owner', 'status']
+
+    def update(self, instance, validated_data):
+        # A new city without explicit coordinates is geocoded again on save
+        if 'city' in validated_data and 'latitude' not in validated_data and 'longitude' not in validated_data:
+            if validated_data['city'] != instance.city:
+                validated_data['latitude'] = validated_data['longitude'] = None
+        return super().update(instance, validated_data)
+
+    def get_distance_km(self, obj) -> float | None:
+        distance = getattr(obj, 'distance_km', None)
+        return round(distance, 2) if distance is not None else None
+
+    def get_photo_variants(self, obj) -> dict[str, dict[str, str]] | None:
+        return photo_variant_urls(obj.photo.name, obj.photo_variants, media_url_builder(self.context.get('request')))
+
+
+class PetListSerializer(TimedSerializerMixin, serializers.BaseSerializer):
+    """
+    Read-only twin of PetSerializer for list pages.
+
+    Renders the dicts of a ``.values()`` query over just the selected columns
+    (see PetViewSet.filter_queryset), so a page never instantiates Pets or
+    runs DRF's per-field machinery. The output is identical to PetSerializer's
+    for the same ``fields`` / ``omit``.
+    """
+
+    def __init__(self, *args, fields=None, omit=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.field_names = self.select(fields, omit)
+        url = media_url_builder(self.context.get('request'))
+        converters = {
+            # Same as DRF's ImageField representation
+            'photo': lambda row: url(row['photo']) if row['photo'] else None,
+            'photo_variants': lambda row: photo_variant_urls(row['photo'], row['photo_variants'], url),
+            'distance_km': lambda row: (
+                round(row['distance_km'], 2) if row.get('distance_km') is not None else None
+            ),
+        }
+        self.getters = [
+            (name, converters.get(name) or (lambda row, name=name: row[name])) for name in self.field_names
         ]
-        read_only_fields = ['owner']
 
-class AdoptionRequestSerializer(serializers.ModelSerializer):
+    @staticmethod
+    def select(fields=None, omit=None):
+        """PetSerializer field names left by ``fields`` / ``omit``, in output order."""
+        return list(PetSerializer(fields=fields, omit=omit).fields)
+
+    def to_representation(self, row):
+        return {name: getter(row) for name, getter in self.getters}
+
+
+class DashboardPetSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    """One row of the owner dashboard: the pet and its adoption request counters."""
+
+    class Meta:
+        model = Pet
+        fields = ['id', 'name', 'species', 'status', 'pending_requests', 'request_count', 'last_request_at']
+        read_only_fields = fields
+
+
+class OwnerAdoptionStatsSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = OwnerAdoptionStats
+        fields = ['pending_requests', 'request_count', 'last_request_at']
+        read_only_fields = fields
+
+class AdoptionRequestSerializer(SparseFieldsetMixin, TimedSerializerMixin, serializers.ModelSerializer):
     pet = PetSerializer(read_only=True)
 
     class Meta:
         model = AdoptionRequest
-        fields = ['id', 'pet', 'requester_name', 'phone', 'email', 'message', 'created_at']
-        read_only_fields = ['created_at']
+        fields = ['id', 'pet', 'requester_name', 'phone', 'email', 'message', 'status', 'decided_at', 'created_at']
+        read_only_fields = ['status', 'decided_at', 'created_at']
+
+class ArchivedPetSerializer(SparseFieldsetMixin, serializers.Serializer):
+    """The pet snapshot kept with an archived request: id and name."""
+    id = serializers.IntegerField(source='pet_id', read_only=True)
+    name = serializers.CharField(source='pet_name', read_only=True)
+
+    def apply_fieldset(self, fields, omit):
+        # Names were already checked against PetSerializer; the snapshot has fewer
+        kept = [name for name in fields if name in self.fields]
+        if fields and not kept:
+            for name in list(self.fields):
+                self.fields.pop(name)
+            return
+        super().apply_fieldset(kept, [name for name in omit if name in self.fields])
+
+
+class ArchivedAdoptionRequestSerializer(SparseFieldsetMixin, TimedSerializerMixin, serializers.ModelSerializer):
+    """Read-only, same shape as AdoptionRequestSerializer with the pet reduced to its snapshot."""
+    pet = ArchivedPetSerializer(source='*', read_only=True)
+
+    class Meta:
+        model = ArchivedAdoptionRequest
+        fields = AdoptionRequestSerializer.Meta.fields
+        read_only_fields = fields
 
 class AdoptionRequestCreateSerializer(serializers.ModelSerializer):
     class Meta:
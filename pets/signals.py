@@ -0,0 +1,137 @@
+from django.contrib.auth.models import User
+from django.contrib.auth.signals import user_logged_out
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete
+from django.dispatch import receiver
+
+from rest_framework.authtoken.models import Token
+
+from .archive import archive_requests_of_deleted_pet
+from .authentication import invalidate_token, invalidate_user, shared_cache
+from .cache import invalidate_pet
+from .facets import track_pet_deleted, track_pet_saved
+from .geo import fill_coordinates
+from .jobs import enqueue
+from .models import AdoptionRequest, Pet
+from .photos import needs_variants, schedule_variants
+from .search import get_search_backend
+from .similarity import record_changes
+from .stats import track_pet_deleting, track_request_created, track_request_deleted
+from .tasks import NOTIFY_ADOPTION_REQUEST
+
+
+@receiver(pre_save, sender=Pet)
+def geocode_pet(sender, instance, **kwargs):
+    fill_coordinates(instance)
+
+
+@receiver(pre_save, sender=Pet)
+def remember_stored_facets(sender, instance, **kwargs):
+    # Pets loaded with all facet columns already know them (Pet.from_db);
+    # otherwise read the stored values once so the counts move correctly
+    if not instance._state.adding and not hasattr(instance, '_stored_facet_key'):
+        stored = Pet.objects.filter(pk=instance.pk).values_list(*Pet.FACET_FIELDS).first()
+        if stored is not None:
+            instance._stored_facet_key = stored
+
+
+@receiver(post_save, sender=Pet)
+def count_saved_pet(sender, instance, created, **kwargs):
+    track_pet_saved(instance, created)
+
+
+@receiver(post_delete, sender=Pet)
+def count_deleted_pet(sender, instance, **kwargs):
+    track_pet_deleted(instance)
+
+
+@receiver(pre_delete, sender=Pet)
+def archive_deleted_pet_requests(sender, instance, origin=None, **kwargs):
+    # Runs before the cascade removes the requests
+    archive_requests_of_deleted_pet(instance, origin)
+
+
+@receiver(pre_delete, sender=Pet)
+def remember_deleted_pet_owner(sender, instance, **kwargs):
+    # The batched counter update runs after the pet row is gone
+    track_pet_deleting(instance)
+
+
+@receiver(post_save, sender=Pet)
+@receiver(post_delete, sender=Pet)
+def invalidate_pet_cache(sender, instance, **kwargs):
+    # Bump now so this request never reads its own stale entry, and again on
+    # commit so a concurrent reader can't re-cache the pre-commit row.
+    invalidate_pet(instance.pk)
+    transaction.on_commit(lambda: invalidate_pet(instance.pk))
+
+
+@receiver(post_save, sender=Pet)
+def index_pet(sender, instance, created, update_fields=None, **kwargs):
+    # Saves that leave name, description and city alone keep their index row
+    if update_fields is not None and not set(update_fields) & set(Pet.SEARCH_FIELDS):
+        return
+    if not created and getattr(instance, '_stored_search_key', None) == instance.search_key():
+        return
+    get_search_backend().index(instance)
+    instance._stored_search_key = instance.search_key()
+
+
+@receiver(post_delete, sender=Pet)
+def unindex_pet(sender, instance, **kwargs):
+    get_search_backend().remove(instance.pk)
+
+
+@receiver(post_save, sender=Pet)
+@receiver(post_delete, sender=Pet)
+def log_similarity_change(sender, instance, **kwargs):
+    # Every process's similar-pets index reloads the pet on its next query;
+    # pk is read now because delete() clears it before the commit
+    pk = instance.pk
+    transaction.on_commit(lambda: record_changes([pk]))
+
+
+@receiver(post_save, sender=Pet)
+def queue_photo_variants(sender, instance, **kwargs):
+    if needs_variants(instance):
+        transaction.on_commit(lambda: schedule_variants(instance))
+
+
+@receiver(post_save, sender=AdoptionRequest)
+def count_created_request(sender, instance, created, **kwargs):
+    # Same transaction as the insert, so the counters commit (or roll back) with it
+    if created:
+        track_request_created(instance)
+
+
+@receiver(post_delete, sender=AdoptionRequest)
+def count_deleted_request(sender, instance, **kwargs):
+    track_request_deleted(instance)
+
+
+@receiver(post_save, sender=AdoptionRequest)
+def notify_pet_owner(sender, instance, created, **kwargs):
+    # Email goes out from the job worker, never on the request path
+    if created:
+        enqueue(NOTIFY_ADOPTION_REQUEST, adoption_request_id=instance.pk)
+
+
+@receiver(post_save, sender=Token)
+@receiver(post_delete, sender=Token)
+def invalidate_cached_token(sender, instance, **kwargs):
+    invalidate_token(instance.key)
+
+
+@receiver(post_save, sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    # Deactivation, password or permission changes must not be served from cache
+    keys = ()
+    if shared_cache() is not None:
+        keys = list(Token.objects.filter(user_id=instance.pk).values_list('key', flat=True))
+    invalidate_user(instance.pk, keys)
+
+
+@receiver(user_logged_out)
+def invalidate_logged_out_user(sender, request, user, **kwargs):
+    if user is not None:
+        invalidate_user(user.pk)
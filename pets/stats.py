@@ -0,0 +1,192 @@
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Max, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import AdoptionRequest, OwnerAdoptionStats, Pet
+
+# ({pet_id: [pending, total]} of requests deleted, {pet_id: owner_id} of pets
+# deleted) inside batched_stats()
+_batch = ContextVar('pets_stats_batch', default=None)
+
+
+def _latest_request(pet_ref):
+    return Subquery(
+        AdoptionRequest.objects.filter(pet=pet_ref).order_by('-created_at').values('created_at')[:1]
+    )
+
+
+def _latest_owner_request(owner_ref):
+    return Subquery(
+        Pet.objects.filter(owner=owner_ref).order_by().values('owner')
+        .annotate(latest=Max('last_request_at')).values('latest')
+    )
+
+
+def _owner_of(adoption_request):
+    if AdoptionRequest.pet.is_cached(adoption_request):
+        return adoption_request.pet.owner_id
+    return Pet.objects.filter(pk=adoption_request.pet_id).values_list('owner_id', flat=True).first()
+
+
+def track_request_created(adoption_request):
+    """Count a new request on its pet and the pet's owner (in the creating transaction)."""
+    pending = int(adoption_request.status == AdoptionRequest.PENDING)
+    created_at = adoption_request.created_at
+    Pet.objects.filter(pk=adoption_request.pet_id).update(
+        pending_requests=F('pending_requests') + pending,
+        request_count=F('request_count') + 1,
+        last_request_at=Coalesce(Greatest('last_request_at', created_at), created_at),
+    )
+    owner_id = _owner_of(adoption_request)
+    updates = {
+        'pending_requests': F('pending_requests') + pending,
+        'request_count': F('request_count') + 1,
+        'last_request_at': Coalesce(Greatest('last_request_at', created_at), created_at),
+    }
+    if OwnerAdoptionStats.objects.filter(owner_id=owner_id).update(**updates):
+        return
+    try:
+        # First request for this owner; a concurrent one may create the row first
+        with transaction.atomic():
+            OwnerAdoptionStats.objects.create(
+                owner_id=owner_id, pending_requests=pending, request_count=1, last_request_at=created_at,
+            )
+    except IntegrityError:
+        OwnerAdoptionStats.objects.filter(owner_id=owner_id).update(**updates)
+
+
+def track_request_deleted(adoption_request):
+    pending = int(adoption_request.status == AdoptionRequest.PENDING)
+    batch = _batch.get()
+    if batch is not None:
+        counts = batch[0][adoption_request.pet_id]
+        counts[0] += pending
+        counts[1] += 1
+        return
+    _remove_counts({adoption_request.pet_id: (pending, 1)}, {adoption_request.pet_id: _owner_of(adoption_request)})
+
+
+def track_pet_deleting(pet):
+    """Remember a pet's owner before a batched delete removes the pet row."""
+    batch = _batch.get()
+    if batch is not None:
+        batch[1][pet.pk] = pet.owner_id
+
+
+def track_requests_decided(pet_id, owner_id, count):
+    """``count`` pending requests of one pet were approved or rejected."""
+    if count:
+        Pet.objects.filter(pk=pet_id).update(pending_requests=F('pending_requests') - count)
+        OwnerAdoptionStats.objects.filter(owner_id=owner_id).update(pending_requests=F('pending_requests') - count)
+
+
+def _remove_counts(counts, owners, deleted_pets=()):
+    """Subtract ``{pet_id: (pending, total)}``, one UPDATE per distinct delta."""
+    by_delta = defaultdict(list)
+    for pet_id, delta in counts.items():
+        if pet_id not in deleted_pets:
+            by_delta[tuple(delta)].append(pet_id)
+    for (pending, total), pet_ids in by_delta.items():
+        Pet.objects.filter(pk__in=pet_ids).update(
+            pending_requests=F('pending_requests') - pending,
+            request_count=F('request_count') - total,
+            last_request_at=_latest_request(OuterRef('pk')),
+        )
+    owner_deltas = defaultdict(lambda: [0, 0])
+    for pet_id, (pending, total) in counts.items():
+        if owners.get(pet_id) is not None:
+            owner_deltas[owners[pet_id]][0] += pending
+            owner_deltas[owners[pet_id]][1] += total
+    by_delta = defaultdict(list)
+    for owner_id, delta in owner_deltas.items():
+        by_delta[tuple(delta)].append(owner_id)
+    for (pending, total), owner_ids in by_delta.items():
+        OwnerAdoptionStats.objects.filter(owner_id__in=owner_ids).update(
+            pending_requests=F('pending_requests') - pending,
+            request_count=F('request_count') - total,
+            last_request_at=_latest_owner_request(OuterRef('owner')),
+        )
+
+
+@contextmanager
+def batched_stats():
+    """
+    Collect the counter changes of requests deleted inside the block and
+    apply them on exit with one UPDATE per distinct change, instead of a few
+    queries per request. Use it inside the deleting transaction.
+    """
+    counts, deleted_pets = defaultdict(lambda: [0, 0]), {}
+    token = _batch.set((counts, deleted_pets))
+    try:
+        yield
+    finally:
+        _batch.reset(token)
+    if counts:
+        owners = dict(deleted_pets)
+        remaining = [pet_id for pet_id in counts if pet_id not in deleted_pets]
+        if remaining:
+            owners.update(Pet.objects.filter(pk__in=remaining).values_list('pk', 'owner_id'))
+        _remove_counts(counts, owners, deleted_pets)
+
+
+def reconcile_stats(chunk_size=2000):
+    """
+    Recount every pet's and owner's counters from the requests table and
+    rewrite the ones that drifted (e.g. after raw SQL or a restore). Returns
+    ``(pets_fixed, owners_fixed)``.
+
+    Each chunk is counted and fixed in one transaction, but a request
+    created by another transaction meanwhile can still be missed: run it when
+    writes are quiet, or run it twice.
+    """
+    pets_fixed = 0
+    last_pk = 0
+    while True:
+        with transaction.atomic():
+            rows = list(
+                Pet.objects.filter(pk__gt=last_pk).order_by('pk')
+                .annotate(
+                    actual_pending=Count('adoption_requests', filter=Q(adoption_requests__status=AdoptionRequest.PENDING)),
+                    actual_total=Count('adoption_requests'),
+                    actual_latest=Max('adoption_requests__created_at'),
+                )
+                .only('pk', *Pet.COUNTER_FIELDS)[:chunk_size]
+            )
+            if not rows:
+                break
+            drifted = []
+            for pet in rows:
+                actual = (pet.actual_pending, pet.actual_total, pet.actual_latest)
+                if (pet.pending_requests, pet.request_count, pet.last_request_at) != actual:
+                    pet.pending_requests, pet.request_count, pet.last_request_at = actual
+                    drifted.append(pet)
+            Pet.objects.bulk_update(drifted, Pet.COUNTER_FIELDS)
+            pets_fixed += len(drifted)
+            last_pk = rows[-1].pk
+
+    with transaction.atomic():
+        actual = {
+            row['owner']: (row['pending'], row['total'], row['latest'])
+            for row in Pet.objects.values('owner').annotate(
+                pending=Sum('pending_requests'), total=Sum('request_count'), latest=Max('last_request_at'),
+            ).order_by()
+        }
+        stored = {
+            owner_id: counters for owner_id, *counters in
+            OwnerAdoptionStats.objects.values_list('owner_id', *Pet.COUNTER_FIELDS).iterator()
+        }
+        drifted = [
+            OwnerAdoptionStats(owner_id=owner_id, pending_requests=pending, request_count=total, last_request_at=latest)
+            for owner_id, (pending, total, latest) in actual.items()
+            if tuple(stored.get(owner_id, (0, 0, None))) != (pending, total, latest)
+        ]
+        OwnerAdoptionStats.objects.bulk_create(
+            drifted, update_conflicts=True, unique_fields=['owner'], update_fields=list(Pet.COUNTER_FIELDS),
+        )
+        orphans = set(stored) - set(actual)
+        OwnerAdoptionStats.objects.filter(owner_id__in=orphans).delete()
+    return pets_fixed, len(drifted) + len(orphans)
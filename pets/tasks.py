@@ -0,0 +1,29 @@
+from django.conf import settings
+from django.core.mail import send_mail
+
+from .jobs import task
+from .models import AdoptionRequest
+
+NOTIFY_ADOPTION_REQUEST = 'notify_adoption_request'
+
+
+@task(NOTIFY_ADOPTION_REQUEST)
+def notify_adoption_request(adoption_request_id):
+    """Email the pet owner about a new adoption request."""
+    adoption_request = (
+        AdoptionRequest.objects.select_related('pet__owner').filter(pk=adoption_request_id).first()
+    )
+    if adoption_request is None or not adoption_request.pet.owner.email:
+        return  # withdrawn since, or nobody to tell
+    pet = adoption_request.pet
+    send_mail(
+        subject=f"New adoption request for {pet.name}",
+        message=(
+            f"{adoption_request.requester_name} would like to adopt {pet.name}.\n\n"
+            f"Phone: {adoption_request.phone}\n"
+            f"Email: {adoption_request.email}\n\n"
+            f"{adoption_request.message or ''}"
+        ).rstrip() + "\n",
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        recipient_list=[pet.owner.email],
+    )
@@ -1,3 +1,1539 @@
-from django.test import TestCase
+import csv
+import gzip
+import json
+import math
+import os
+import re
+import shutil
+import tempfile
+import threading
+from datetime import timedelta
+from io import BytesIO, StringIO
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.cache import cache, caches
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import DatabaseError, connection, connections, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from .authentication import clear_token_cache
+from .benchmarking import InProcessTransport, compare_to_baseline, run_load, seed_dataset
+from .jobs import Worker, enqueue, run_pending, task
+from .metrics import registry
+from .models import Pet, AdoptionRequest, ArchivedAdoptionRequest, Job, OwnerAdoptionStats, PetFacetCount
+from .photos import generate_variants
+from .geo import geocode
+from .routers import PrimaryReplicaRouter, allow_replica_reads, reset_replica_reads, sync_sqlite_replica
+from .schema import clear_schema_cache, generate_schema
+from .search import get_search_backend
+from .similarity import (
+    SEQUENCE_KEY, SimilarityIndex, current_sequence, np, record_changes, reset_similarity_index, similarity_index,
+)
+from .throttling import SlidingWindowThrottle
+
+# 1x1 transparent GIF, enough for ImageField validation
+TINY_GIF = (
+    b'GIF89a\x01\x00\x01\x00\x80\x00\x00\x00\x00\x00\xff\xff\xff!\xf9\x04\x01\x00\x00\x00\x00'
+    b',\x00\x00\x00\x00\x01\x00\x01\x00\x00\x02\x02D\x01\x00;'
+)
+
+
+def make_pet(owner, **kwargs):
+    fields = {
+        'name': 'Rex', 'age': 2, 'species': 'dog', 'city': 'Cairo',
+        'photo': 'pet_photos/rex.jpg', 'description': 'Friendly dog.',
+    }
+    fields.update(kwargs)
+    return Pet.objects.create(owner=owner, **fields)
+
+
+@skipUnless(connection.vendor == 'sqlite', 'Query plans are checked against SQLite output')
+class QueryPlanTests(TestCase):
+    """Hot lookups must be served by an index, never by a full table scan."""
+
+    FULL_SCAN = re.compile(r'\bSCAN pets_\w+')
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user('owner')
+        cls.requester = User.objects.create_user('requester')
+        cls.pet = make_pet(cls.owner)
+
+    def assertIndexed(self, queryset):
+        plan = queryset.explain()
+        self.assertIsNone(self.FULL_SCAN.search(plan), f"full table scan:\n{plan}")
+        self.assertIn('USING', plan)
+
+    def test_pet_filter_combinations(self):
+        for filters in (
+            {'status': 'available'},
+            {'species': 'cat'},
+            {'city': 'Cairo'},
+            {'species': 'cat', 'city': 'Cairo'},
+            {'status': 'available', 'species': 'cat'},
+            {'status': 'available', 'species': 'cat', 'city': 'Cairo'},
+            {'status': 'adopted', 'city': 'Cairo'},
+        ):
+            with self.subTest(filters=filters):
+                self.assertIndexed(Pet.objects.filter(**filters))
+
+    def test_adoption_requests_by_pet_owner(self):
+        self.assertIndexed(
+            AdoptionRequest.objects.filter(pet__owner=self.owner).order_by('-created_at', '-id')
+        )
+
+    def test_duplicate_request_check(self):
+        self.assertIndexed(AdoptionRequest.objects.filter(pet=self.pet, requester=self.requester))
+
+
+class QueryCountTests(TestCase):
+    """Each endpoint runs a fixed number of queries regardless of row count."""
+
+    ROWS = 5
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user('owner')
+        for i in range(cls.ROWS):
+            requester = User.objects.create_user(f'requester{i}')
+            pet = make_pet(cls.owner, name=f'Pet {i}')
+            AdoptionRequest.objects.create(
+                pet=pet, requester=requester, requester_name=f'Requester {i}',
+                phone='0100000000', email=f'r{i}@example.com',
+            )
+        cls.pet = pet
+        cls.adoption_request = AdoptionRequest.objects.latest('id')
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def test_pet_list(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('pet-list'))
+        self.assertEqual(len(response.data['results']), self.ROWS)
+
+    def test_pet_detail(self):
+        with self.assertNumQueries(1):
+            self.client.get(reverse('pet-detail', args=[self.pet.pk]))
+
+    def test_pet_update_permission_check(self):
+        self.client.force_authenticate(self.owner)
+        # Fetch + update; the ownership check must not load the owner row
+        # and the search index is left alone when no indexed field changed
+        with self.assertNumQueries(2):
+            response = self.client.patch(reverse('pet-detail', args=[self.pet.pk]), {'age': 3})
+        self.assertEqual(response.status_code, 200)
+
+    def test_adoption_request_list(self):
+        self.client.force_authenticate(self.owner)
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('adoptionrequest-list'))
+        self.assertEqual(len(response.data['results']), self.ROWS)
+
+    def test_adoption_request_detail(self):
+        self.client.force_authenticate(self.owner)
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('adoptionrequest-detail', args=[self.adoption_request.pk]))
+        self.assertEqual(response.data['pet']['id'], self.pet.pk)
+
+
+class CursorPaginationTests(TestCase):
+    """Lists page by keyset cursors: bounded page sizes, stable order across ties, opaque cursors."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user('owner')
+        Pet.objects.bulk_create([
+            Pet(owner=cls.owner, name=f'Pet {i}', age=1, species='dog', city='Cairo', photo='', description='Pet.')
+            for i in range(105)
+        ])
+        cls.pet_ids = list(Pet.objects.order_by('-id').values_list('pk', flat=True))
+        cls.pet = Pet.objects.get(pk=cls.pet_ids[0])
+        cls.requests = [
+            AdoptionRequest.objects.create(
+                pet=cls.pet, requester=User.objects.create_user(f'requester{i}'),
+                requester_name=f'Requester {i}', phone='0100000000', email=f'r{i}@example.com',
+            )
+            for i in range(5)
+        ]
+        # Every request shares one created_at, so only the id breaks the tie
+        AdoptionRequest.objects.update(created_at=timezone.now())
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def walk(self, url, params, direction='next'):
+        pages = []
+        while url:
+            data = self.client.get(url, params).data
+            pages.append([item['id'] for item in data['results']])
+            url, params = data[direction], {}
+        return pages
+
+    def test_default_and_maximum_page_size(self):
+        data = self.client.get(reverse('pet-list')).data
+        self.assertEqual([pet['id'] for pet in data['results']], self.pet_ids[:settings.REST_FRAMEWORK['PAGE_SIZE']])
+        self.assertIsNone(data['previous'])
+        self.assertEqual(len(self.client.get(reverse('pet-list'), {'page_size': 500}).data['results']), 100)
+        self.assertEqual(len(self.client.get(reverse('pet-list'), {'page_size': 7}).data['results']), 7)
+
+    def test_next_and_previous_cursors(self):
+        pages = self.walk(reverse('pet-list'), {'page_size': 30})
+        self.assertEqual([len(page) for page in pages], [30, 30, 30, 15])
+        self.assertEqual(sum(pages, []), self.pet_ids)
+        second = self.client.get(self.client.get(reverse('pet-list'), {'page_size': 30}).data['next']).data
+        first = self.client.get(second['previous']).data
+        self.assertEqual([pet['id'] for pet in first['results']], pages[0])
+        self.assertIsNone(first['previous'])
+
+    def test_ties_on_the_sort_key_are_stable(self):
+        self.client.force_authenticate(self.owner)
+        expected = sorted((request.pk for request in self.requests), reverse=True)
+        pages = self.walk(reverse('adoptionrequest-list'), {'page_size': 2})
+        self.assertEqual(sum(pages, []), expected)
+        last = self.client.get(reverse('adoptionrequest-list'), {'page_size': 2}).data
+        while last['next']:
+            last = self.client.get(last['next']).data
+        backwards = self.walk(last['previous'], {}, 'previous')
+        self.assertEqual(sum(reversed(backwards), []), expected[:4])
+
+    def test_invalid_cursors_are_rejected(self):
+        # Not base64, a non-numeric offset, a negative offset
+        for cursor in ('not-base64!', 'bz14', 'bz0tNQ=='):
+            response = self.client.get(reverse('pet-list'), {'cursor': cursor})
+            self.assertEqual(response.status_code, 404, cursor)
+            self.assertEqual(str(response.data['detail']), 'Invalid cursor')
+
+
+class TiedKeysetPaginationTests(TestCase):
+    """Annotated orderings page on (key, id), so long runs of tied keys are walked without OFFSET."""
+
+    ROWS = 1100
+
+    @classmethod
+    def setUpTestData(cls):
+        owner = User.objects.create_user('owner')
+        latitude, longitude = geocode('Cairo')
+        # Same city, same coordinates, same description, no requests: every key ties
+        Pet.objects.bulk_create([
+            Pet(owner=owner, name='Pet', age=1, species='dog', city='Cairo', latitude=latitude,
+                longitude=longitude, photo='', description='Friendly dog.')
+            for _ in range(cls.ROWS)
+        ])
+        get_search_backend().rebuild()
+        cls.newest_first = list(Pet.objects.order_by('-id').values_list('pk', flat=True))
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def walk(self, **params):
+        ids, url, params = [], reverse('pet-list'), {'page_size': 100, **params}
+        while url:
+            with CaptureQueriesContext(connection) as queries:
+                data = self.client.get(url, params).data
+            self.assertFalse([query for query in queries if 'OFFSET' in query['sql']], url)
+            ids += [pet['id'] for pet in data['results']]
+            url, params = data['next'], {}
+        return ids
+
+    def test_popularity_ties(self):
+        self.assertEqual(self.walk(ordering='popularity'), self.newest_first)
+
+    def test_distance_ties(self):
+        latitude, longitude = geocode('Cairo')
+        self.assertEqual(self.walk(near=f'{latitude},{longitude}'), self.newest_first[::-1])
+
+    def test_search_rank_ties(self):
+        self.assertEqual(self.walk(search='friendly'), self.newest_first)
+
+
+class ResponseCacheTests(TestCase):
+    """Anonymous pet reads are cached and invalidated by writes."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.media_root = tempfile.mkdtemp()
+        cls.enterClassContext(override_settings(MEDIA_ROOT=cls.media_root))
+        cls.addClassCleanup(shutil.rmtree, cls.media_root, ignore_errors=True)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user('owner')
+        cls.pet = make_pet(cls.owner)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def test_list_is_served_from_cache(self):
+        self.client.get(reverse('pet-list'), {'species': 'dog', 'city': 'Cairo'})
+        with self.assertNumQueries(0):
+            # Same filters in a different order hit the same entry
+            response = self.client.get(reverse('pet-list'), {'city': 'Cairo', 'species': 'dog'})
+        self.assertEqual(len(response.data['results']), 1)
+
+    def test_save_invalidates_list_and_detail(self):
+        detail_url = reverse('pet-detail', args=[self.pet.pk])
+        self.client.get(reverse('pet-list'))
+        self.client.get(detail_url)
+        self.pet.name = 'Max'
+        self.pet.save()
+        self.assertEqual(self.client.get(reverse('pet-list')).data['results'][0]['name'], 'Max')
+        self.assertEqual(self.client.get(detail_url).data['name'], 'Max')
+
+    def test_create_through_api_invalidates_list(self):
+        self.client.get(reverse('pet-list'))
+        self.client.force_authenticate(self.owner)
+        response = self.client.post(reverse('pet-list'), {
+            'name': 'Tom', 'age': 1, 'species': 'cat', 'city': 'Giza', 'description': 'Calm.',
+            'photo': SimpleUploadedFile('tom.gif', TINY_GIF, content_type='image/gif'),
+        })
+        self.assertEqual(response.status_code, 201)
+        self.client.force_authenticate(None)
+        self.assertEqual(len(self.client.get(reverse('pet-list')).data['results']), 2)
+
+    def test_delete_invalidates_detail(self):
+        detail_url = reverse('pet-detail', args=[self.pet.pk])
+        self.client.get(detail_url)
+        Pet.objects.get(pk=self.pet.pk).delete()
+        self.assertEqual(self.client.get(detail_url).status_code, 404)
+
+    def test_detail_etag_not_modified(self):
+        detail_url = reverse('pet-detail', args=[self.pet.pk])
+        etag = self.client.get(detail_url)['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.pet.save()
+        response = self.client.get(detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_detail_version_ignores_leading_zeros(self):
+        padded_url = reverse('pet-detail', args=[f'00{self.pet.pk}'])
+        etag = self.client.get(padded_url)['ETag']
+        self.assertEqual(self.client.get(reverse('pet-detail', args=[self.pet.pk]))['ETag'], etag)
+        self.pet.name = 'Max'
+        self.pet.save()
+        response = self.client.get(padded_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual((response.status_code, response.data['name']), (200, 'Max'))
+        self.assertEqual(self.client.get(reverse('pet-detail', args=['x7'])).status_code, 404)
+
+
+@skipUnless(connection.vendor == 'sqlite', 'FTS5 search backend is SQLite-only')
+class FullTextSearchTests(TestCase):
+    """?search= goes through the FTS5 index and stays in sync with Pet writes."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user('owner')
+        cls.dog = make_pet(cls.owner, name='Buddy', description='Playful labrador who loves kids.')
+        cls.cat = make_pet(cls.owner, name='Luna', species='cat', city='Giza', description='Quiet cat.')
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def search(self, **params):
+        response = self.client.get(reverse('pet-list'), params)
+        return [pet['name'] for pet in response.data['results']]
+
+    def test_prefix_match_and_ranking(self):
+        make_pet(self.owner, name='Labrador Max', description='Labrador, labrador, labrador.')
+        self.assertEqual(self.search(search='labra'), ['Labrador Max', 'Buddy'])
+
+    def test_combines_with_filters(self):
+        self.assertEqual(self.search(search='quiet', species='cat'), ['Luna'])
+        self.assertEqual(self.search(search='quiet', species='dog'), [])
+
+    def test_index_follows_saves_and_deletes(self):
+        self.cat.description = 'Loves labradors.'
+        self.cat.save()
+        self.assertCountEqual(self.search(search='labrador'), ['Buddy', 'Luna'])
+        self.dog.delete()
+        self.assertEqual(self.search(search='labrador'), ['Luna'])
+
+    def test_saves_that_leave_indexed_fields_alone_skip_the_index(self):
+        pet = Pet.objects.get(pk=self.cat.pk)
+        pet.age = 4
+        with self.assertNumQueries(1):
+            pet.save()
+        with self.assertNumQueries(1):
+            pet.save(update_fields=['age'])
+        pet.city = 'Alexandria'
+        pet.save(update_fields=['city'])
+        self.assertEqual(self.search(search='alexandria'), ['Luna'])
+
+    def test_query_operators_are_not_interpreted(self):
+        self.assertEqual(self.search(search='"Luna*(:'), ['Luna'])
+
+
+class PhotoVariantTests(TestCase):
+    """Uploads get thumb/card/full variants rendered after commit."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.media_root = tempfile.mkdtemp()
+        cls.enterClassContext(override_settings(MEDIA_ROOT=cls.media_root, PETS_PHOTO_WORKERS=0))
+        cls.addClassCleanup(shutil.rmtree, cls.media_root, ignore_errors=True)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user('owner')
+
+    def upload(self, name='big.png', size=(2000, 1500)):
+        buffer = BytesIO()
+        Image.new('RGB', size, 'orange').save(buffer, 'PNG')
+        return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/png')
+
+    def test_create_renders_variants_after_commit(self):
+        client = APIClient()
+        client.force_authenticate(self.owner)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = client.post(reverse('pet-list'), {
+                'name': 'Rex', 'age': 2, 'species': 'dog', 'city': 'Cairo',
+                'description': 'Friendly.', 'photo': self.upload(),
+            })
+        self.assertEqual(response.status_code, 201)
+        self.assertIsNone(response.data['photo_variants'])
+
+        pet = Pet.objects.get(pk=response.data['id'])
+        self.assertEqual(pet.photo_variants['source'], pet.photo.name)
+        with default_storage.open(pet.photo_variants['thumb']['jpeg']) as thumb:
+            self.assertEqual(Image.open(thumb).size, (160, 160))
+        with default_storage.open(pet.photo_variants['full']['jpeg']) as full:
+            self.assertEqual(Image.open(full).size, (1280, 960))
+
+        cache.clear()
+        detail = APIClient().get(reverse('pet-detail', args=[pet.pk])).data
+        self.assertTrue(detail['photo_variants']['card']['jpeg'].endswith('_card.jpg'))
+
+    def test_generation_is_idempotent(self):
+        pet = make_pet(self.owner, photo=default_storage.save('pet_photos/small.png', self.upload()))
+        first = generate_variants(pet.photo.name)
+        mtime = os.path.getmtime(default_storage.path(first['card']['jpeg']))
+        second = generate_variants(pet.photo.name)
+        self.assertEqual(first, second)
+        self.assertEqual(mtime, os.path.getmtime(default_storage.path(second['card']['jpeg'])))
+
+    def test_backfill_command(self):
+        pet = make_pet(self.owner, photo=default_storage.save('pet_photos/old.png', self.upload()))
+        call_command('backfill_photo_variants', workers=1, stdout=StringIO())
+        pet.refresh_from_db()
+        self.assertEqual(pet.photo_variants['source'], pet.photo.name)
+
+
+class BulkImportExportTests(TestCase):
+    """NDJSON/CSV import reports per-row errors; export streams every matching pet."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user('owner')
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+
+    def row(self, **kwargs):
+        data = {'name': 'Rex', 'age': 2, 'species': 'dog', 'city': 'Cairo',
+                'photo': 'pet_photos/rex.jpg', 'description': 'Friendly.'}
+        data.update(kwargs)
+        return data
+
+    def test_ndjson_import_reports_bad_rows(self):
+        body = '\n'.join([
+            json.dumps(self.row(name='Rex')),
+            json.dumps(self.row(species='lizard')),
+            '{not json',
+            json.dumps(self.row(name='Luna', description='Loves labradors.')),
+        ])
+        response = self.client.generic('POST', reverse('pet-bulk-import'), body, content_type='application/x-ndjson')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['created'], 2)
+        self.assertEqual([error['row'] for error in response.data['errors']], [2, 3])
+        self.assertIn('species', response.data['errors'][0]['errors'])
+        self.assertEqual(Pet.objects.filter(owner=self.owner).count(), 2)
+        if connection.vendor == 'sqlite':
+            results = self.client.get(reverse('pet-list'), {'search': 'labrador'}).data['results']
+            self.assertEqual([pet['name'] for pet in results], ['Luna'])
+
+    def test_csv_import(self):
+        body = 'name,age,species,city,photo,description\nRex,2,dog,Cairo,pet_photos/rex.jpg,Friendly.\nTom,x,cat,Giza,pet_photos/tom.jpg,Calm.\n'
+        response = self.client.generic('POST', reverse('pet-bulk-import'), body, content_type='text/csv')
+        self.assertEqual(response.data['created'], 1)
+        self.assertEqual(response.data['errors'][0]['row'], 3)
+
+    def test_import_requires_authentication(self):
+        self.client.force_authenticate(None)
+        response = self.client.generic('POST', reverse('pet-bulk-import'), '', content_type='application/x-ndjson')
+        self.assertEqual(response.status_code, 401)
+
+    def test_export_streams_filtered_pets(self):
+        make_pet(self.owner, name='Rex')
+        make_pet(self.owner, name='Luna', species='cat')
+        response = self.client.get(reverse('pet-export'), {'species': 'cat'})
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual([json.loads(line)['name'] for line in lines], ['Luna'])
+
+        response = self.client.get(reverse('pet-export'), {'format': 'csv'})
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        rows = list(csv.reader(b''.join(response.streaming_content).decode().splitlines()))
+        self.assertEqual(rows[0][:2], ['id', 'name'])
+        self.assertEqual(len(rows), 3)
+
+    def test_management_commands_round_trip(self):
+        make_pet(self.owner, name='Rex')
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'pets.csv')
+            call_command('export_pets', path, format='csv')
+            call_command('import_pets', path, owner='owner', stdout=StringIO(), stderr=StringIO())
+        self.assertEqual(Pet.objects.filter(name='Rex').count(), 2)
+
+
+class AsyncReadPathTests(TestCase):
+    """The async pet endpoints return what PetViewSet returns."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user('owner')
+        for i in range(3):
+            make_pet(cls.owner, name=f'Dog {i}')
+        cls.cat = make_pet(cls.owner, name='Luna', species='cat')
+
+    def setUp(self):
+        cache.clear()
+
+    async def test_list_matches_sync_viewset(self):
+        params = {'species': 'dog', 'page_size': 2}
+        expected = await sync_to_async(lambda: APIClient().get(reverse('pet-list'), params).data)()
+        response = await self.async_client.get(reverse('pet-async-list'), params)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [pet['id'] for pet in response.json()['results']],
+            [pet['id'] for pet in expected['results']],
+        )
+        next_page = await self.async_client.get(response.json()['next'])
+        self.assertEqual(len(next_page.json()['results']), 1)
+
+    async def test_detail_and_errors(self):
+        response = await self.async_client.get(reverse('pet-async-detail', args=[self.cat.pk]))
+        self.assertEqual(response.json()['name'], 'Luna')
+        response = await self.async_client.get(reverse('pet-async-detail', args=[self.cat.pk + 100]))
+        self.assertEqual(response.status_code, 404)
+        response = await self.async_client.get(reverse('pet-async-list'), {'species': 'lizard'})
+        self.assertIn('species', response.json())
+        response = await self.async_client.post(reverse('pet-async-list'))
+        self.assertEqual(response.status_code, 405)
+        response = await self.async_client.get(reverse('pet-async-list'), headers={'Authorization': 'Token nope'})
+        self.assertEqual(response.status_code, 401)
+
+    async def test_fieldsets_match_sync_viewset(self):
+        params = {'fields': 'id,name', 'page_size': 2}
+        expected = await sync_to_async(lambda: APIClient().get(reverse('pet-list'), params).json())()
+        response = await self.async_client.get(reverse('pet-async-list'), params)
+        self.assertEqual(response.json()['results'], expected['results'])
+        response = await self.async_client.get(reverse('pet-async-detail', args=[self.cat.pk]), {'omit': 'description'})
+        self.assertNotIn('description', response.json())
+        self.assertIn('name', response.json())
+        response = await self.async_client.get(reverse('pet-async-list'), {'fields': 'id,secret'})
+        self.assertEqual(response.status_code, 400)
+
+
+class TokenAuthCacheTests(TestCase):
+    """Token lookups are cached per process and dropped when the token or user changes."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user('owner')
+        cls.user = User.objects.create_user('adopter')
+        cls.token = Token.objects.create(user=cls.user)
+
+    def setUp(self):
+        clear_token_cache()
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def list_requests(self):
+        return self.client.get(reverse('adoptionrequest-list'))
+
+    def test_second_request_skips_token_query(self):
+        with self.assertNumQueries(2):  # token JOIN user + adoption requests
+            self.assertEqual(self.list_requests().status_code, 200)
+        with self.assertNumQueries(1):
+            self.assertEqual(self.list_requests().status_code, 200)
+
+    def test_token_deletion_invalidates(self):
+        self.list_requests()
+        Token.objects.filter(user=self.user).delete()
+        self.assertEqual(self.list_requests().status_code, 401)
+
+    def test_deactivation_invalidates(self):
+        self.list_requests()
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.list_requests().status_code, 401)
+
+    def test_djoser_logout_invalidates(self):
+        self.list_requests()
+        self.assertEqual(self.client.post('/auth/token/logout/').status_code, 204)
+        self.assertEqual(self.list_requests().status_code, 401)
+
+    @override_settings(PETS_TOKEN_SHARED_CACHE='default')
+    def test_shared_tier(self):
+        cache.clear()
+        self.list_requests()
+        clear_token_cache()  # as seen by another process
+        with self.assertNumQueries(1):
+            self.assertEqual(self.list_requests().status_code, 200)
+        self.user.is_active = False
+        self.user.save()
+        clear_token_cache()
+        self.assertEqual(self.list_requests().status_code, 401)
+
+
+class PerformanceMetricsTests(TestCase):
+    """Per-route metrics are recorded and exposed in Prometheus format."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user('owner')
+        cls.pet = make_pet(cls.owner)
+
+    def setUp(self):
+        cache.clear()
+        registry.reset()
+
+    def test_metrics_endpoint(self):
+        self.client.get(reverse('pet-list'))
+        self.client.get(reverse('pet-detail', args=[self.pet.pk]))
+        body = self.client.get(reverse('metrics')).content.decode()
+        self.assertIn('pets_http_requests_total{route="pet-list",method="GET",status="200"} 1', body)
+        self.assertIn('pets_db_queries_per_request_bucket{route="pet-list",method="GET",le="1"} 1', body)
+        self.assertIn('pets_http_request_duration_seconds_count{route="pet-detail",method="GET"} 1', body)
+        self.assertIn('pets_serializer_seconds_total{route="pet-detail",method="GET"}', body)
+        self.assertIn('pets_http_response_size_bytes_sum{route="pet-detail",method="GET"}', body)
+        self.assertNotIn('route="metrics"', body)
+
+    @override_settings(PETS_METRICS_ALLOWED_IPS=('10.0.0.0/8',), PETS_METRICS_TOKEN='scrape-me')
+    def test_metrics_endpoint_is_restricted(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+        self.assertEqual(self.client.get(reverse('metrics'), REMOTE_ADDR='10.1.2.3').status_code, 200)
+        self.assertEqual(self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer wrong').status_code, 403)
+        self.assertEqual(self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer scrape-me').status_code, 200)
+
+    @override_settings(PETS_SLOW_REQUEST_MS=0)
+    def test_slow_request_log_includes_sql(self):
+        with self.assertLogs('pets.slow_requests', 'WARNING') as logs:
+            self.client.get(reverse('pet-list'))
+        self.assertIn('pet-list', logs.output[0])
+        self.assertIn('FROM "pets_pet"', logs.output[0])
+
+    @override_settings(PETS_SLOW_REQUEST_MS=0)
+    def test_slow_request_log_omits_parameters(self):
+        token = Token.objects.create(user=self.owner)
+        with self.assertLogs('pets.slow_requests', 'WARNING') as logs:
+            self.client.get(reverse('adoptionrequest-list'), HTTP_AUTHORIZATION=f'Token {token.key}')
+        self.assertIn('authtoken_token', logs.output[0])
+        self.assertNotIn(token.key, logs.output[0])
+
+
+class NearbySearchTests(TestCase):
+    """?near= returns pets inside the radius, nearest first."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user('owner')
+        cls.cairo = make_pet(cls.owner, name='Cairo pet', city='Cairo')
+        cls.giza = make_pet(cls.owner, name='Giza pet', city='giza')
+        cls.alex = make_pet(cls.owner, name='Alexandria pet', city='Alexandria')
+        cls.unknown = make_pet(cls.owner, name='Nowhere pet', city='Atlantis')
+
+    def setUp(self):
+        cache.clear()
+
+    def near(self, **params):
+        response = self.client.get(reverse('pet-list'), params)
+        self.assertEqual(response.status_code, 200, response.data)
+        return [(pet['name'], pet['distance_km']) for pet in response.data['results']]
+
+    def test_city_is_geocoded_on_save(self):
+        self.assertAlmostEqual(self.giza.latitude, 30.0131)
+        self.assertIsNone(self.unknown.latitude)
+
+    def test_nearest_first_within_radius(self):
+        results = self.near(near='30.0444,31.2357', radius=20)
+        self.assertEqual([name for name, _ in results], ['Cairo pet', 'Giza pet'])
+        self.assertEqual(results[0][1], 0.0)
+        lat1, lng1, lat2, lng2 = map(math.radians, (30.0444, 31.2357, 30.0131, 31.2089))
+        a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+        self.assertAlmostEqual(results[1][1], 2 * 6371.0088 * math.asin(math.sqrt(a)), places=2)
+        self.assertEqual(len(self.near(near='Cairo', radius=250)), 3)
+
+    def test_invalid_parameters(self):
+        for params in ({'near': 'Atlantis'}, {'near': '95,10'}, {'near': 'Cairo', 'radius': '-1'}):
+            with self.subTest(params=params):
+                self.assertEqual(self.client.get(reverse('pet-list'), params).status_code, 400)
+
+    def test_changing_city_through_api_regeocodes(self):
+        client = APIClient()
+        client.force_authenticate(self.owner)
+        client.patch(reverse('pet-detail', args=[self.cairo.pk]), {'city': 'Luxor'})
+        self.cairo.refresh_from_db()
+        self.assertAlmostEqual(self.cairo.latitude, 25.6872)
+
+    @skipUnless(connection.vendor == 'sqlite', 'Query plans are checked against SQLite output')
+    def test_bounding_box_uses_index(self):
+        plan = Pet.objects.filter(latitude__range=(29, 31), longitude__range=(30, 32)).explain()
+        self.assertIn('pet_lat_lng_idx', plan)
+
+
+class FacetCountTests(TestCase):
+    """Facet counts come from the summary table and follow every kind of write."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user('owner')
+        cls.rex = make_pet(cls.owner, name='Rex')
+        make_pet(cls.owner, name='Max', city='Giza')
+        make_pet(cls.owner, name='Luna', species='cat', description='Loves labradors.')
+        make_pet(cls.owner, name='Old', species='bird', status='adopted')
+
+    def setUp(self):
+        cache.clear()
+
+    def facets(self, **params):
+        response = self.client.get(reverse('pet-facets'), params)
+        self.assertEqual(response.status_code, 200, response.data)
+        return response.data
+
+    def test_counts_without_touching_pets_table(self):
+        with CaptureQueriesContext(connection) as queries:
+            data = self.facets()
+        self.assertFalse(any('"pets_pet"' in query['sql'] for query in queries))
+        self.assertEqual(data['species'], {'dog': 2, 'cat': 1, 'bird': 1})
+        self.assertEqual(data['status'], {'available': 3, 'adopted': 1})
+        self.assertEqual(data['cities'], [{'city': 'Cairo', 'count': 3}, {'city': 'Giza', 'count': 1}])
+
+    def test_each_facet_ignores_its_own_filter(self):
+        data = self.facets(species='dog', status='available')
+        self.assertEqual(data['species'], {'dog': 2, 'cat': 1, 'bird': 0})
+        self.assertEqual(data['status'], {'available': 2, 'adopted': 0})
+        self.assertEqual(data['cities'], [{'city': 'Cairo', 'count': 1}, {'city': 'Giza', 'count': 1}])
+
+    def test_search_uses_grouped_aggregate(self):
+        data = self.facets(search='labrador')
+        self.assertEqual(data['species'], {'dog': 0, 'cat': 1, 'bird': 0})
+
+    def test_writes_keep_counts_current(self):
+        self.rex.city = 'Giza'
+        self.rex.save()
+        Pet.objects.get(name='Luna').delete()
+        Pet.objects.get(name='Old').save()  # unchanged save moves nothing
+        deferred = Pet.objects.only('id', 'name').get(name='Max')
+        deferred.status = 'adopted'
+        deferred.save()
+        data = self.facets()
+        self.assertEqual(data['species'], {'dog': 2, 'cat': 0, 'bird': 1})
+        self.assertEqual(data['status'], {'available': 1, 'adopted': 2})
+        self.assertEqual(data['cities'], [{'city': 'Giza', 'count': 2}, {'city': 'Cairo', 'count': 1}])
+
+    def test_rebuild_command_repairs_drift(self):
+        PetFacetCount.objects.update(count=99)
+        call_command('rebuild_pet_facets', stdout=StringIO())
+        self.assertEqual(self.facets()['species'], {'dog': 2, 'cat': 1, 'bird': 1})
+
+
+class AdoptionWorkflowTests(TestCase):
+    """Approve/reject are single transitions out of pending that keep the pet in step."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user('owner')
+        cls.pet = make_pet(cls.owner)
+        cls.requests = [
+            AdoptionRequest.objects.create(
+                pet=cls.pet, requester=User.objects.create_user(f'requester{i}'),
+                requester_name=f'Requester {i}', phone='0100000000', email=f'r{i}@example.com',
+            )
+            for i in range(3)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+
+    def decide(self, adoption_request, decision):
+        return self.client.post(reverse(f'adoptionrequest-{decision}', args=[adoption_request.pk]))
+
+    def test_approve_rejects_the_rest_and_adopts_the_pet(self):
+        response = self.decide(self.requests[1], 'approve')
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(response.data['status'], 'approved')
+        statuses = dict(AdoptionRequest.objects.values_list('pk', 'status'))
+        self.assertEqual(
+            [statuses[request.pk] for request in self.requests], ['rejected', 'approved', 'rejected'],
+        )
+        self.assertFalse(AdoptionRequest.objects.filter(decided_at__isnull=True).exists())
+        self.pet.refresh_from_db()
+        self.assertEqual(self.pet.status, 'adopted')
+        self.assertEqual(PetFacetCount.objects.get(status='adopted').count, 1)
+
+    def test_decided_requests_conflict(self):
+        self.assertEqual(self.decide(self.requests[0], 'reject').status_code, 200)
+        self.assertEqual(self.decide(self.requests[0], 'reject').status_code, 409)
+        self.assertEqual(self.decide(self.requests[0], 'approve').status_code, 409)
+        self.assertEqual(self.decide(self.requests[1], 'approve').status_code, 200)
+        self.assertEqual(self.decide(self.requests[2], 'approve').status_code, 409)
+
+    def test_status_only_moves_through_decisions(self):
+        url = reverse('pet-detail', args=[self.pet.pk])
+        self.client.patch(url, {'status': 'adopted'})
+        self.assertEqual(Pet.objects.get(pk=self.pet.pk).status, 'available')
+        self.decide(self.requests[0], 'approve')
+        self.client.patch(url, {'status': 'available'})
+        self.assertEqual(Pet.objects.get(pk=self.pet.pk).status, 'adopted')
+
+    def test_only_the_pet_owner_decides(self):
+        self.client.force_authenticate(self.requests[0].requester)
+        self.assertEqual(self.decide(self.requests[0], 'approve').status_code, 404)
+
+    def test_no_requests_for_adopted_pets(self):
+        self.decide(self.requests[0], 'approve')
+        self.client.force_authenticate(User.objects.create_user('late'))
+        response = self.client.post(reverse('adoptionrequest-list'), {
+            'pet_id': self.pet.pk, 'requester_name': 'Late', 'phone': '0100000000', 'email': 'late@example.com',
+        })
+        self.assertEqual(response.status_code, 400)
+
+
+class AdoptionConcurrencyTests(TransactionTestCase):
+    """Many threads racing on one pet: the database decides exactly one winner."""
+
+    THREADS = 12
+
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user('owner')
+        # No photo: nothing queued for the variant workers after commit
+        self.pet = make_pet(self.owner, photo='')
+
+    def race(self, calls):
+        """POST every (user, path, data) at once from its own thread; status codes."""
+        barrier = threading.Barrier(len(calls))
+        statuses = []
+
+        def worker(user, path, data):
+            client = APIClient()
+            client.force_authenticate(user)
+            try:
+                barrier.wait()
+                statuses.append(client.post(path, data).status_code)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=worker, args=call) for call in calls]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return sorted(statuses)
+
+    def test_concurrent_approvals_adopt_once(self):
+        requests = [
+            AdoptionRequest.objects.create(
+                pet=self.pet, requester=User.objects.create_user(f'requester{i}'),
+                requester_name=f'Requester {i}', phone='0100000000', email=f'r{i}@example.com',
+            )
+            for i in range(self.THREADS)
+        ]
+        statuses = self.race([
+            (self.owner, reverse('adoptionrequest-approve', args=[request.pk]), {}) for request in requests
+        ])
+        self.assertEqual(statuses, [200] + [409] * (self.THREADS - 1))
+        self.assertEqual(AdoptionRequest.objects.filter(status='approved').count(), 1)
+        self.assertEqual(AdoptionRequest.objects.filter(status='rejected').count(), self.THREADS - 1)
+        self.pet.refresh_from_db()
+        self.assertEqual(self.pet.status, 'adopted')
+        self.assertEqual(
+            dict(PetFacetCount.objects.values_list('status', 'count')), {'available': 0, 'adopted': 1},
+        )
+
+    def test_concurrent_duplicate_submissions_create_one_request(self):
+        requester = User.objects.create_user('requester')
+        data = {'pet_id': self.pet.pk, 'requester_name': 'Requester', 'phone': '0100000000', 'email': 'r@example.com'}
+        statuses = self.race([(requester, reverse('adoptionrequest-list'), data)] * self.THREADS)
+        self.assertEqual(statuses, [201] + [400] * (self.THREADS - 1))
+        self.assertEqual(AdoptionRequest.objects.filter(pet=self.pet, requester=requester).count(), 1)
+
+
+@task('tests.flaky')
+def flaky_task(fail):
+    if fail:
+        raise RuntimeError("boom")
+
+
+class JobQueueTests(TestCase):
+    """Side effects leave the request path through the jobs table."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user('owner', email='owner@example.com')
+        cls.requester = User.objects.create_user('requester')
+        cls.pet = make_pet(cls.owner, name='Luna')
+
+    def test_adoption_request_emails_owner_from_worker(self):
+        client = APIClient()
+        client.force_authenticate(self.requester)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = client.post(reverse('adoptionrequest-list'), {
+                'pet_id': self.pet.pk, 'requester_name': 'Sara', 'phone': '0100000000', 'email': 'sara@example.com',
+            })
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(Job.objects.get().status, Job.QUEUED)
+
+        self.assertEqual(run_pending(), 1)
+        self.assertEqual(Job.objects.get().status, Job.DONE)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['owner@example.com'])
+        self.assertIn('Sara would like to adopt Luna', mail.outbox[0].body)
+
+    def test_rolled_back_work_enqueues_nothing(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    enqueue('tests.flaky', fail=False)
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+        self.assertFalse(Job.objects.exists())
+
+    def test_failures_back_off_then_give_up(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            enqueue('tests.flaky', max_attempts=2, fail=True)
+        with self.assertLogs('pets.jobs', 'WARNING'):
+            self.assertEqual(run_pending(), 1)
+        job = Job.objects.get()
+        self.assertEqual((job.status, job.attempts), (Job.QUEUED, 1))
+        self.assertIn('boom', job.last_error)
+        self.assertEqual(run_pending(), 0)  # not due before its backoff
+
+        Job.objects.update(run_at=job.created_at)
+        with self.assertLogs('pets.jobs', 'WARNING'):
+            self.assertEqual(run_pending(), 1)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.FAILED, 2))
+
+    def test_claims_are_exclusive_and_leases_expire(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            for _ in range(3):
+                enqueue('tests.flaky', fail=False)
+        first, second = Worker(name='a', batch_size=2), Worker(name='b', batch_size=5)
+        self.assertEqual(len(first.claim()), 2)
+        self.assertEqual(len(second.claim()), 1)
+        self.assertEqual(second.claim(), [])
+
+        # Worker "a" died holding its batch: the lease runs out and "b" takes over
+        Job.objects.filter(locked_by__startswith='a:').update(locked_at=timezone.now() - timedelta(days=1))
+        self.assertEqual(second.recover_expired(), 2)
+        self.assertEqual(len(second.claim()), 2)
+
+
+class SparseFieldsetTests(TestCase):
+    """?fields= / ?omit= trim both the payload and the columns read."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user('owner')
+        cls.rex = make_pet(cls.owner, name='Rex')
+        cls.luna = make_pet(cls.owner, name='Luna', species='cat', photo='')
+        Pet.objects.filter(pk=cls.rex.pk).update(photo_variants={
+            'source': 'pet_photos/rex.jpg', 'thumb': {'jpeg': 'pet_photos/variants/rex_jpg_thumb.jpg'},
+        })
+        cls.adoption_request = AdoptionRequest.objects.create(
+            pet=cls.rex, requester=User.objects.create_user('requester'),
+            requester_name='Sara', phone='0100000000', email='sara@example.com',
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_list_matches_detail_representation(self):
+        results = self.client.get(reverse('pet-list')).data['results']
+        self.assertEqual(len(results), 2)
+        for item in results:
+            detail = self.client.get(reverse('pet-detail', args=[item['id']])).data
+            self.assertEqual(item, detail)
+        self.assertEqual(
+            results[-1]['photo_variants'],
+            {'thumb': {'jpeg': 'http://testserver/media/pet_photos/variants/rex_jpg_thumb.jpg'}},
+        )
+
+    def test_list_reads_only_selected_columns(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('pet-list'), {'fields': 'id,name,photo'})
+        self.assertEqual(response.data['results'][0], {'id': self.luna.pk, 'name': 'Luna', 'photo': None})
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('description', queries[0]['sql'])
+
+    def test_detail_omit_defers_columns(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('pet-detail', args=[self.rex.pk]), {'omit': 'description,photo_variants'})
+        self.assertNotIn('description', response.data)
+        self.assertIn('photo', response.data)
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('"description"', queries[0]['sql'])
+
+    def test_nested_fieldsets(self):
+        self.client.force_login(self.owner)
+        url = reverse('adoptionrequest-detail', args=[self.adoption_request.pk])
+        data = self.client.get(url, {'fields': 'id,status,pet.name'}).data
+        self.assertEqual(data, {'id': self.adoption_request.pk, 'status': 'pending', 'pet': {'name': 'Rex'}})
+        self.assertNotIn('pet', self.client.get(url, {'omit': 'pet'}).data)
+
+    def test_unknown_fields_are_rejected(self):
+        self.assertEqual(self.client.get(reverse('pet-list'), {'fields': 'id,secret'}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('pet-list'), {'fields': 'name.first'}).status_code, 400)
+
+
+class BenchmarkSuiteTests(TransactionTestCase):
+    """The load-test building blocks: seeded data is valid, runs report what they measured."""
+
+    def test_seeded_dataset_is_consistent(self):
+        owner_ids, requester_ids = seed_dataset(pets=40, adoption_requests=300, owners=4, requesters=30)
+        self.assertEqual((len(owner_ids), len(requester_ids)), (4, 30))
+        self.assertEqual(Pet.objects.count(), 40)
+        self.assertGreater(AdoptionRequest.objects.count(), 200)
+        adopted_with_requests = Pet.objects.filter(status='adopted', adoption_requests__isnull=False).distinct()
+        self.assertEqual(
+            AdoptionRequest.objects.filter(status='approved').count(), adopted_with_requests.count(),
+        )
+        self.assertEqual(sum(PetFacetCount.objects.values_list('count', flat=True)), 40)
+        self.assertEqual(self.client.get(reverse('pet-list'), {'search': 'friendly'}).status_code, 200)
+
+    @override_settings(PETS_SERVER_TIMING=True, PETS_RESPONSE_CACHE_TIMEOUT=0)
+    def test_load_run_reports_latency_and_queries(self):
+        seed_dataset(pets=20, adoption_requests=0, owners=2, requesters=2)
+        stats = run_load(InProcessTransport(), [('/api/pets/', {})] * 12 + [('/api/pets/0/', {})], concurrency=3)
+        self.assertEqual(stats['requests'], 13)
+        self.assertEqual(stats['errors'], 1)
+        self.assertEqual(stats['queries_max'], 1)
+        self.assertGreater(stats['rps'], 0)
+        self.assertLessEqual(stats['p50_ms'], stats['p99_ms'])
+
+    def test_baseline_comparison_flags_regressions(self):
+        row = {'scenario': 'pet-list', 'transport': 'http', 'rps': 100.0, 'p95_ms': 10.0, 'queries_max': 1}
+        baseline = {'results': [row]}
+        self.assertEqual(compare_to_baseline([dict(row, rps=90.0, p95_ms=11.0)], baseline), [])
+        regressions = compare_to_baseline([dict(row, rps=50.0, p95_ms=20.0, queries_max=2)], baseline)
+        self.assertEqual(len(regressions), 3)
+
+
+@skipUnless(connection.vendor == 'sqlite', 'SQLite connection profile')
+class DatabaseProfileTests(TestCase):
+    """New SQLite connections come up with the PETS_SQLITE_PRAGMAS profile."""
+
+    def pragma(self, name):
+        with connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    def test_pragmas_applied_on_connect(self):
+        self.assertEqual(self.pragma('busy_timeout'), 5000)
+        self.assertEqual(self.pragma('cache_size'), -64 * 1024)
+        self.assertEqual(self.pragma('synchronous'), 1)  # NORMAL
+        self.assertEqual(self.pragma('temp_store'), 2)  # MEMORY
+
+
+@skipUnless(connection.vendor == 'sqlite', 'Replicas are simulated with SQLite databases')
+class ReplicaRoutingTests(TransactionTestCase):
+    """Safe requests read from a replica, except right after the same client wrote."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # A second in-memory database standing in for a replica, synced by hand.
+        # Added after setup: the test runner only creates databases in settings.
+        connections.settings['replica'] = {
+            **connections['default'].settings_dict,
+            'NAME': 'file:memorydb_replica?mode=memory&cache=shared',
+        }
+        cls.databases = {'default', 'replica'}
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.databases = {'default'}
+        super().tearDownClass()
+        connections['replica'].close()
+        del connections['replica']
+        del connections.settings['replica']
+
+    def setUp(self):
+        replicas = override_settings(PETS_READ_REPLICAS=['replica'], PETS_REPLICA_LAG_SECONDS=60)
+        replicas.enable()
+        self.addCleanup(replicas.disable)
+        cache.clear()
+        self.owner = User.objects.create_user('owner', password='pw-12345')
+        self.token = Token.objects.create(user=self.owner)
+        self.pet = make_pet(self.owner, photo='')
+        call_command('sync_sqlite_replicas', stdout=StringIO())
+
+    def test_safe_requests_read_the_replica(self):
+        make_pet(self.owner, name='Luna', photo='')
+        names = [pet['name'] for pet in self.client.get(reverse('pet-list')).data['results']]
+        self.assertEqual(names, ['Rex'])
+
+        sync_sqlite_replica('replica')
+        names = {pet['name'] for pet in self.client.get(reverse('pet-list')).data['results']}
+        self.assertEqual(names, {'Rex', 'Luna'})
+
+    def test_writer_reads_its_own_writes_from_the_primary(self):
+        owner = APIClient()
+        owner.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        url = reverse('pet-detail', args=[self.pet.pk])
+        self.assertEqual(owner.patch(url, {'name': 'Max'}).status_code, 200)
+        self.assertEqual(owner.get(url).data['name'], 'Max')
+        # Other clients may still see the lagging replica, which is not cached
+        self.assertEqual(self.client.get(url).data['name'], 'Rex')
+        sync_sqlite_replica('replica')
+        self.assertEqual(self.client.get(url).data['name'], 'Max')
+
+    def test_writes_and_background_work_use_the_primary(self):
+        router = PrimaryReplicaRouter()
+        self.assertEqual(router.db_for_write(AdoptionRequest), 'default')
+        self.assertEqual(router.db_for_read(Pet), 'default')
+        token = allow_replica_reads(True)
+        try:
+            self.assertEqual(router.db_for_read(Pet), 'replica')
+            self.assertEqual(router.db_for_read(Job), 'default')
+            self.assertEqual(router.db_for_read(Token), 'default')
+        finally:
+            reset_replica_reads(token)
+
+
+THROTTLE_RATES = {
+    'signup.anon': '2/min',
+    'adoption_create.token': '1/hour',
+    'adoption_create.user': '1/hour',
+    'pet_list.anon': '3/min',
+    'pet_list.token': '5/min',
+}
+
+
+@override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': THROTTLE_RATES})
+class ThrottleTests(TestCase):
+    """Sliding-window limits per scope, separately for addresses, tokens and users."""
+
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user('owner', password='pw-12345')
+
+    def signup(self, username):
+        return {'username': username, 'email': f'{username}@example.com', 'password': 'pw-123456'}
+
+    def test_signup_is_limited_per_address(self):
+        statuses = [
+            self.client.post(reverse('signup'), self.signup(f'user{i}')).status_code
+            for i in range(3)
+        ]
+        self.assertEqual(statuses, [200, 200, 429])
+        other = self.client.post(reverse('signup'), self.signup('user9'), REMOTE_ADDR='10.0.0.2')
+        self.assertEqual(other.status_code, 200)
+
+    def test_pet_list_rates_per_client_kind(self):
+        statuses = [self.client.get(reverse('pet-list')).status_code for _ in range(4)]
+        self.assertEqual(statuses, [200, 200, 200, 429])
+        response = self.client.get(reverse('pet-list'))
+        self.assertGreater(int(response['Retry-After']), 0)
+        # Detail reads have no scope; tokens get their own, larger bucket
+        self.assertEqual(self.client.get(reverse('pet-detail', args=[make_pet(self.owner).pk])).status_code, 200)
+        token = Token.objects.create(user=self.owner)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        statuses = [client.get(reverse('pet-list')).status_code for _ in range(6)]
+        self.assertEqual(statuses, [200] * 5 + [429])
+        self.assertEqual(self.client.get(reverse('pet-async-list')).status_code, 429)
+
+    def test_async_list_throttles_tokens_at_the_token_rate(self):
+        token = Token.objects.create(user=self.owner)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        statuses = [client.get(reverse('pet-async-list')).status_code for _ in range(6)]
+        self.assertEqual(statuses, [200] * 5 + [429])
+        # The sync list shares the token's bucket
+        self.assertEqual(client.get(reverse('pet-list')).status_code, 429)
+
+    def test_adoption_request_creation_is_limited_per_user(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user('requester'))
+        data = {'requester_name': 'Req', 'phone': '0100000000', 'email': 'req@example.com'}
+        first = client.post(reverse('adoptionrequest-list'), {**data, 'pet_id': make_pet(self.owner).pk})
+        second = client.post(reverse('adoptionrequest-list'), {**data, 'pet_id': make_pet(self.owner).pk})
+        self.assertEqual((first.status_code, second.status_code), (201, 429))
+        # Listing is not the create scope
+        self.assertEqual(client.get(reverse('adoptionrequest-list')).status_code, 200)
+
+    def test_previous_window_is_weighted_by_overlap(self):
+        class Throttle(SlidingWindowThrottle):
+            timer = staticmethod(lambda: now)
+
+            def get_rate(self, request, view):
+                return '10/min'
+
+            def get_cache_key(self, request, view):
+                return 'test-client'
+
+        def allowed(count):
+            return sum(Throttle().allow_request(None, None) for _ in range(count))
+
+        now = 600.0
+        self.assertEqual(allowed(12), 10)
+        # Half-way into the next window half of the previous count still applies
+        now = 690.0
+        self.assertEqual(allowed(10), 5)
+        throttle = Throttle()
+        self.assertFalse(throttle.allow_request(None, None))
+        self.assertAlmostEqual(throttle.wait(), 6.0)
+        now = 720.0
+        self.assertEqual(allowed(12), 5)
+
+
+class SchemaServingTests(TestCase):
+    """/api/schema/ is generated once per code version and served pre-compressed."""
+
+    def setUp(self):
+        schema_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, schema_dir, ignore_errors=True)
+        overrides = override_settings(PETS_SCHEMA_DIR=schema_dir, PETS_CODE_VERSION='v1')
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        clear_schema_cache()
+        self.addCleanup(clear_schema_cache)
+        generate = mock.patch('pets.schema.generate_schema', wraps=generate_schema)
+        self.generate = generate.start()
+        self.addCleanup(generate.stop)
+
+    def test_schema_is_generated_once_and_revalidated(self):
+        first = self.client.get(reverse('schema'), {'format': 'json'})
+        self.assertEqual(first.status_code, 200)
+        self.assertIn('/api/pets/', json.loads(first.content)['paths'])
+        second = self.client.get(reverse('schema'), {'format': 'json'}, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(second.status_code, 304)
+        self.assertEqual(second['ETag'], first['ETag'])
+        self.assertEqual(self.client.get(reverse('schema')).content.split(b'\n')[0], b'openapi: 3.0.3')
+        self.assertEqual(self.generate.call_count, 1)
+
+    def test_compressed_variants_have_their_own_etag(self):
+        plain = self.client.get(reverse('schema'))
+        zipped = self.client.get(reverse('schema'), HTTP_ACCEPT_ENCODING='br;q=0, gzip')
+        self.assertEqual(zipped['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(zipped.content), plain.content)
+        self.assertNotEqual(zipped['ETag'], plain['ETag'])
+        self.assertIn('Accept-Encoding', zipped['Vary'])
+
+    def test_rebuilt_only_when_the_code_version_changes(self):
+        call_command('build_openapi_schema', stdout=StringIO())
+        clear_schema_cache()  # a fresh process reads the files written at deploy
+        self.client.get(reverse('schema'))
+        self.assertEqual(self.generate.call_count, 1)
+        with override_settings(PETS_CODE_VERSION='v2'):
+            self.client.get(reverse('schema'))
+        self.assertEqual(self.generate.call_count, 2)
+        self.assertTrue(all(name.startswith('openapi-v2.') for name in os.listdir(settings.PETS_SCHEMA_DIR)))
+
+
+@skipUnless(np is not None, 'Similar pets need numpy')
+class SimilarPetsTests(TestCase):
+    """/api/pets/{pk}/similar/ ranks available pets from the in-memory feature matrix."""
+
+    def setUp(self):
+        cache.clear()
+        reset_similarity_index()
+        self.addCleanup(reset_similarity_index)
+        self.owner = User.objects.create_user('owner', password='pw-12345')
+        self.pet = make_pet(self.owner, age=2, description='Playful labrador, loves the garden.', photo='')
+        self.twin = make_pet(self.owner, name='Max', age=3, description='Playful young labrador for a garden home.', photo='')
+        self.cousin = make_pet(self.owner, name='Duke', age=9, city='Luxor', description='Calm old hound.', photo='')
+        self.cat = make_pet(self.owner, name='Tom', species='cat', description='Playful tabby, loves the garden.', photo='')
+        self.adopted = make_pet(self.owner, name='Gone', status='adopted', description='Playful labrador.', photo='')
+
+    def similar(self, pet, **params):
+        return self.client.get(reverse('pet-similar', args=[pet.pk]), params)
+
+    def test_ranks_available_pets_by_similarity(self):
+        response = self.similar(self.pet)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([item['name'] for item in response.data], ['Max', 'Duke', 'Tom'])
+        scores = [item['similarity'] for item in response.data]
+        self.assertEqual(scores, sorted(scores, reverse=True))
+        cards = self.similar(self.pet, fields='id,name', limit=1).data
+        self.assertEqual(cards, [{'id': self.twin.pk, 'name': 'Max', 'similarity': cards[0]['similarity']}])
+        self.assertEqual(self.client.get(reverse('pet-similar', args=[0])).status_code, 404)
+
+    def test_saves_and_deletes_refresh_the_index_incrementally(self):
+        with mock.patch.object(SimilarityIndex, 'build', autospec=True, side_effect=SimilarityIndex.build) as build:
+            self.similar(self.pet)
+            with self.captureOnCommitCallbacks(execute=True):
+                newcomer = make_pet(self.owner, name='Buddy', age=2, description='Playful labrador, loves the garden.', photo='')
+                self.twin.status = 'adopted'
+                self.twin.save()
+                cat_pk = self.cat.pk
+                self.cat.delete()
+            names = [item['name'] for item in self.similar(self.pet).data]
+            self.assertEqual(names, ['Buddy', 'Duke'])
+            self.assertEqual(build.call_count, 1)
+        self.assertNotIn(cat_pk, similarity_index())
+        self.assertIn(newcomer.pk, similarity_index())
+
+    def test_change_log_uses_the_configured_cache(self):
+        locmem = 'django.core.cache.backends.locmem.LocMemCache'
+        caches_setting = {'default': {'BACKEND': locmem}, 'shared': {'BACKEND': locmem, 'LOCATION': 'shared'}}
+        with override_settings(CACHES=caches_setting, PETS_SIMILAR_CHANGE_CACHE='shared'):
+            record_changes([self.pet.pk, self.twin.pk])
+            self.assertEqual(current_sequence(), 2)
+            self.assertEqual(caches['shared'].get(SEQUENCE_KEY), 2)
+            self.assertIsNone(caches['default'].get(SEQUENCE_KEY))
+
+
+class AdoptionArchiveTests(TestCase):
+    """Old requests of adopted pets move to the archive; ?include_archived=true reads them back."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user('owner')
+        cls.adopted = make_pet(cls.owner, name='Rex', status='adopted')
+        cls.available = make_pet(cls.owner, name='Luna', species='cat')
+        now = timezone.now()
+        cls.requests = []
+        ages = [(cls.adopted, 800), (cls.adopted, 600), (cls.available, 700), (cls.adopted, 10)]
+        for i, (pet, age_days) in enumerate(ages):
+            adoption_request = AdoptionRequest.objects.create(
+                pet=pet, requester=User.objects.create_user(f'requester{i}'),
+                requester_name=f'Requester {i}', phone='0100000000', email=f'r{i}@example.com',
+            )
+            AdoptionRequest.objects.filter(pk=adoption_request.pk).update(created_at=now - timedelta(days=age_days))
+            cls.requests.append(adoption_request)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.owner)
+
+    def archive(self, *args):
+        call_command('archive_adoption_requests', '--older-than=365', *args, stdout=StringIO())
+
+    def list_ids(self, **params):
+        ids, url = [], reverse('adoptionrequest-list')
+        while url:
+            data = self.client.get(url, params).data
+            ids += [(item['id'], item.get('archived')) for item in data['results']]
+            url, params = data['next'], {}
+        return ids
+
+    def test_moves_only_old_requests_of_adopted_pets(self):
+        self.archive('--batch-size=1')
+        old = [self.requests[0].pk, self.requests[1].pk]
+        self.assertFalse(AdoptionRequest.objects.filter(pk__in=old).exists())
+        archived = ArchivedAdoptionRequest.objects.get(pk=old[0])
+        self.assertEqual((archived.pet_id, archived.pet_name, archived.owner), (self.adopted.pk, 'Rex', self.owner))
+        self.assertEqual(AdoptionRequest.objects.count(), 2)
+        # Rerunning finds nothing more to move
+        self.archive()
+        self.assertEqual(ArchivedAdoptionRequest.objects.count(), 2)
+
+    def test_dry_run_and_max_batches(self):
+        self.archive('--dry-run')
+        self.assertEqual(ArchivedAdoptionRequest.objects.count(), 0)
+        self.archive('--batch-size=1', '--max-batches=1')
+        self.assertEqual(list(ArchivedAdoptionRequest.objects.values_list('pk', flat=True)), [self.requests[0].pk])
+        self.archive('--batch-size=1')
+        self.assertEqual(ArchivedAdoptionRequest.objects.count(), 2)
+
+    def test_include_archived_merges_newest_first(self):
+        self.archive()
+        newest_first = [
+            (self.requests[3].pk, False), (self.requests[1].pk, True),
+            (self.requests[2].pk, False), (self.requests[0].pk, True),
+        ]
+        self.assertEqual(self.list_ids(page_size=1, include_archived='true'), newest_first)
+        self.assertEqual(self.list_ids(page_size=3, include_archived='true'), newest_first)
+        self.assertEqual(self.list_ids(), [(self.requests[3].pk, None), (self.requests[2].pk, None)])
+        # Walking back from the last page gives the same rows
+        last = self.client.get(reverse('adoptionrequest-list'), {'page_size': 3, 'include_archived': 'true'}).data
+        last = self.client.get(last['next']).data
+        previous = self.client.get(last['previous']).data
+        self.assertEqual([item['id'] for item in previous['results']], [pk for pk, _ in newest_first[:3]])
+
+    def test_archived_detail_is_read_only(self):
+        self.archive()
+        url = reverse('adoptionrequest-detail', args=[self.requests[0].pk])
+        self.assertEqual(self.client.get(url).status_code, 404)
+        data = self.client.get(url, {'include_archived': 'true', 'fields': 'id,pet.name,pet.photo'}).data
+        self.assertEqual(data, {'id': self.requests[0].pk, 'pet': {'name': 'Rex'}, 'archived': True})
+        self.assertEqual(self.client.delete(url).status_code, 404)
+        self.client.force_authenticate(self.requests[0].requester)
+        self.assertEqual(self.client.get(url, {'include_archived': 'true'}).status_code, 404)
+
+    def test_deleting_a_pet_archives_its_requests(self):
+        pk = self.available.pk
+        self.client.delete(reverse('pet-detail', args=[pk]))
+        self.assertEqual(list(ArchivedAdoptionRequest.objects.values_list('pk', 'pet_id')), [(self.requests[2].pk, pk)])
+        # Deleting the account takes the owner's archive with it
+        self.owner.delete()
+        self.assertFalse(ArchivedAdoptionRequest.objects.exists())
+
+
+class AdoptionStatsTests(TestCase):
+    """Per-pet and per-owner request counters move with requests and feed the dashboard and popularity order."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user('owner')
+        cls.rex = make_pet(cls.owner, name='Rex')
+        cls.luna = make_pet(cls.owner, name='Luna', species='cat')
+        cls.other = make_pet(User.objects.create_user('other'), name='Max')
+        cls.requesters = [User.objects.create_user(f'requester{i}') for i in range(3)]
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def submit(self, pet, requester):
+        self.client.force_authenticate(requester)
+        response = self.client.post(reverse('adoptionrequest-list'), {
+            'pet_id': pet.pk, 'requester_name': requester.username, 'phone': '0100000000',
+            'email': f'{requester.username}@example.com',
+        })
+        self.assertEqual(response.status_code, 201, response.data)
+        return AdoptionRequest.objects.get(pet=pet, requester=requester)
+
+    def counters(self, pet):
+        return Pet.objects.values_list('pending_requests', 'request_count').get(pk=pet.pk)
+
+    def owner_counters(self):
+        return OwnerAdoptionStats.objects.values_list('pending_requests', 'request_count').get(owner=self.owner)
+
+    def test_counters_follow_requests(self):
+        first, second, third = (self.submit(self.rex, requester) for requester in self.requesters)
+        self.submit(self.luna, self.requesters[0])
+        self.assertEqual(self.counters(self.rex), (3, 3))
+        self.assertEqual(self.owner_counters(), (4, 4))
+        self.assertEqual(Pet.objects.get(pk=self.rex.pk).last_request_at, third.created_at)
+
+        self.client.force_authenticate(self.owner)
+        self.client.post(reverse('adoptionrequest-reject', args=[first.pk]))
+        self.assertEqual(self.counters(self.rex), (2, 3))
+        self.client.delete(reverse('adoptionrequest-detail', args=[third.pk]))
+        self.assertEqual(self.counters(self.rex), (1, 2))
+        self.assertEqual(Pet.objects.get(pk=self.rex.pk).last_request_at, second.created_at)
+        self.client.post(reverse('adoptionrequest-approve', args=[second.pk]))
+        self.assertEqual(self.counters(self.rex), (0, 2))
+        self.assertEqual(self.owner_counters(), (1, 3))
+        # A full save of a stale instance leaves the counters alone
+        self.rex.name = 'Rex II'
+        self.rex.save()
+        self.assertEqual(self.counters(self.rex), (0, 2))
+        call_command('reconcile_adoption_stats', stdout=StringIO())
+        self.assertEqual(self.counters(self.rex), (0, 2))
+
+    def test_saving_a_deleted_pet_needs_force_insert(self):
+        self.submit(self.luna, self.requesters[0])
+        luna = Pet.objects.get(pk=self.luna.pk)
+        Pet.objects.filter(pk=luna.pk).delete()
+        # Full saves of loaded pets only UPDATE the non-counter columns
+        with self.assertRaises(DatabaseError), transaction.atomic():
+            luna.save()
+        with self.assertRaises(DatabaseError), transaction.atomic():
+            luna.save(False, False, None, None)
+        luna.save(force_insert=True)
+        self.assertEqual(Pet.objects.get(pk=luna.pk).name, 'Luna')
+        # The row is written whole, counters included, as loaded
+        self.assertEqual(self.counters(luna), (1, 1))
+
+    def test_archiving_moves_counters_once_per_batch(self):
+        for requester in self.requesters:
+            self.submit(self.rex, requester)
+        self.client.force_authenticate(self.owner)
+        self.client.post(reverse('adoptionrequest-approve', args=[AdoptionRequest.objects.first().pk]))
+        AdoptionRequest.objects.update(created_at=timezone.now() - timedelta(days=400))
+        with CaptureQueriesContext(connection) as queries:
+            call_command('archive_adoption_requests', stdout=StringIO())
+        self.assertLess(len(queries), 15)
+        self.assertEqual(self.counters(self.rex), (0, 0))
+        self.assertEqual(self.owner_counters(), (0, 0))
+        self.assertIsNone(Pet.objects.get(pk=self.rex.pk).last_request_at)
+
+    def test_deletes_move_counters_once_per_pet(self):
+        for requester in self.requesters:
+            self.submit(self.rex, requester)
+            self.submit(self.luna, requester)
+        rex = Pet.objects.get(pk=self.rex.pk)
+        # Savepoint, collect, archive, delete requests and pet, facets, FTS
+        # row, one owner UPDATE: the same however many requests the pet had
+        with self.assertNumQueries(10):
+            rex.delete()
+        self.assertEqual(self.owner_counters(), (3, 3))
+        # Savepoint, collect, delete, owner lookup, one pet and one owner UPDATE
+        with self.assertNumQueries(7):
+            AdoptionRequest.objects.filter(pet=self.luna).delete()
+        self.assertEqual(self.counters(self.luna), (0, 0))
+        self.assertEqual(self.owner_counters(), (0, 0))
+
+    def test_reconcile_repairs_drift(self):
+        self.submit(self.rex, self.requesters[0])
+        Pet.objects.filter(pk=self.rex.pk).update(pending_requests=7, request_count=9)
+        OwnerAdoptionStats.objects.all().delete()
+        out = StringIO()
+        call_command('reconcile_adoption_stats', '--chunk-size=1', stdout=out)
+        self.assertIn('Fixed counters of 1 pets and 1 owners.', out.getvalue())
+        self.assertEqual(self.counters(self.rex), (1, 1))
+        self.assertEqual(self.owner_counters(), (1, 1))
+
+    def test_dashboard(self):
+        self.submit(self.luna, self.requesters[0])
+        self.submit(self.luna, self.requesters[1])
+        self.submit(self.rex, self.requesters[2])
+        self.submit(self.other, self.requesters[0])
+        self.client.force_authenticate(self.owner)
+        with CaptureQueriesContext(connection) as queries:
+            data = self.client.get(reverse('owner-dashboard')).data
+        self.assertEqual(len(queries), 2)
+        self.assertEqual((data['totals']['pending_requests'], data['totals']['request_count']), (3, 3))
+        self.assertEqual([(pet['name'], pet['pending_requests']) for pet in data['results']], [('Luna', 2), ('Rex', 1)])
+        self.client.force_authenticate(User.objects.create_user('nobody'))
+        self.assertEqual(self.client.get(reverse('owner-dashboard')).data['totals']['request_count'], 0)
+        self.client.force_authenticate(None)
+        self.assertEqual(self.client.get(reverse('owner-dashboard')).status_code, 401)
+
+    def test_popularity_ordering(self):
+        self.submit(self.luna, self.requesters[0])
+        self.submit(self.luna, self.requesters[1])
+        self.submit(self.other, self.requesters[2])
+        self.client.force_authenticate(None)
+        names, url, params = [], reverse('pet-list'), {'ordering': 'popularity', 'page_size': 1}
+        while url:
+            data = self.client.get(url, params).data
+            names += [pet['name'] for pet in data['results']]
+            url, params = data['next'], {}
+        self.assertEqual(names, ['Luna', 'Max', 'Rex'])
+        self.assertEqual(self.client.get(reverse('pet-list'), {'ordering': 'name'}).status_code, 400)
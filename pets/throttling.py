@@ -0,0 +1,142 @@
+import hashlib
+import time
+
+from django.core.cache import cache as default_cache
+from rest_framework.authtoken.models import Token
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+DURATIONS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_rate(rate):
+    """``'100/min'`` -> ``(100, 60)``; ``None`` means unthrottled. ``'10/5m'`` is allowed too."""
+    if rate is None:
+        return None, None
+    num, period = rate.split('/')
+    multiplier = int(period[:-1]) if period[:-1].isdigit() else 1
+    unit = period[-1] if period[:-1].isdigit() else period[0]
+    return int(num), multiplier * DURATIONS[unit]
+
+
+class SlidingWindowThrottle(BaseThrottle):
+    """
+    Purpose:
+
+    Rate limiting with a sliding-window counter: one integer per client per
+    window, and the estimate ``previous * (1 - elapsed) + current`` smooths
+    the boundary between windows. An allowed request costs one ``get_many``
+    and one atomic ``add``/``incr``, a refused one just the read (refused
+    requests do not count), whatever the rate; DRF's SimpleRateThrottle reads,
+    trims, pickles and writes back a list of every timestamp in the window.
+
+    Trade-off (``manage.py benchmark_throttles``, in-process LocMemCache):
+    with many distinct clients it is slower, about 47 us per request against
+    35 us, because it touches three keys (two read, one added) where DRF
+    touches two, and LocMemCache validates every key. Both cost two round
+    trips on a shared cache. It wins for busy clients (33 us against 65 us
+    at 1000 requests/min) and stores 5 bytes per client instead of 36, or
+    9 KB at that rate.
+
+    Used for:
+
+    ``ScopedSlidingWindowThrottle``; subclasses provide ``get_rate`` and
+    ``get_cache_key``.
+    """
+    cache = default_cache
+    timer = time.time
+    cache_format = 'throttle:{key}:{window}'
+
+    def get_rate(self, request, view):
+        raise NotImplementedError
+
+    def get_cache_key(self, request, view):
+        raise NotImplementedError
+
+    def allow_request(self, request, view):
+        self.num_requests, self.duration = parse_rate(self.get_rate(request, view))
+        if self.num_requests is None:
+            return True
+        key = self.get_cache_key(request, view)
+        if key is None:
+            return True
+
+        now = self.timer()
+        window, offset = divmod(now, self.duration)
+        self.elapsed = offset / self.duration
+        current_key = self.cache_format.format(key=key, window=int(window))
+        previous_key = self.cache_format.format(key=key, window=int(window) - 1)
+        counts = self.cache.get_many([previous_key, current_key])
+        self.previous = counts.get(previous_key, 0)
+        self.current = counts.get(current_key, 0)
+        weighted = self.previous * (1 - self.elapsed)
+        if weighted + self.current + 1 > self.num_requests:
+            return False
+        # Re-check the atomic result: concurrent requests may have raced past the read
+        self.current = self.increment(current_key, exists=current_key in counts)
+        if weighted + self.current <= self.num_requests:
+            return True
+        self.current = self.cache.decr(current_key)
+        return False
+
+    def increment(self, key, exists):
+        # Counters live for two windows: their own, then as the previous one
+        if not exists and self.cache.add(key, 1, 2 * self.duration):
+            return 1
+        try:
+            return self.cache.incr(key)
+        except ValueError:
+            # Expired between the read and the increment
+            self.cache.add(key, 0, 2 * self.duration)
+            return self.cache.incr(key)
+
+    def wait(self):
+        """Seconds until the estimate drops enough for one more request."""
+        allowed = self.num_requests - 1 - self.current
+        if self.previous and allowed >= 0:
+            # Still within this window, once enough of the previous one slid out
+            return max(1 - allowed / self.previous - self.elapsed, 0) * self.duration
+        # Next window: this window's count becomes the previous one
+        remaining = (1 - self.elapsed) * self.duration
+        needed = 1 - (self.num_requests - 1) / self.current if self.current else 0
+        return remaining + max(needed, 0) * self.duration
+
+
+class ScopedSlidingWindowThrottle(SlidingWindowThrottle):
+    """
+    Purpose:
+
+    Per-scope limits with separate rates for anonymous clients (by IP),
+    token-authenticated clients (by token) and session users (by user id).
+    The scope comes from ``view.throttle_scopes[view.action]`` or
+    ``view.throttle_scope``; rates are ``DEFAULT_THROTTLE_RATES`` entries
+    named ``'<scope>.anon'``, ``'<scope>.token'`` and ``'<scope>.user'``.
+    Views or client kinds without a rate are not throttled.
+
+    Used for:
+
+    Signup, adoption request creation and pet listing.
+    """
+
+    def get_scope(self, view):
+        scopes = getattr(view, 'throttle_scopes', None) or {}
+        return scopes.get(getattr(view, 'action', None), getattr(view, 'throttle_scope', None))
+
+    def client(self, request):
+        """``(kind, identity)`` of the caller."""
+        if isinstance(request.auth, Token):
+            # Digest, so token keys never end up in cache keys
+            return 'token', hashlib.blake2b(request.auth.key.encode(), digest_size=12).hexdigest()
+        if request.user and request.user.is_authenticated:
+            return 'user', str(request.user.pk)
+        return 'anon', self.get_ident(request)
+
+    def get_rate(self, request, view):
+        self.scope = self.get_scope(view)
+        if self.scope is None:
+            return None
+        self.kind, self.ident = self.client(request)
+        return api_settings.DEFAULT_THROTTLE_RATES.get(f'{self.scope}.{self.kind}')
+
+    def get_cache_key(self, request, view):
+        return f'{self.scope}:{self.kind}:{self.ident}'
@@ -1,6 +1,7 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import PetViewSet, AdoptionRequestViewSet, SignupView
+from .views import PetViewSet, AdoptionRequestViewSet, SignupView, OwnerDashboardView
+from .async_views import AsyncPetReadView
 
 router = DefaultRouter()
 router.register(r'pets', PetViewSet, basename='pet')
@@ -8,5 +9,9 @@ router.register(r'adoption-requests', AdoptionRequestViewSet, basename='adoption
 
 urlpatterns = [
     path('signup/', SignupView.as_view(), name='signup'),
+    path('dashboard/', OwnerDashboardView.as_view(), name='owner-dashboard'),
+    # Async-native read path for ASGI deployments (same data as pets/)
+    path('async/pets/', AsyncPetReadView.as_view(), name='pet-async-list'),
+    path('async/pets/<int:pk>/', AsyncPetReadView.as_view(), name='pet-async-detail'),
     path('', include(router.urls)),
 ]
\ No newline at end of file
@@ -1,19 +1,38 @@
+import csv
 from rest_framework import generics, permissions, filters
 from rest_framework.response import Response
-from rest_framework import viewsets
-from rest_framework.exceptions import PermissionDenied, ValidationError
+from rest_framework import viewsets, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ParseError
+from rest_framework.exceptions import NotFound, PermissionDenied, ValidationError
 from rest_framework.authtoken.models import Token
 from django_filters.rest_framework import DjangoFilterBackend
 from django.contrib.auth.models import User
 from django.shortcuts import get_object_or_404
-from .models import Pet, AdoptionRequest
+from django.http import Http404, StreamingHttpResponse
+from .models import Pet, AdoptionRequest, ArchivedAdoptionRequest, OwnerAdoptionStats
 from .serializers import (
     PetSerializer,
+    PetListSerializer,
     SignupSerializer,
     UserSerializer,
-    AdoptionRequestSerializer
+    AdoptionRequestSerializer,
+    ArchivedAdoptionRequestSerializer,
+    DashboardPetSerializer,
+    OwnerAdoptionStatsSerializer,
+    pet_columns,
 )
 from .permissions import IsOwnerOrReadOnly, IsPetOwner
+from .pagination import PetCursorPagination, AdoptionRequestCursorPagination, DashboardCursorPagination
+from .mixins import FieldSelectionMixin, RelationLoadingMixin
+from .cache import CachedPetResponseMixin, get_list_version, response_cache_key
+from .facets import summary_facets, queryset_facets, DEFAULT_TOP_CITIES
+from .filters import PetSearchFilter, PetNearFilter, PetOrderingFilter
+from .bulk import import_pets, export_rows, WRITERS
+from .parsers import NDJSONParser, CSVParser
+from .renderers import NDJSONRenderer, CSVRenderer
+from .adoption import approve_request, load_request, reject_request, submit_request
+from .similarity import similarity_index
 try:
     from drf_spectacular.utils import extend_schema, extend_schema_view # type: ignore
 except ImportError:  # graceful fallback if drf-spectacular not installed yet
@@ -36,6 +55,7 @@ class SignupView(generics.CreateAPIView):
     queryset = User.objects.all()
     serializer_class = SignupSerializer
     permission_classes = [permissions.AllowAny]
+    throttle_scope = 'signup'
 
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
@@ -85,30 +105,130 @@ class SignupView(generics.CreateAPIView):
 #         instance.delete()
 #! Combine the PetListAPI, PetDetailAPI, PetCreateAPI, PetUpdateAPI, and PetDeleteAPI into PetViewSet
 @extend_schema_view(
-    list=extend_schema(summary="List pets", description="Retrieve a list of pets. Supports filtering by species, city, and status."),
-    retrieve=extend_schema(summary="Retrieve pet", description="Get full details for a single pet."),
+    list=extend_schema(summary="List pets", description="Retrieve a cursor-paginated list of pets. Supports filtering by species, city, and status, ranked full-text search with ?search=, ?near=lat,lng&radius=km, most pending adoption requests first with ?ordering=popularity, and sparse fieldsets with ?fields=id,name,photo or ?omit=description.", responses=PetSerializer(many=True)),
+    retrieve=extend_schema(summary="Retrieve pet", description="Get full details for a single pet. Accepts ?fields= / ?omit= like the list."),
     create=extend_schema(summary="Create pet", description="Create a new pet owned by the authenticated user."),
     update=extend_schema(summary="Update pet", description="Replace all fields of a pet you own."),
     partial_update=extend_schema(summary="Partial update pet", description="Update one or more fields of a pet you own."),
-    destroy=extend_schema(summary="Delete pet", description="Delete a pet you own.")
+    destroy=extend_schema(summary="Delete pet", description="Delete a pet you own."),
+    bulk_import=extend_schema(summary="Bulk import pets", description="Create many pets you own from an NDJSON or CSV body. Returns per-row errors."),
+    export=extend_schema(summary="Export pets", description="Stream all pets matching the filters as NDJSON (default) or CSV (?format=csv)."),
+    facets=extend_schema(summary="Pet facet counts", description="Counts per species, status and top cities for the current filters (each facet ignores its own filter)."),
+    similar=extend_schema(summary="Similar pets", description="Up to ?limit= (default 10, max 50) available pets most like this one by species, city, age and description, best first, each with a similarity score. Accepts ?fields= / ?omit=.", responses=PetSerializer(many=True)),
 )
-class PetViewSet(viewsets.ModelViewSet):
+class PetViewSet(CachedPetResponseMixin, FieldSelectionMixin, RelationLoadingMixin, viewsets.ModelViewSet):
     """CRUD operations for pets.
 
     Anyone can read pet data; only the owner may create, modify, or delete their own pets.
-    Filtering: species, city, status.
+    Filtering: species, city, status. Full-text search: ?search= over name, description, city.
+    Nearby: ?near=lat,lng (or a city name) &radius=km, nearest first.
+    Popular: ?ordering=popularity, most pending adoption requests first.
+    Anonymous reads are served from the response cache; detail responses carry an ETag.
+    Sparse fieldsets: ?fields=id,name,photo or ?omit=description (only those columns are read).
     """
     queryset = Pet.objects.all()
     serializer_class = PetSerializer
     # IsOwnerOrReadOnly allows anyone to read, only owners (authenticated) can modify.
     permission_classes = [IsOwnerOrReadOnly]
-    filter_backends = [DjangoFilterBackend]
+    pagination_class = PetCursorPagination
+    filter_backends = [DjangoFilterBackend, PetSearchFilter, PetNearFilter, PetOrderingFilter]
     filterset_fields = ['species', 'city', 'status']
     lookup_field = 'pk'
+    # Scrapers page through the list; see pets.throttling
+    throttle_scopes = {'list': 'pet_list'}
+
+    def get_serializer_class(self):
+        # List pages are rendered from .values() rows (see filter_queryset)
+        if self.action in ('list', 'similar'):
+            return PetListSerializer
+        return super().get_serializer_class()
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        fieldset = self.get_fieldset()
+        if self.action == 'list':
+            columns = pet_columns(PetListSerializer.select(**fieldset))
+            # Annotations (distance_km, search_rank) stay selected for the cursor
+            return queryset.values(*columns, *queryset.query.annotation_select)
+        if self.action == 'retrieve' and fieldset:
+            return queryset.only(*pet_columns(PetListSerializer.select(**fieldset)))
+        return queryset
 
     def perform_create(self, serializer):
         serializer.save(owner=self.request.user)
 
+    @action(detail=False, methods=['post'], url_path='bulk-import',
+            permission_classes=[permissions.IsAuthenticated], parser_classes=[NDJSONParser, CSVParser])
+    def bulk_import(self, request):
+        # Rows are parsed lazily, validated and inserted in chunked transactions
+        try:
+            result = import_pets(request.data, request.user)
+        except (UnicodeDecodeError, csv.Error) as exc:
+            raise ParseError(f"Could not read upload: {exc}")
+        if result.created:
+            code = status.HTTP_201_CREATED
+        elif result.error_count:
+            code = status.HTTP_400_BAD_REQUEST
+        else:
+            code = status.HTTP_200_OK
+        return Response(result.as_dict(), status=code)
+
+    @action(detail=False, methods=['get'])
+    def facets(self, request):
+        # Exact filters are answered from the PetFacetCount summary table;
+        # search/near fall back to one grouped aggregate over their matches
+        filterset = DjangoFilterBackend().get_filterset(request, Pet.objects.all(), self)
+        if not filterset.is_valid():
+            raise ValidationError(filterset.errors)
+        filters = {key: value for key, value in filterset.form.cleaned_data.items() if value}
+        try:
+            top_cities = min(int(request.query_params.get('top_cities', DEFAULT_TOP_CITIES)), 100)
+        except ValueError:
+            raise ValidationError({'top_cities': "Must be an integer."})
+
+        def build():
+            if request.query_params.get('search') or request.query_params.get('near'):
+                queryset = Pet.objects.all()
+                for backend in (PetSearchFilter, PetNearFilter):
+                    queryset = backend().filter_queryset(request, queryset, self)
+                return Response(queryset_facets(queryset, filters, top_cities))
+            return Response(summary_facets(filters, top_cities))
+
+        return self.cached_response(request, response_cache_key(request, 'facets', get_list_version()), build)
+
+    @action(detail=True, methods=['get'])
+    def similar(self, request, pk=None):
+        # Ranked in memory (pets.similarity); the database only renders the winners
+        try:
+            limit = min(max(int(request.query_params.get('limit', 10)), 1), 50)
+        except ValueError:
+            raise ValidationError({'limit': "Must be an integer."})
+        ranked = similarity_index().similar(int(pk), limit) if pk.isdigit() else None
+        if ranked is None:
+            raise NotFound("No Pet matches the given query.")
+        scores = dict(ranked)
+        columns = pet_columns(PetListSerializer.select(**self.get_fieldset()))
+        # Status is re-checked in Python: filtering on it in SQL makes SQLite
+        # prefer the partial status index over the primary key lookups
+        rows = {row['id']: row for row in Pet.objects.filter(pk__in=scores).values(*columns, 'status')}
+        ordered = [rows[pet_id] for pet_id in scores if rows.get(pet_id, {}).get('status') == 'available']
+        data = self.get_serializer(ordered, many=True).data
+        for item, row in zip(data, ordered):
+            item['similarity'] = round(scores[row['id']], 4)
+        return Response(data)
+
+    @action(detail=False, methods=['get'], renderer_classes=[NDJSONRenderer, CSVRenderer])
+    def export(self, request):
+        # Stream straight from a DB iterator so memory stays flat for any table size
+        queryset = self.filter_queryset(self.get_queryset())
+        renderer = request.accepted_renderer
+        response = StreamingHttpResponse(
+            WRITERS[renderer.format](export_rows(queryset)),
+            content_type=f'{renderer.media_type}; charset=utf-8',
+        )
+        response['Content-Disposition'] = f'attachment; filename="pets.{renderer.format}"'
+        return response
+
 # Adoption Requests
 # class AdoptionRequestListAPI(generics.ListAPIView):
 #     serializer_class = AdoptionRequestSerializer
@@ -127,34 +247,113 @@ class PetViewSet(viewsets.ModelViewSet):
 
 #! Combine the AdoptionRequestListAPI and AdoptionRequestCreateAPI into AdoptionRequestViewSet
 @extend_schema_view(
-    list=extend_schema(summary="List adoption requests", description="List adoption requests for pets you own."),
-    retrieve=extend_schema(summary="Retrieve adoption request", description="Get details of a single adoption request for one of your pets."),
+    list=extend_schema(summary="List adoption requests", description="List adoption requests for pets you own. With ?include_archived=true, archived requests are merged in (newest first, flagged archived, pet reduced to id and name)."),
+    retrieve=extend_schema(summary="Retrieve adoption request", description="Get details of a single adoption request for one of your pets. With ?include_archived=true, archived requests are found too."),
     create=extend_schema(summary="Create adoption request", description="Submit an adoption request for a pet (provide pet_id in the body)."),
     destroy=extend_schema(summary="Delete adoption request", description="Delete an adoption request (pet owner only)."),
     update=extend_schema(summary="Update adoption request", description="Update an adoption request (pet owner only)."),
-    partial_update=extend_schema(summary="Partial update adoption request", description="Partially update an adoption request (pet owner only).")
+    partial_update=extend_schema(summary="Partial update adoption request", description="Partially update an adoption request (pet owner only)."),
+    approve=extend_schema(summary="Approve adoption request", description="Approve a pending request, reject the pet's other pending requests and mark the pet adopted (pet owner only). 409 if the pet was already adopted or the request already decided.", request=None),
+    reject=extend_schema(summary="Reject adoption request", description="Reject a pending request (pet owner only). 409 if it was already decided.", request=None),
 )
-class AdoptionRequestViewSet(viewsets.ModelViewSet):
+class AdoptionRequestViewSet(FieldSelectionMixin, RelationLoadingMixin, viewsets.ModelViewSet):
     """Manage adoption requests for pets.
 
-    Pet owners can view/manage requests targeting their pets. Authenticated users can create a new request (cannot request their own pet, duplicates blocked).
+    Pet owners can view/manage requests targeting their pets and approve or reject them. Authenticated users can create a new request (cannot request their own pet, duplicates blocked).
+    Sparse fieldsets reach into the nested pet: ?fields=id,status,pet.name or ?omit=pet.
+    Old requests of adopted pets, and requests of deleted pets, live in ArchivedAdoptionRequest;
+    ?include_archived=true reads them back (read-only) on list and retrieve.
     """
     serializer_class = AdoptionRequestSerializer
     # Auth required; object-level: only pet owner can access specific request objects (IsPetOwner)
     permission_classes = [permissions.IsAuthenticated, IsPetOwner]
+    pagination_class = AdoptionRequestCursorPagination
+    # Nested PetSerializer and IsPetOwner both read the pet; fetch it in the same JOIN
+    select_related = ('pet',)
+    throttle_scopes = {'create': 'adoption_create'}
 
     def get_queryset(self):
-        return AdoptionRequest.objects.filter(pet__owner=self.request.user)
+        if getattr(self, 'swagger_fake_view', False):
+            # Schema generation runs as AnonymousUser
+            return AdoptionRequest.objects.none()
+        return self.load_relations(AdoptionRequest.objects.filter(pet__owner=self.request.user))
+
+    def include_archived(self):
+        return self.request.query_params.get('include_archived', '').lower() in ('1', 'true', 'yes')
+
+    def list(self, request, *args, **kwargs):
+        if not self.include_archived():
+            return super().list(request, *args, **kwargs)
+        # Both tables are read in (created_at, id) order and merged into one page
+        querysets = [self.filter_queryset(self.get_queryset()), ArchivedAdoptionRequest.objects.filter(owner=request.user)]
+        page = self.paginator.paginate_querysets(querysets, request, view=self)
+        return self.get_paginated_response(self.serialize_with_archived(page))
+
+    def retrieve(self, request, *args, **kwargs):
+        try:
+            return super().retrieve(request, *args, **kwargs)
+        except Http404:
+            if not self.include_archived() or not str(kwargs['pk']).isdigit():
+                raise
+        archived = get_object_or_404(ArchivedAdoptionRequest, pk=kwargs['pk'], owner=request.user)
+        return Response(self.serialize_with_archived([archived])[0])
+
+    def serialize_with_archived(self, rows):
+        """Live and archived requests in the given order, each flagged ``archived``."""
+        live = [row for row in rows if isinstance(row, AdoptionRequest)]
+        archived = [row for row in rows if isinstance(row, ArchivedAdoptionRequest)]
+        # The live serializer goes first so unknown ?fields= names are reported against it
+        items = dict(zip(((False, row.pk) for row in live), self.get_serializer(live, many=True).data))
+        archived_data = ArchivedAdoptionRequestSerializer(
+            archived, many=True, context=self.get_serializer_context(), **self.get_fieldset(),
+        ).data
+        items.update(zip(((True, row.pk) for row in archived), archived_data))
+        data = []
+        for row in rows:
+            flag = isinstance(row, ArchivedAdoptionRequest)
+            data.append({**items[flag, row.pk], 'archived': flag})
+        return data
 
     def perform_create(self, serializer):
         pet_id = self.request.data.get('pet_id')  # type: ignore[attr-defined]
         if not pet_id:
             raise ValidationError({"pet_id": "This field is required."})
-        pet = get_object_or_404(Pet, pk=pet_id)
-        # Prevent owners from requesting adoption of their own pet
-        if pet.owner == self.request.user:
-            raise ValidationError("You cannot submit an adoption request for your own pet.")
-        # Prevent duplicate requests by the same user for the same pet
-        if AdoptionRequest.objects.filter(pet=pet, requester=self.request.user).exists():
-            raise ValidationError("You have already submitted a request for this pet.")
-        serializer.save(pet=pet, requester=self.request.user)
\ No newline at end of file
+        # Existence, ownership, availability and duplicate checks run under the pet lock
+        submit_request(serializer, pet_id, self.request.user)
+
+    @action(detail=True, methods=['post'])
+    def approve(self, request, pk=None):
+        # Lookup and decision each retry on their own when the database is busy
+        adoption_request = approve_request(load_request(self.get_object))
+        return Response(self.get_serializer(adoption_request).data)
+
+    @action(detail=True, methods=['post'])
+    def reject(self, request, pk=None):
+        adoption_request = reject_request(load_request(self.get_object))
+        return Response(self.get_serializer(adoption_request).data)
+
+
+@extend_schema_view(
+    get=extend_schema(summary="Owner dashboard", description="Adoption request totals across your pets, then your pets with their pending request count, request count and last request time, most pending first (cursor-paginated)."),
+)
+class OwnerDashboardView(generics.ListAPIView):
+    """Adoption overview for the signed-in owner.
+
+    Totals come from the owner's OwnerAdoptionStats row and each pet's numbers
+    from its own counters (see pets.stats), so nothing is counted per request.
+    """
+    serializer_class = DashboardPetSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = DashboardCursorPagination
+
+    def get_queryset(self):
+        if getattr(self, 'swagger_fake_view', False):
+            # Schema generation runs as AnonymousUser
+            return Pet.objects.none()
+        return Pet.objects.filter(owner=self.request.user).only(*DashboardPetSerializer.Meta.fields)
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        stats = OwnerAdoptionStats.objects.filter(owner=self.request.user).first() or OwnerAdoptionStats()
+        response.data = {'totals': OwnerAdoptionStatsSerializer(stats).data, **response.data}
+        return response